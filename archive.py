@@ -0,0 +1,377 @@
+"""
+Archive
+
+This file contains the binary archive of pressure scans.
+
+Many .apd files are packed into two NumPy files that are opened with
+np.memmap, so scans are analyzed again without parsing text:
+
+<archive>.npy: (N, rows, cols) float32 frames, the size of the largest
+    plate of the files. Each frame is the pressure plate with the
+    footprint of one file at its sensor offset and -1 where there is no
+    data.
+<archive>.index.npy: (N,) structured array with the header metadata of
+    each frame (file, patient names, foot side, date and the [Technical]
+    plate size and sensor offsets).
+
+Packed with --sparse, <archive>.npy is instead the (M,) backend.sensor_dtype
+entries of the sensors with data of every file, in file order, and the
+start and count fields of the index locate the entries of each frame. A
+footprint covers about a tenth of the plate, so the archive is about ten
+times smaller and chunks of pairs are read with as many fewer bytes.
+
+Usage:
+    python archive.py pack <input_dir> <archive.npy> [--index FILE [--reindex]] [--sparse]
+    python archive.py analyze <archive.npy> <output_file>
+"""
+
+from pathlib import Path
+
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import backend
+
+
+index_dtype = np.dtype([
+    ('file', 'U260'),
+    ('first_name', 'U64'),
+    ('last_name', 'U64'),
+    ('foot_side', 'U1'),
+    ('date', 'datetime64[s]'),
+    ('max_sensors_x', 'i2'),
+    ('max_sensors_y', 'i2'),
+    ('row', 'i2'),
+    ('col', 'i2'),
+    ('height', 'i2'),
+    ('width', 'i2'),
+    ('ldist_x', 'f4'),
+    ('ldist_y', 'f4'),
+    ('start', 'i8'),
+    ('count', 'i4'),
+    ('valid', '?')
+])
+
+
+def index_path(archive_path: str) -> Path:
+    """ Metadata index file of an archive """
+    archive_path = Path(archive_path)
+    return archive_path.with_name(f'{archive_path.stem}.index.npy')
+
+
+def pack(files: list, archive_path: str, sparse: bool = False) -> int:
+    """ Pack pressure data files into an archive
+
+    Files that cannot be read or do not fit in a frame are kept as
+    invalid entries with an empty frame, so frame numbers follow files.
+
+    Parameters
+    ----------
+    files: list
+        Input data file paths
+    archive_path: str
+        Output .npy file path of the frames
+    sparse: bool
+        Store only the sensors with data of each frame
+
+    Returns
+    -------
+    count: int
+        Number of valid frames
+    """
+    index = np.zeros(len(files), dtype=index_dtype)
+    index['date'] = np.datetime64('NaT')
+
+    if sparse:
+        # The number of entries is only known at the end, so they are
+        # written to a temporary file first
+        with tempfile.TemporaryFile() as temp_file:
+            start = 0
+            for i, file in enumerate(files):
+                reader = _read_entry(file, index[i])
+                index[i]['start'] = start
+                if reader is not None:
+                    sensors = reader.sparse().sensors
+                    temp_file.write(sensors.tobytes())
+                    index[i]['count'] = len(sensors)
+                    start += len(sensors)
+
+            frames = np.lib.format.open_memmap(archive_path, mode='w+', dtype=backend.sensor_dtype, shape=(start,))
+            if start:
+                frames[:] = np.memmap(temp_file, dtype=backend.sensor_dtype, mode='r', shape=(start,))
+    else:
+        frames = np.lib.format.open_memmap(archive_path, mode='w+', dtype=np.float32,
+            shape=(len(files), *_largest_plate(files)))
+        for i, file in enumerate(files):
+            frames[i] = -1.0
+            reader = _read_entry(file, index[i])
+            if reader is not None:
+                frames[i, reader.row:reader.row+reader.height, reader.col:reader.col+reader.width] = reader.data
+
+    frames.flush()
+    del frames
+    np.save(index_path(archive_path), index)
+    return int(index['valid'].sum())
+
+
+def _largest_plate(files: list) -> tuple:
+    """ Largest plate size of the headers of the files, (0, 0) if none can be read """
+    shape = (0, 0)
+    for file in files:
+        try:
+            plate_shape = backend.ApdReader(file, read_data=False).plate_shape
+        except (OSError, KeyError, ValueError):
+            continue
+        shape = (max(shape[0], plate_shape[0]), max(shape[1], plate_shape[1]))
+    return shape
+
+
+def _read_entry(file: str, entry: np.void):
+    """ Read a file and fill its index entry, the reader or None if it is not valid """
+    entry['file'] = str(file)
+    try:
+        reader = backend.ApdReader(file)
+        customer = reader.header.get('Customer', {})
+        entry['first_name'] = customer.get('FirstName', '')
+        entry['last_name'] = customer.get('LastName', '')
+        entry['foot_side'] = customer.get('FootSide', '')
+        entry['date'] = np.datetime64(reader.scan_time, 's')
+        entry['max_sensors_x'] = reader.technical('MaxSensorsX')
+        entry['max_sensors_y'] = reader.technical('MaxSensorsY')
+        entry['row'], entry['col'] = reader.row, reader.col
+        entry['height'], entry['width'] = reader.height, reader.width
+        entry['ldist_x'] = reader.technical('LDistX')
+        entry['ldist_y'] = reader.technical('LDistY')
+    except (OSError, KeyError, ValueError):
+        return None
+    rows, cols = reader.plate_shape
+    if reader.row < 0 or reader.col < 0 or reader.row + reader.height > rows or reader.col + reader.width > cols:
+        return None
+    entry['valid'] = True
+    return reader
+
+
+class ScanArchive:
+    def __init__(self, archive_path: str) -> None:
+        """ Read-only memory-mapped archive of pressure scans
+
+        Parameters
+        ----------
+        archive_path: str
+            .npy file path of the frames
+
+        Returns
+        -------
+        None
+        """
+        self.archive_path = archive_path
+        self.frames = np.load(archive_path, mmap_mode='r')
+        self.index = np.load(index_path(archive_path))
+        self.sparse = self.frames.ndim == 1
+        if self.sparse:
+            if self.index.shape[0] and self.index['start'][-1] + self.index['count'][-1] != self.frames.shape[0]:
+                raise ValueError(f'{archive_path}: {self.frames.shape[0]} sensor entries do not match the index')
+        elif self.frames.shape[0] != self.index.shape[0]:
+            raise ValueError(f'{archive_path}: {self.frames.shape[0]} frames and {self.index.shape[0]} index entries')
+
+    def __len__(self) -> int:
+        return self.index.shape[0]
+
+    def plate_shape(self, i: int) -> tuple:
+        """ Plate size of a scan as (rows, cols) """
+        entry = self.index[i]
+        return (int(entry['max_sensors_x']), int(entry['max_sensors_y']))
+
+    def scan(self, i: int) -> backend.SparseScan:
+        """ Sparse footprint of a scan """
+        entry = self.index[i]
+        if self.sparse:
+            sensors = self.frames[entry['start']:entry['start']+entry['count']]
+            return backend.SparseScan(sensors, self.metadata(i), self.plate_shape(i))
+        return backend.SparseScan.from_dense(self.footprint(i), self.metadata(i), self.plate_shape(i))
+
+    def footprint(self, i: int) -> np.ndarray:
+        """ Pressure data of a scan, as ApdReader.data """
+        entry = self.index[i]
+        if self.sparse:
+            return self.scan(i).dense()
+        return self.frames[i, entry['row']:entry['row']+entry['height'], entry['col']:entry['col']+entry['width']]
+
+    def metadata(self, ids) -> np.ndarray:
+        """ (N, 4) footprint windows as (row, col, height, width) """
+        entries = self.index[ids]
+        return np.stack([entries['row'], entries['col'], entries['height'], entries['width']], axis=-1)
+
+    def pairs(self) -> tuple:
+        """ Left and right frame numbers of each study
+
+        Valid left scans are paired with the valid right scan of the same
+        directory whose file name starts with R instead of L, the same
+        convention as batch.find_pairs.
+
+        Returns
+        -------
+        left_ids: np.array
+            Frame numbers of left feet
+        right_ids: np.array
+            Frame numbers of right feet
+        """
+        frame_of = {file: i for i, file in enumerate(self.index['file']) if self.index['valid'][i]}
+        left_ids = []
+        right_ids = []
+        for file, i in frame_of.items():
+            name = Path(file).name
+            if not name[:1] in ('L', 'l'):
+                continue
+            for prefix in ('R', 'r'):
+                j = frame_of.get(str(Path(file).with_name(f'{prefix}{name[1:]}')))
+                if j is not None:
+                    left_ids.append(i)
+                    right_ids.append(j)
+                    break
+        return np.array(left_ids, dtype=np.intp), np.array(right_ids, dtype=np.intp)
+
+    def pressure(self, left_ids, right_ids, shape: tuple = None) -> np.ndarray:
+        """ (N, rows, cols) stitched pressure images, as returned by extract
+
+        The footprints of both feet do not overlap, so outside its window
+        each frame is -1 and the stitched image is their maximum. shape is
+        the plate size of the pairs, by default that of the first one.
+        """
+        if shape is None:
+            shape = self.plate_shape(left_ids[0]) if len(left_ids) else (0, 0)
+        rows, cols = shape
+        if self.sparse:
+            pressure = np.full((len(left_ids), rows, cols), -10.0, dtype=np.float32)
+            for ids in (left_ids, right_ids):
+                images, rows, cols, values = self._sensors(ids)
+                pressure[images, rows, cols] = values * np.float32(10)
+            return pressure
+        pressure = np.maximum(self.frames[left_ids, :rows, :cols], self.frames[right_ids, :rows, :cols])
+        pressure *= 10
+        return pressure
+
+    def _sensors(self, ids) -> tuple:
+        """ Image number, plate row and col and value of the sensor entries of sparse frames """
+        entries = self.index[ids]
+        counts = entries['count'].astype(np.intp)
+        total = counts.sum()
+        # Entry numbers of the contiguous runs of each frame
+        offsets = np.repeat(entries['start'] - (np.cumsum(counts) - counts), counts)
+        sensors = self.frames[np.arange(total) + offsets]
+        images = np.repeat(np.arange(len(entries)), counts)
+        rows = sensors['row'] + np.repeat(entries['row'].astype(np.intp), counts)
+        cols = sensors['col'] + np.repeat(entries['col'].astype(np.intp), counts)
+        return images, rows, cols, sensors['value']
+
+    def analyze(self, left_ids, right_ids, chunk_size: int = 4096) -> np.recarray:
+        """ Analysis of pairs of scans, chunk by chunk from the memory map
+
+        Pairs are analyzed in groups of the same plate size, so each image
+        has the size of its own plate.
+
+        Parameters
+        ----------
+        left_ids: np.array
+            Frame numbers of left feet
+        right_ids: np.array
+            Frame numbers of right feet
+        chunk_size: int
+            Number of pairs read and analyzed at once
+
+        Returns
+        -------
+        results: np.recarray
+            (N,) record array with the fields of backend.analysis_dtype
+        """
+        left_ids = np.asarray(left_ids, dtype=np.intp)
+        right_ids = np.asarray(right_ids, dtype=np.intp)
+        results = np.zeros(left_ids.shape[0], dtype=backend.analysis_dtype).view(np.recarray)
+        plates = np.stack([self.index['max_sensors_x'][left_ids], self.index['max_sensors_y'][left_ids]], axis=-1)
+        for shape in np.unique(plates, axis=0):
+            pairs = np.flatnonzero(np.all(plates == shape, axis=1))
+            for start in range(0, pairs.shape[0], chunk_size):
+                chunk = pairs[start:start + chunk_size]
+                results[chunk] = backend.analisis_batch(
+                    self.pressure(left_ids[chunk], right_ids[chunk], tuple(shape)),
+                    self.metadata(left_ids[chunk]), self.metadata(right_ids[chunk]),
+                    chunk_size)
+        return results
+
+
+def analyze(archive_path: str, output_file: str, chunk_size: int = 4096) -> int:
+    """ Analyze every pair of scans of an archive
+
+    Parameters
+    ----------
+    archive_path: str
+        .npy file path of the frames
+    output_file: str
+        Output file path. Parquet is used for .parquet files, CSV otherwise
+    chunk_size: int
+        Number of pairs read and analyzed at once
+
+    Returns
+    -------
+    count: int
+        Number of analyzed pairs
+    """
+    import batch
+
+    archive = ScanArchive(archive_path)
+    left_ids, right_ids = archive.pairs()
+    results = archive.analyze(left_ids, right_ids, chunk_size)
+
+    def rows():
+        for left_id, right_id, record in zip(left_ids, right_ids, results):
+            row = dict(zip(backend.analysis_dtype.names, record.tolist()))
+            row['left_file'] = str(archive.index['file'][left_id])
+            row['right_file'] = str(archive.index['file'][right_id])
+            row['error'] = None
+            yield row
+
+    if Path(output_file).suffix.lower() == '.parquet':
+        return batch.write_parquet(rows(), output_file)
+    return batch.write_csv(rows(), output_file)
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Binary archive of plantar pressure scans')
+    commands = parser.add_subparsers(dest='command', required=True)
+    pack_parser = commands.add_parser('pack', help='pack the .apd files of a directory tree')
+    pack_parser.add_argument('input_dir', help='root directory of the .apd files')
+    pack_parser.add_argument('archive', help='output .npy archive')
+    pack_parser.add_argument('--index', help='SQLite scan index used to list the files')
+    pack_parser.add_argument('--reindex', action='store_true', help='update the scan index before listing the files')
+    pack_parser.add_argument('--sparse', action='store_true', help='store only the sensors with data')
+    analyze_parser = commands.add_parser('analyze', help='analyze every pair of scans of an archive')
+    analyze_parser.add_argument('archive', help='input .npy archive')
+    analyze_parser.add_argument('output_file', help='output .csv or .parquet file')
+    analyze_parser.add_argument('--chunksize', type=int, default=4096, help='pairs analyzed at once')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        if args.reindex and not args.index:
+            pack_parser.error('--reindex requires --index')
+        if args.index and not args.reindex and not os.path.isfile(args.index):
+            pack_parser.error(f'{args.index} does not exist, build it with --reindex')
+        if args.index:
+            import scan_index
+
+            scans = scan_index.ScanIndex(args.index)
+            if args.reindex:
+                scans.update(args.input_dir)
+            files = scans.files(args.input_dir)
+            scans.close()
+        else:
+            files = sorted(Path(args.input_dir).rglob('*.apd'))
+        count = pack(files, args.archive, args.sparse)
+        print(f'{count} of {len(files)} files packed')
+    else:
+        count = analyze(args.archive, args.output_file, args.chunksize)
+        print(f'{count} pairs analyzed')
+    sys.exit(0)
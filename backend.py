@@ -3,24 +3,37 @@ Backend
 
 This file contains supplementary methods and classes applied to the frontend.
 
-1. Class MPLCanvas: configuration of the plot canvas
+1. Class MPLCanvas: configuration of the plot canvas (mpl_canvas, imported on first use)
+   Class HeatmapView: matplotlib-free pressure image widget (heatmap_view, imported on first use)
 2. Analysis methods: methods to process and analyze anthropometric measurements
+   Class SparseScan: footprints as lists of their active sensors
+   Class IntegralImage: summed-area tables for rectangular region sums
+   Class ExtractCache: content-hash cache of extract results
 3. Database methods: methods of the database operations
 4. About class and method: Dialogs of information about me and Qt
+5. Class Instrumentation: optional timing of the backend stages
+   Class DiagnosticsDialog: last stage timings
 
 """
 
-from PyQt6 import QtWidgets
+from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtCore import QSettings
 
+import os
+import re
 import sys
+import json
+import time
+import hashlib
+import datetime
+import tracemalloc
+import contextlib
+import functools
+import threading
+import collections
 import numpy as np
-import pandas as pd
-import psycopg2
-import cv2
-
-from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
+from pathlib import Path
+from decimal import Decimal
 
 import material3_components as mt3
 
@@ -34,40 +47,517 @@ dark = {
     'on_surface': '#E5E9F0'
 }
 
-class MPLCanvas(FigureCanvasQTAgg):
-    def __init__(self, parent, theme: bool) -> None:
-        """ Canvas settings for plotting signals """
-        self.fig = Figure()
-        self.axes = self.fig.add_subplot(111)
-
-        FigureCanvasQTAgg.__init__(self, self.fig)
-        self.setParent(parent)
-
-        self.apply_styleSheet(theme)
-
-    def apply_styleSheet(self, theme):
-        self.fig.subplots_adjust(left=0.05, bottom=0.15, right=1, top=0.95, wspace=0, hspace=0)
-        self.axes.spines['top'].set_visible(False)
-        self.axes.spines['right'].set_visible(False)
-        self.axes.spines['bottom'].set_visible(False)
-        self.axes.spines['left'].set_visible(False)
-        if theme:
-            self.fig.set_facecolor(f'{light["surface"]}')
-            self.axes.set_facecolor(f'{light["surface"]}')
-            self.axes.xaxis.label.set_color(f'{light["on_surface"]}')
-            self.axes.yaxis.label.set_color(f'{light["on_surface"]}')
-            self.axes.tick_params(axis='both', colors=f'{light["on_surface"]}', labelsize=8)
-        else:
-            self.fig.set_facecolor(f'{dark["surface"]}')
-            self.axes.set_facecolor(f'{dark["surface"]}')
-            self.axes.xaxis.label.set_color(f'{dark["on_surface"]}')
-            self.axes.yaxis.label.set_color(f'{dark["on_surface"]}')
-            self.axes.tick_params(axis='both', colors=f'{dark["on_surface"]}', labelsize=8)
+def __getattr__(name: str):
+    """ Import the pressure map widgets on first use, matplotlib takes most of the startup time """
+    if name == 'MPLCanvas':
+        from mpl_canvas import MPLCanvas
+        return MPLCanvas
+    if name in ('HeatmapView', 'color_lut', 'jet_segments'):
+        import heatmap_view
+        return getattr(heatmap_view, name)
+    raise AttributeError(f"module 'backend' has no attribute '{name}'")
+
+
+# ---------------
+# Instrumentación
+# ---------------
+class Instrumentation:
+    def __init__(self, history: int = 200) -> None:
+        """ Registry of the wall time and memory of backend stages
+
+        Stages are measured with the stage context manager or the timed
+        decorator. While disabled, stage returns a shared null context and
+        timed calls the function directly, so the instrumented code runs
+        as before.
+
+        Parameters
+        ----------
+        history: int
+            Number of last measurements kept
+
+        Returns
+        -------
+        None
+        """
+        self.enabled = False
+        self.records = collections.deque(maxlen=history)
+        self.totals = {}
+        self.log_file = None
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def enable(self, track_memory: bool = False, log_file: str = None) -> None:
+        """ Start measuring stages
+
+        Parameters
+        ----------
+        track_memory: bool
+            Also measure the peak memory allocated in each stage with
+            tracemalloc, which slows down every allocation. The memory
+            is process-wide, see _measure
+        log_file: str
+            Append each measurement to this file as a JSON line
+        """
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.log_file = log_file
+        self.enabled = True
+
+    def disable(self) -> None:
+        """ Stop measuring stages, the collected measurements are kept """
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def stage(self, name: str):
+        """ Context manager measuring a block as the stage name """
+        if not self.enabled:
+            return _null_stage
+        return self._measure(name)
+
+    def timed(self, name: str):
+        """ Decorator measuring each call of a function as the stage name """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._measure(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextlib.contextmanager
+    def _measure(self, name: str):
+        """ Measure a block
+
+        The memory of a stage is the peak traced memory during the block
+        above the traced memory at its start. The peak is reset at every
+        stage start and the peak reached so far by the enclosing stages
+        of the thread is kept aside, so nested stages are measured
+        correctly. tracemalloc is process-wide, so stages running at the
+        same time in other threads add their allocations and reset the
+        peak, and then the memory is only approximate.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            peaks = getattr(self.local, 'peaks', None)
+            if peaks is None:
+                peaks = self.local.peaks = []
+            start_memory, peak = tracemalloc.get_traced_memory()
+            if peaks:
+                peaks[-1] = max(peaks[-1], peak)
+            tracemalloc.reset_peak()
+            peaks.append(start_memory)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            allocated = None
+            if tracing:
+                peak = max(peaks.pop(), tracemalloc.get_traced_memory()[1])
+                if peaks:
+                    peaks[-1] = max(peaks[-1], peak)
+                allocated = max(peak - start_memory, 0)
+            self.record(name, seconds, allocated)
+
+    def record(self, name: str, seconds: float, allocated: int = None) -> None:
+        """ Add a measurement of a stage """
+        record = {'time': time.time(), 'stage': name, 'seconds': seconds, 'bytes': allocated}
+        self.records.append(record)
+        with self.lock:
+            total = self.totals.setdefault(name, [0, 0.0, 0])
+            total[0] += 1
+            total[1] += seconds
+            total[2] += allocated or 0
+        # One append of a whole line, lines of other threads are not interleaved
+        log_file = self.log_file
+        if log_file:
+            with open(log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+
+    def last(self, count: int = 50) -> list:
+        """ Last measurements, newest first """
+        return list(self.records)[:-count-1:-1]
+
+    def prometheus(self) -> str:
+        """ Stage totals in Prometheus text exposition format """
+        with self.lock:
+            totals = {name: tuple(total) for name, total in self.totals.items()}
+        lines = ['# HELP plantar_stage_seconds Wall time of backend stages.',
+            '# TYPE plantar_stage_seconds summary']
+        for name, (count, seconds, _) in sorted(totals.items()):
+            lines.append(f'plantar_stage_seconds_count{{stage="{name}"}} {count}')
+            lines.append(f'plantar_stage_seconds_sum{{stage="{name}"}} {seconds:.9f}')
+        lines += ['# HELP plantar_stage_bytes Peak memory allocated by backend stages, approximate and process-wide.',
+            '# TYPE plantar_stage_bytes summary']
+        for name, (count, _, allocated) in sorted(totals.items()):
+            lines.append(f'plantar_stage_bytes_count{{stage="{name}"}} {count}')
+            lines.append(f'plantar_stage_bytes_sum{{stage="{name}"}} {allocated}')
+        return '\n'.join(lines) + '\n'
+
+
+_null_stage = contextlib.nullcontext()
+instrumentation = Instrumentation()
+
+
+# -------------------------
+# Lectura de Archivos .apd
+# -------------------------
+def _read_header(f) -> dict:
+    """ Header sections of an open .apd file, read up to the [Data] line """
+    header = {}
+    section = None
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = line[1:-1]
+            if section == 'Data':
+                return header
+            header[section] = {}
+        elif section is not None and '=' in line:
+            key, value = line.split('=', 1)
+            header[section][key.strip()] = value.strip()
+    raise ValueError(f'{f.name}: [Data] section not found')
+
+
+# Celdas vacías (o solo espacios) de una fila de datos separada por tabuladores
+_empty_cell = re.compile(r'(?<![^\t])[ ]*(?![^\t])')
+
+
+def _read_frame(f, out: np.array) -> bool:
+    """ Read the next frame of the [Data] section of an open .apd file
+
+    Empty lines and section lines between frames are skipped and rows
+    missing at the end of the file are left as -1. The rows are trimmed
+    or padded to the frame width and the whole block is parsed at once,
+    with empty cells mapped to -1.
+
+    Returns
+    -------
+    found: bool
+        False at the end of the file
+    """
+    out.fill(-1.0)
+    rows, cols = out.shape
+    block = []
+    for line in f:
+        if not block and (not line.strip() or line.startswith('[')):
+            continue
+        # Trailing empty cells read as -1 like the padding
+        line = line.rstrip('\r\n\t ')
+        count = line.count('\t') + 1
+        if count > cols:
+            line = '\t'.join(line.split('\t')[:cols])
+        elif count < cols:
+            line += '\t' * (cols - count)
+        block.append(line)
+        if len(block) == rows:
+            break
+    if not block:
+        return False
+    text = '\t'.join(block)
+    if '\t\t' in text or ' ' in text or text.startswith('\t') or text.endswith('\t'):
+        text = _empty_cell.sub('-1', text)
+    out[:len(block)] = np.fromstring(text, dtype=out.dtype, sep='\t').reshape(len(block), cols)
+    return True
+
+
+class ApdReader:
+    def __init__(self, file_path: str, dtype=np.float32, read_data: bool = True) -> None:
+        """ Single pass reader of .apd pressure data files
+
+        The INI-style header sections ([General], [Customer], [Technical])
+        are parsed by name and the tab separated [Data] grid is written
+        directly into a preallocated array sized from [Technical].
+
+        Dynamic recordings hold consecutive frames in [Data]. data is the
+        first frame and frames() streams all of them.
+
+        Parameters
+        ----------
+        file_path: str
+            Input data file path
+        dtype: numpy dtype
+            Data type of the pressure array (float32 by default)
+        read_data: bool
+            Read the first frame into data, otherwise only the header
+
+        Returns
+        -------
+        None
+        """
+        self.file_path = file_path
+        self.dtype = dtype
+        self.header = {}
+        self.data = None
+
+        self.read(read_data)
+
+    @instrumentation.timed('parse')
+    def read(self, read_data: bool = True) -> None:
+        """ Read header sections and the first frame in one pass """
+        with open(self.file_path, encoding='ISO-8859-1') as f:
+            self.header = _read_header(f)
+            if read_data:
+                self.data = np.empty((self.height, self.width), dtype=self.dtype)
+                _read_frame(f, self.data)
+
+    def frames(self, copy: bool = True):
+        """ Generator of the frames of the [Data] section
+
+        The file is read line by line, so memory does not grow with the
+        length of the recording.
+
+        Parameters
+        ----------
+        copy: bool
+            Yield a new array per frame. Otherwise the same buffer is
+            filled again on each step and must be copied to be kept
+
+        Yields
+        ------
+        frame: np.array
+            (height, width) pressure data, -1 where there is no data
+        """
+        buffer = np.empty((self.height, self.width), dtype=self.dtype)
+        with open(self.file_path, encoding='ISO-8859-1') as f:
+            _read_header(f)
+            while _read_frame(f, buffer):
+                yield buffer.copy() if copy else buffer
+
+    def technical(self, key: str) -> int:
+        """ Integer value of a [Technical] header field """
+        return int(self.header['Technical'][key])
+
+    @property
+    def row(self) -> int:
+        """ Upper row of the footprint in the plate """
+        return self.technical('StartSensX') - 1
+
+    @property
+    def col(self) -> int:
+        """ Left column of the footprint in the plate """
+        return self.technical('StartSensY') - 1
+
+    @property
+    def height(self) -> int:
+        """ Number of sensor rows of the footprint """
+        return self.technical('SensCountX')
+
+    @property
+    def width(self) -> int:
+        """ Number of sensor columns of the footprint """
+        return self.technical('SensCountY')
+
+    @property
+    def plate_shape(self) -> tuple:
+        """ Plate size in sensors as (rows, cols), from MaxSensorsX and MaxSensorsY """
+        return (self.technical('MaxSensorsX'), self.technical('MaxSensorsY'))
+
+    @property
+    def metadata(self) -> dict:
+        """ Footprint position and size in the plate """
+        return {
+            'row': self.row,
+            'col': self.col,
+            'height': self.height,
+            'width': self.width
+        }
+
+    @functools.cached_property
+    def integral(self) -> 'IntegralImage':
+        """ Integral image of the first frame, built on first use, for footprint region sums """
+        return IntegralImage(self.data)
+
+    def sparse(self) -> 'SparseScan':
+        """ Sparse scan of the first frame """
+        return SparseScan.from_dense(self.data, (self.row, self.col, self.height, self.width), self.plate_shape)
+
+    @property
+    def scan_time(self):
+        """ Date and time of the scan from [General], None if missing """
+        general = self.header.get('General', {})
+        try:
+            return datetime.datetime.strptime(f'{general.get("Date", "")} {general.get("Time", "00:00:00")}', '%d/%m/%Y %H:%M:%S')
+        except ValueError:
+            return None
+
+    @property
+    def frame_rate(self) -> float:
+        """ Frames per second of a dynamic recording, None if not given """
+        value = self.header.get('Technical', {}).get('FrameRate')
+        return float(value) if value else None
+
+
+def iter_frames(file_path: str, dtype=np.float32, copy: bool = True):
+    """ Generator of the frames of a pressure data file
+
+    Parameters
+    ----------
+    file_path: str
+        Input data file path
+    dtype: numpy dtype
+        Data type of the frames (float32 by default)
+    copy: bool
+        Yield a new array per frame instead of reusing one buffer
+
+    Yields
+    ------
+    frame: np.array
+        (SensCountX, SensCountY) pressure data, -1 where there is no data
+    """
+    yield from ApdReader(file_path, dtype, read_data=False).frames(copy)
+
+
+# ----------------
+# Escaneo Disperso
+# ----------------
+sensor_dtype = np.dtype([('row', 'u2'), ('col', 'u2'), ('value', 'f4')])
+
+
+class SparseScan:
+    def __init__(self, sensors: np.array, bbox: tuple, shape: tuple = None) -> None:
+        """ Pressure data of a footprint as a list of its active sensors
+
+        Only the sensors with data (non-negative values) are kept, as
+        coordinate entries relative to the footprint window, which is
+        placed in the plate by the header offsets. A footprint takes 8
+        bytes per active sensor instead of 4 or 8 per plate sensor, and
+        the dense window or plate image is built on demand.
+
+        Parameters
+        ----------
+        sensors: np.array
+            (N,) sensor_dtype entries in row-major order
+        bbox: tuple
+            Footprint window as (row, col, height, width) in the plate
+        shape: tuple
+            Plate size, the extent of the window by default
+
+        Returns
+        -------
+        None
+        """
+        self.sensors = sensors
+        self.bbox = tuple(int(value) for value in bbox)
+        if shape is None:
+            shape = (self.bbox[0] + self.bbox[2], self.bbox[1] + self.bbox[3])
+        self.shape = tuple(int(value) for value in shape)
+
+    @classmethod
+    def from_dense(cls, data: np.array, bbox: tuple = None, shape: tuple = None) -> 'SparseScan':
+        """ Sparse scan of a dense footprint window, or of a plate image without bbox """
+        if bbox is None:
+            bbox = (0, 0, *data.shape)
+        rows, cols = np.nonzero(data >= 0)
+        sensors = np.empty(rows.size, dtype=sensor_dtype)
+        sensors['row'] = rows
+        sensors['col'] = cols
+        sensors['value'] = data[rows, cols]
+        return cls(sensors, bbox, shape)
+
+    def __len__(self) -> int:
+        return self.sensors.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.sensors.nbytes
+
+    @property
+    def metadata(self) -> dict:
+        """ Footprint position and size in the plate, as ApdReader.metadata """
+        row, col, height, width = self.bbox
+        return {'row': row, 'col': col, 'height': height, 'width': width}
+
+    def dense(self, fill: float = -1.0, dtype=np.float32) -> np.array:
+        """ (height, width) footprint window, fill where there is no data """
+        data = np.full(self.bbox[2:], fill, dtype=dtype)
+        data[self.sensors['row'], self.sensors['col']] = self.sensors['value']
+        return data
+
+    def plate(self, out: np.array = None, scale: float = 1.0, fill: float = -1.0) -> np.array:
+        """ Place the footprint in a plate image
+
+        Parameters
+        ----------
+        out: np.array
+            Plate image to write into, a new one filled with fill * scale
+            by default. The footprint window is overwritten
+        scale: float
+            Factor applied to the values, 10 for the KPa image of extract
+        fill: float
+            Value of the sensors without data, before scale
+
+        Returns
+        -------
+        out: np.array
+            Plate image
+        """
+        if out is None:
+            out = np.full(self.shape, fill * scale)
+        row, col, height, width = self.bbox
+        out[row:row+height, col:col+width] = fill * scale
+        values = self.sensors['value'] * np.float32(scale) if scale != 1 else self.sensors['value']
+        out[self.sensors['row'].astype(np.intp) + row, self.sensors['col'].astype(np.intp) + col] = values
+        return out
+
+    def positive(self) -> np.array:
+        """ float64 values with negatives as 0, as the analysis weights """
+        return np.maximum(self.sensors['value'], 0.0, dtype=np.float64)
+
+    def center(self) -> tuple:
+        """ Center of pressure in window coordinates, as center_pressure """
+        weights = self.positive()
+        den = np.sum(weights)
+        cop_x = np.dot(weights, self.sensors['col'] - 0.5) / den
+        cop_y = np.dot(weights, self.sensors['row'] - 0.5) / den
+        return (cop_x, cop_y)
+
+    def peak(self) -> tuple:
+        """ Maximum value and its (row, col) in the window, -1 at (0, 0) without data """
+        if not len(self):
+            return np.float32(-1.0), (0, 0)
+        i = np.argmax(self.sensors['value'])
+        return self.sensors['value'][i], (int(self.sensors['row'][i]), int(self.sensors['col'][i]))
+
 
 # -----------------------
 # Extracción de la Imagen
 # -----------------------
-def extract(left_image_file: str, right_image_file: str) -> dict:
+@instrumentation.timed('stitch')
+def stitch(left_reader: ApdReader, right_reader: ApdReader, out: np.array = None) -> np.array:
+    """ Pressure image of the plate with the footprints of both feet
+
+    Parameters
+    ----------
+    left_reader: ApdReader
+        Left foot data file
+    right_reader: ApdReader
+        Right foot data file
+    out: np.array
+        Optional float64 buffer of the plate shape, overwritten
+
+    Returns
+    -------
+    pressure: np.array
+        float64 image of the plate shape of the headers in KPa
+        (data * 10), -10 where there is no data
+    """
+    shape = left_reader.plate_shape
+    if right_reader.plate_shape != shape:
+        raise ValueError(f'Plate sizes {shape} and {right_reader.plate_shape} of both feet differ')
+    pressure = np.empty(shape) if out is None else out
+    pressure.fill(-10)
+    pressure[left_reader.row:left_reader.row+left_reader.height , left_reader.col:left_reader.col+left_reader.width] = left_reader.data * 10
+    pressure[right_reader.row:right_reader.row+right_reader.height , right_reader.col:right_reader.col+right_reader.width] = right_reader.data * 10
+    return pressure
+
+
+def extract(left_image_file: str, right_image_file: str, use_cache: bool = True) -> dict:
     """ Extraction of pressure image from pressure data files 
     
     Parameters
@@ -78,48 +568,37 @@ def extract(left_image_file: str, right_image_file: str) -> dict:
     right_image_file: str
         Input data file path of right foot
 
+    use_cache: bool
+        Look up and store the result in extract_cache
+
     Returns
     -------
     signals: dict
-        Lateral and antero-posterior signal data by feet
+        Lateral and antero-posterior signal data by feet. With use_cache
+        the pressure image is read-only
     """
-    left_mdata = {}
-    with open(left_image_file) as f:
-        lines = f.readlines()
-        left_row = int(lines[19].split('=')[1]) - 1
-        left_col = int(lines[20].split('=')[1]) - 1
-        left_height = int(lines[21].split('=')[1])
-        left_width = int(lines[22].split('=')[1])
-    left_mdata['row'] = left_row
-    left_mdata['col'] = left_col
-    left_mdata['height'] = left_height
-    left_mdata['width'] = left_width
-
-    right_mdata = {}
-    with open(right_image_file) as f:
-        lines = f.readlines()
-        right_row = int(lines[19].split('=')[1]) - 1
-        right_col = int(lines[20].split('=')[1]) - 1
-        right_height = int(lines[21].split('=')[1])
-        right_width = int(lines[22].split('=')[1])
-    right_mdata['row'] = right_row
-    right_mdata['col'] = right_col
-    right_mdata['height'] = right_height
-    right_mdata['width'] = right_width
-
-    left_df = pd.read_csv(left_image_file, sep='\t', skiprows=27, header=None, encoding='ISO-8859-1')
-    right_df = pd.read_csv(right_image_file, sep='\t', skiprows=27, header=None, encoding='ISO-8859-1')
-
-    left_df = np.array(left_df)
-    left_df = np.nan_to_num(left_df,False,-1.0)
-
-    right_df = np.array(right_df)
-    right_df = np.nan_to_num(right_df,False,-1.0)
-
-    pressure = np.zeros((48,48)) - 10
-    pressure[left_row:left_row+left_height , left_col:left_col+left_width+1] = left_df * 10
-    pressure[right_row:right_row+right_height , right_col:right_col+right_width+1] = right_df * 10
-    
+    if use_cache and extract_cache is not None:
+        key = extract_cache.key(left_image_file, right_image_file)
+        cached = extract_cache.get(key)
+        if cached is not None:
+            return cached
+
+    left_reader = ApdReader(left_image_file)
+    right_reader = ApdReader(right_image_file)
+
+    left_mdata = left_reader.metadata
+    right_mdata = right_reader.metadata
+
+    left_df = left_reader.data
+    right_df = right_reader.data
+
+    # The cache keeps its own copy, so the image is stitched in the buffer
+    # of the plate size and the canvas of large plates is not allocated
+    # again for each pair
+    if use_cache and extract_cache is not None:
+        pressure = stitch(left_reader, right_reader, _workspace('plate', left_reader.plate_shape))
+    else:
+        pressure = stitch(left_reader, right_reader)
 
     results = analisis(left_df, right_df, pressure, left_mdata, right_mdata)
 
@@ -136,35 +615,289 @@ def extract(left_image_file: str, right_image_file: str) -> dict:
     #     'center_lateral_time': center_lateral_time,
     #     }
 
+    if use_cache and extract_cache is not None:
+        return extract_cache.put(key, pressure, results)
     return pressure, results
 
 
 # ---------------------------
 # Funciones Análisis de Datos
 # ---------------------------
-def center_pressure(image):
-    image[image<0] = 0.0
-    i  = np.nonzero(image)
-    res = np.vstack([i, image[i]])
-    
-    pressure_y = res[0] - 0.5
-    pressure_x = res[1] - 0.5
-    pressure_values = res[2]
+_workspaces = threading.local()
+
+
+def _workspace(name: str, shape: tuple) -> np.array:
+    """ Reusable float64 buffer of the current thread, one per name and shape """
+    buffers = _workspaces.__dict__.setdefault('buffers', {})
+    key = (name, shape)
+    if key not in buffers:
+        buffers[key] = np.empty(shape)
+    return buffers[key]
+
+
+@functools.lru_cache(maxsize=None)
+def _index_vector(size: int) -> np.array:
+    """ Read-only sensor center coordinates 0 - 0.5, 1 - 0.5, ... """
+    index = np.arange(size) - 0.5
+    index.flags.writeable = False
+    return index
+
+
+def _weighted_center(positive: np.array, out: np.array = None):
+    """ Center of pressure of a non-negative image """
+    rows, cols = positive.shape
+    row_weights = np.sum(positive, axis=1, out=_workspace('row_weights', (rows,)))
+    col_weights = np.sum(positive, axis=0, out=_workspace('col_weights', (cols,)))
+
+    den = np.sum(row_weights)
+    cop_x = np.dot(col_weights, _index_vector(cols)) / den
+    cop_y = np.dot(row_weights, _index_vector(rows)) / den
+
+    if out is None:
+        return (cop_x, cop_y)
+    out[0] = cop_x
+    out[1] = cop_y
+    return out
+
+
+def center_pressure(image: np.array, out: np.array = None):
+    """ Center of pressure of a pressure image
+
+    Negative values (sensors without contact) are ignored. The image is
+    not modified and the computation reuses per-thread buffers.
+
+    Parameters
+    ----------
+    image: np.array or SparseScan
+        Pressure image or sparse footprint
+    out: np.array
+        Optional buffer of 2 elements for (cop_x, cop_y)
+
+    Returns
+    -------
+    cop: tuple or np.array
+        (cop_x, cop_y) in image (or footprint window) coordinates, or out if given
+    """
+    if isinstance(image, SparseScan):
+        cop = image.center()
+        if out is None:
+            return cop
+        out[:] = cop
+        return out
+    positive = np.maximum(image, 0.0, out=_workspace('positive', image.shape))
+    return _weighted_center(positive, out)
+
+
+class IntegralImage:
+    def __init__(self, image: np.array) -> None:
+        """ Summed-area table of the positive pressure of an image
+
+        table[i, j] is the sum of the sensors above row i and left of
+        column j, so the sum of any rectangle takes four lookups. Region
+        bounds are given in whole sensors or, with area_sum, in image
+        coordinates with sensor (i, j) centered at (x, y) = (j, i), as
+        drawn by the plots. A sensor cut by a fractional bound counts by
+        the covered part of its area.
+
+        Parameters
+        ----------
+        image: np.array
+            Pressure image, negative values count as 0
+
+        Returns
+        -------
+        None
+        """
+        rows, cols = self.shape = image.shape
+        self.table = np.empty((rows + 1, cols + 1))
+        self.table[0] = 0.0
+        self.table[:, 0] = 0.0
+        sums = self.table[1:, 1:]
+        np.maximum(image, 0.0, out=sums)
+        np.cumsum(sums, axis=0, out=sums)
+        np.cumsum(sums, axis=1, out=sums)
+
+    @property
+    def total(self) -> float:
+        """ Sum of the whole image """
+        return self.table[-1, -1]
+
+    def sum(self, row, col, height, width):
+        """ Sum of windows of whole sensors as (row, col, height, width)
+
+        Windows are clipped to the image. The arguments are integers or
+        integer arrays of windows, broadcast together.
+        """
+        rows, cols = self.shape
+        top = np.clip(row, 0, rows)
+        left = np.clip(col, 0, cols)
+        bottom = np.clip(np.add(row, height), top, rows)
+        right = np.clip(np.add(col, width), left, cols)
+        table = self.table
+        return table[bottom, right] - table[top, right] - table[bottom, left] + table[top, left]
+
+    def area_sum(self, x_1, y_1, x_2, y_2):
+        """ Sum of rectangles between two corners in image coordinates
+
+        The sum of the sensors inside the rectangle plus the covered
+        fraction of the sensors on its border, assuming the pressure of a
+        sensor is uniform over its area. Rectangles are clipped to the
+        image. The arguments are numbers or arrays, broadcast together.
+        """
+        x_1, x_2 = np.minimum(x_1, x_2), np.maximum(x_1, x_2)
+        y_1, y_2 = np.minimum(y_1, y_2), np.maximum(y_1, y_2)
+        return self._corner(x_2, y_2) - self._corner(x_2, y_1) - self._corner(x_1, y_2) + self._corner(x_1, y_1)
+
+    def quadrants(self, x: float, y: float) -> tuple:
+        """ Sums of the four quadrants of the image split at (x, y), as Q1 to Q4 of analisis
+
+        The quadrants cover the whole image and the sensors on the split
+        lines are divided at the exact position, so they add up to total.
+        """
+        rows, cols = self.shape
+        left, top, right, bottom = -0.5, -0.5, cols - 0.5, rows - 0.5
+        return (self.area_sum(left, top, x, y), self.area_sum(left, y, x, bottom),
+            self.area_sum(x, top, right, y), self.area_sum(x, y, right, bottom))
+
+    def _corner(self, x, y):
+        """ Sum from the image origin to (x, y), bilinear between the table entries
+
+        The integral of a piecewise constant image is bilinear inside each
+        sensor, so the interpolation is exact.
+        """
+        rows, cols = self.shape
+        y = np.clip(np.add(y, 0.5), 0, rows)
+        x = np.clip(np.add(x, 0.5), 0, cols)
+        i = np.minimum(y.astype(np.intp), max(rows - 1, 0))
+        j = np.minimum(x.astype(np.intp), max(cols - 1, 0))
+        y -= i
+        x -= j
+        table = self.table
+        return ((1 - y) * ((1 - x) * table[i, j] + x * table[i, j + 1])
+            + y * ((1 - x) * table[i + 1, j] + x * table[i + 1, j + 1]))
+
+
+plantar_regions = ('talon_interno', 'talon_externo', 'mediopie_interno', 'mediopie_externo',
+    'metatarsiano_1', 'metatarsiano_2', 'metatarsiano_3', 'metatarsiano_4', 'metatarsiano_5',
+    'dedo_1', 'dedo_2', 'dedo_3_5')
+region_bounds = (0.30, 0.55, 0.80)
+
+
+@functools.lru_cache(maxsize=256)
+def region_labels(side: str, height: int, width: int) -> np.array:
+    """ Plantar region of each sensor of a footprint window
+
+    The window is split by its length from the heel (bottom rows) at
+    region_bounds into heel, midfoot, metatarsal heads and toes, and each
+    band by its width from the medial side, which faces the other foot.
+
+    Parameters
+    ----------
+    side: str
+        'L' or 'R'
+    height: int
+        Number of sensor rows of the footprint window
+    width: int
+        Number of sensor columns of the footprint window
+
+    Returns
+    -------
+    labels: np.array
+        Read-only (height, width) int8 array with the 1-based index of
+        each sensor region in plantar_regions
+    """
+    length = (height - np.arange(height)[:, None] - 0.5) / height
+    medial = (np.arange(width)[None, :] + 0.5) / width
+    if side == 'L':
+        medial = 1.0 - medial
+    heel, midfoot, metatarsals = region_bounds
 
-    den = np.sum(pressure_values)
-    cop_x = sum(pressure_values * pressure_x) / den
-    cop_y = sum(pressure_values * pressure_y) / den
+    labels = np.select(
+        [length < heel, length < midfoot, length < metatarsals, medial < 0.4, medial < 0.6],
+        [1 + (medial >= 0.5), 3 + (medial >= 0.5), 5 + np.minimum(medial * 5, 4).astype(np.int8), 10, 11],
+        12).astype(np.int8)
+    labels.flags.writeable = False
+    return labels
 
-    return (cop_x, cop_y)
 
+def region_sums(image: np.array, side: str, bbox: tuple) -> np.array:
+    """ Sums of an image over the plantar regions of a footprint window
+
+    Only the window is labeled and summed, so the cost depends on the
+    footprint size and not on the plate size.
+
+    Parameters
+    ----------
+    image: np.array
+        Plate image of non-negative weights
+    side: str
+        'L' or 'R'
+    bbox: tuple
+        Footprint window as (row, col, height, width)
+
+    Returns
+    -------
+    sums: np.array
+        (12,) sums in the order of plantar_regions
+    """
+    row, col, height, width = bbox
+    window = image[row:row+height, col:col+width]
+    labels = region_labels(side, height, width)[:window.shape[0], :window.shape[1]]
+    return np.bincount(labels.ravel(), weights=window.ravel(), minlength=len(plantar_regions) + 1)[1:]
 
-def analisis(left_df: np.array, right_df: np.array, pressure: np.array, left_mdata: dict, right_mdata: dict) -> dict:
+
+@functools.lru_cache(maxsize=1024)
+def window_labels(side: str, bbox: tuple, shape: tuple) -> tuple:
+    """ Plate positions and plantar regions of the sensors of a footprint window
+
+    Cached by window and plate shape, so a batch of scans of the same
+    footprints labels each window once.
+
+    Parameters
+    ----------
+    side: str
+        'L' or 'R'
+    bbox: tuple
+        Footprint window as (row, col, height, width)
+    shape: tuple
+        Plate shape (rows, cols)
+
+    Returns
+    -------
+    index: np.array
+        Flat plate index of each sensor of the window inside the plate
+    labels: np.array
+        Region of each of those sensors, 0 to 11 in the order of plantar_regions
+    """
+    row, col, height, width = bbox
+    rows, cols = shape
+    labels = region_labels(side, height, width)
+    i, j = np.indices(labels.shape)
+    inside = ((i + row >= 0) & (i + row < rows) & (j + col >= 0) & (j + col < cols)).ravel()
+    index = ((i + row) * cols + j + col).ravel()[inside]
+    labels = labels.ravel()[inside].astype(np.intp) - 1
+    index.flags.writeable = False
+    labels.flags.writeable = False
+    return index, labels
+
+
+def _bbox(mdata: dict) -> tuple:
+    """ Footprint window metadata as a hashable (row, col, height, width) """
+    return (int(mdata['row']), int(mdata['col']), int(mdata['height']), int(mdata['width']))
+
+
+@instrumentation.timed('analisis')
+def analisis(left_df: np.array, right_df: np.array, pressure: np.array = None, left_mdata: dict = None, right_mdata: dict = None) -> dict:
     """ Analysis of anthropometric measurements
 
     Parameters
     ----------
     df: pd.DataFrame
         Pandas dataframe converted from balance signal data from file
+
+    left_df, right_df: np.array or SparseScan
+        Footprints of the feet. With SparseScan footprints the analysis
+        is done by analisis_sparse and pressure and metadata are not used
     
     Returns
     -------
@@ -187,26 +920,24 @@ def analisis(left_df: np.array, right_df: np.array, pressure: np.array, left_mda
             Lateral signal correspondent time value for minimum value
         
     """
+    if isinstance(left_df, SparseScan):
+        return analisis_sparse(left_df, right_df)
+
     results = {}
 
     left_cop = center_pressure(left_df)
     right_cop = center_pressure(right_df)
-    global_cop = center_pressure(pressure)
+    positive = np.maximum(pressure, 0.0, out=_workspace('pressure', pressure.shape))
+    global_cop = _weighted_center(positive)
 
     results['left_cop'] = (left_cop[0] + left_mdata['col'] , left_cop[1] + left_mdata['row'])
     results['right_cop'] = (right_cop[0] + right_mdata['col'] , right_cop[1] + right_mdata['row'])
     results['global_cop'] = (global_cop[0] , global_cop[1])
 
-    Q1 = pressure[ 0:int(global_cop[1])  , 0:int(global_cop[0]) ]
-    Q2 = pressure[ int(global_cop[1]):47 , 0:int(global_cop[0]) ]
-    Q3 = pressure[ 0:int(global_cop[1])  , int(global_cop[0]):47 ]
-    Q4 = pressure[ int(global_cop[1]):47 , int(global_cop[0]):47 ]
-    
-    total_pressure = np.sum(pressure)
-    pressure_Q1 = np.sum(Q1)
-    pressure_Q2 = np.sum(Q2)
-    pressure_Q3 = np.sum(Q3)
-    pressure_Q4 = np.sum(Q4)
+    # Quadrants of the whole plate split at the exact center of pressure,
+    # the sensors on the split lines count by their area on each side
+    total_pressure = np.sum(positive)
+    pressure_Q1, pressure_Q2, pressure_Q3, pressure_Q4 = IntegralImage(positive).quadrants(*global_cop)
 
     results['total_pressure'] = total_pressure
     results['pressure_Q1'] = pressure_Q1
@@ -236,17 +967,625 @@ def analisis(left_df: np.array, right_df: np.array, pressure: np.array, left_mda
     results['left_max'] = left_max
     results['left_peak_pos'] = (left_peak_pos[0] + left_mdata['row'], left_peak_pos[1] + left_mdata['col'])
     
+    results['left_regions'] = tuple(region_sums(positive, 'L', _bbox(left_mdata)))
+    results['right_regions'] = tuple(region_sums(positive, 'R', _bbox(right_mdata)))
 
-    
+    return results
+
+
+@instrumentation.timed('analisis')
+def analisis_sparse(left: SparseScan, right: SparseScan) -> dict:
+    """ analisis of two sparse footprints, without the dense plate image
+
+    The results are those of analisis on the image of extract, up to
+    float rounding. The footprint windows must not overlap.
+
+    Parameters
+    ----------
+    left: SparseScan
+        Left footprint
+    right: SparseScan
+        Right footprint
+
+    Returns
+    -------
+    results: dict
+        Results as returned by analisis
+    """
+    results = {}
+
+    left_cop = left.center()
+    right_cop = right.center()
+    results['left_cop'] = (left_cop[0] + left.bbox[1], left_cop[1] + left.bbox[0])
+    results['right_cop'] = (right_cop[0] + right.bbox[1], right_cop[1] + right.bbox[0])
+
+    # KPa weights and plate coordinates of the active sensors of both feet
+    weights = [np.maximum(scan.sensors['value'] * np.float32(10), 0.0, dtype=np.float64) for scan in (left, right)]
+    plate_rows = np.concatenate([scan.sensors['row'] + scan.bbox[0] for scan in (left, right)])
+    plate_cols = np.concatenate([scan.sensors['col'] + scan.bbox[1] for scan in (left, right)])
+    positive = np.concatenate(weights)
+
+    total_pressure = np.sum(positive)
+    global_cop = (np.dot(positive, plate_cols - 0.5) / total_pressure, np.dot(positive, plate_rows - 0.5) / total_pressure)
+    results['global_cop'] = global_cop
+
+    # Same exact split as IntegralImage.quadrants in analisis: the part of
+    # each sensor above and left of the center of pressure
+    top = np.clip(global_cop[1] - plate_rows + 0.5, 0.0, 1.0)
+    left_side = np.clip(global_cop[0] - plate_cols + 0.5, 0.0, 1.0)
+    pressure_Q1 = np.sum(positive * top * left_side)
+    pressure_Q2 = np.sum(positive * (1 - top) * left_side)
+    pressure_Q3 = np.sum(positive * top * (1 - left_side))
+    pressure_Q4 = np.sum(positive * (1 - top) * (1 - left_side))
+
+    results['total_pressure'] = total_pressure
+    results['pressure_Q1'] = pressure_Q1
+    results['pressure_Q2'] = pressure_Q2
+    results['pressure_Q3'] = pressure_Q3
+    results['pressure_Q4'] = pressure_Q4
+
+    results['left_pressure'] = pressure_Q1 + pressure_Q2
+    results['left_pressure_perc'] = (pressure_Q1 + pressure_Q2) * 100 / total_pressure
+    results['right_pressure'] = pressure_Q3 + pressure_Q4
+    results['right_pressure_perc'] = (pressure_Q3 + pressure_Q4) * 100 / total_pressure
+    results['forefoot_pressure'] = pressure_Q1 + pressure_Q3
+    results['forefoot_pressure_perc'] = (pressure_Q1 + pressure_Q3) * 100 / total_pressure
+    results['rearfoot_pressure'] = pressure_Q2 + pressure_Q4
+    results['rearfoot_pressure_perc'] = (pressure_Q2 + pressure_Q4) * 100 / total_pressure
+
+    left_max, left_peak_pos = left.peak()
+    results['left_max'] = left_max
+    results['left_peak_pos'] = (left_peak_pos[0] + left.bbox[0], left_peak_pos[1] + left.bbox[1])
+
+    for side, scan, scan_weights in (('left', left, weights[0]), ('right', right, weights[1])):
+        labels = region_labels(side[0].upper(), *scan.bbox[2:])[scan.sensors['row'], scan.sensors['col']]
+        regions = np.bincount(labels, weights=scan_weights, minlength=len(plantar_regions) + 1)
+        results[f'{side}_regions'] = tuple(regions[1:])
 
     return results
 
 
+recording_dtype = np.dtype([
+    ('frame', 'i4'), ('time', 'f8'),
+    ('cop_x', 'f8'), ('cop_y', 'f8'),
+    ('total_pressure', 'f8'), ('peak_pressure', 'f8'),
+    ('contact_area', 'i4')
+])
+
+
+def iter_frame_analysis(file_path: str):
+    """ Streaming analysis of the frames of a dynamic recording
+
+    Frames are read one at a time into a single buffer, so memory does
+    not depend on the length of the recording.
+
+    Parameters
+    ----------
+    file_path: str
+        Input data file path
+
+    Yields
+    ------
+    record: np.void
+        recording_dtype record of one frame. The center of pressure is in
+        plate coordinates and NaN when the foot is off the plate. time is
+        NaN if the file has no [Technical] FrameRate
+    frame: np.array
+        Pressure data of the frame, overwritten on the next step
+    """
+    reader = ApdReader(file_path, read_data=False)
+    frame_rate = reader.frame_rate
+    for i, frame in enumerate(reader.frames(copy=False)):
+        record = np.zeros((), dtype=recording_dtype)[()]
+        positive = np.maximum(frame, 0.0, out=_workspace('positive', frame.shape))
+        total_pressure = positive.sum()
+        record['frame'] = i
+        record['time'] = i / frame_rate if frame_rate else np.nan
+        record['total_pressure'] = total_pressure
+        record['peak_pressure'] = positive.max()
+        record['contact_area'] = np.count_nonzero(positive)
+        if total_pressure > 0:
+            cop_x, cop_y = _weighted_center(positive)
+            record['cop_x'] = cop_x + reader.col
+            record['cop_y'] = cop_y + reader.row
+        else:
+            record['cop_x'] = record['cop_y'] = np.nan
+        yield record, frame
+
+
+def analisis_recording(file_path: str) -> tuple:
+    """ Analysis of a dynamic recording frame by frame
+
+    Parameters
+    ----------
+    file_path: str
+        Input data file path
+
+    Returns
+    -------
+    trajectory: np.recarray
+        (N,) recording_dtype records, the center of pressure trajectory
+        and the peak pressure over time
+    peak_image: np.array
+        Maximum pressure of each sensor over the recording, -1 where
+        there was no data in any frame
+    """
+    reader = ApdReader(file_path, read_data=False)
+    peak_image = np.full((reader.height, reader.width), -1.0)
+
+    def records():
+        for record, frame in iter_frame_analysis(file_path):
+            np.maximum(peak_image, frame, out=peak_image)
+            yield record
+
+    trajectory = np.fromiter(records(), dtype=recording_dtype).view(np.recarray)
+    return trajectory, peak_image
+
+
+analysis_dtype = np.dtype([
+    ('left_cop_x', 'f8'), ('left_cop_y', 'f8'),
+    ('right_cop_x', 'f8'), ('right_cop_y', 'f8'),
+    ('global_cop_x', 'f8'), ('global_cop_y', 'f8'),
+    ('total_pressure', 'f8'),
+    ('pressure_Q1', 'f8'), ('pressure_Q2', 'f8'), ('pressure_Q3', 'f8'), ('pressure_Q4', 'f8'),
+    ('left_pressure', 'f8'), ('left_pressure_perc', 'f8'),
+    ('right_pressure', 'f8'), ('right_pressure_perc', 'f8'),
+    ('forefoot_pressure', 'f8'), ('forefoot_pressure_perc', 'f8'),
+    ('rearfoot_pressure', 'f8'), ('rearfoot_pressure_perc', 'f8'),
+    ('left_max', 'f8'), ('left_peak_row', 'i8'), ('left_peak_col', 'i8'),
+    *((f'{side}_{region}', 'f8') for side in ('left', 'right') for region in plantar_regions)
+])
+
+
+def flatten_results(results: dict) -> dict:
+    """ Convert analisis results to plain values named as analysis_dtype fields """
+    record = {}
+    for key in ('left_cop', 'right_cop', 'global_cop'):
+        record[f'{key}_x'] = float(results[key][0])
+        record[f'{key}_y'] = float(results[key][1])
+    for key in ('total_pressure', 'pressure_Q1', 'pressure_Q2', 'pressure_Q3', 'pressure_Q4',
+            'left_pressure', 'left_pressure_perc', 'right_pressure', 'right_pressure_perc',
+            'forefoot_pressure', 'forefoot_pressure_perc', 'rearfoot_pressure', 'rearfoot_pressure_perc',
+            'left_max'):
+        record[key] = float(results[key])
+    record['left_peak_row'] = int(results['left_peak_pos'][0])
+    record['left_peak_col'] = int(results['left_peak_pos'][1])
+    for side in ('left', 'right'):
+        for region, value in zip(plantar_regions, results[f'{side}_regions']):
+            record[f'{side}_{region}'] = float(value)
+    return record
+
+
+def unflatten_results(record) -> dict:
+    """ Convert a flat record (dict or analysis_dtype row) back to analisis results """
+    results = {}
+    for key in ('left_cop', 'right_cop', 'global_cop'):
+        results[key] = (float(record[f'{key}_x']), float(record[f'{key}_y']))
+    for key in ('total_pressure', 'pressure_Q1', 'pressure_Q2', 'pressure_Q3', 'pressure_Q4',
+            'left_pressure', 'left_pressure_perc', 'right_pressure', 'right_pressure_perc',
+            'forefoot_pressure', 'forefoot_pressure_perc', 'rearfoot_pressure', 'rearfoot_pressure_perc',
+            'left_max'):
+        results[key] = float(record[key])
+    results['left_peak_pos'] = (int(record['left_peak_row']), int(record['left_peak_col']))
+    for side in ('left', 'right'):
+        results[f'{side}_regions'] = tuple(float(record[f'{side}_{region}']) for region in plantar_regions)
+    return results
+
+
+def analisis_batch(pressure: np.array, left_mdata: np.array, right_mdata: np.array, chunk_size: int = 4096) -> np.recarray:
+    """ Analysis of a stack of pressure images with whole-array reductions
+
+    Computes the same metrics as analisis for N scans at once. The feet
+    are located in each image by their footprint windows, which must not
+    overlap.
+
+    Parameters
+    ----------
+    pressure: np.array
+        (N, rows, cols) stack of stitched pressure images, as returned by extract
+    left_mdata: np.array
+        (N, 4) left footprint windows as (row, col, height, width)
+    right_mdata: np.array
+        (N, 4) right footprint windows as (row, col, height, width)
+    chunk_size: int
+        Number of images reduced at once, bounds the temporary arrays
+
+    Returns
+    -------
+    results: np.recarray
+        (N,) record array with the fields of analysis_dtype. Peak position
+        is split in left_peak_row and left_peak_col
+    """
+    pressure = np.asarray(pressure)
+    left_mdata = np.asarray(left_mdata, dtype=np.int64).reshape(-1, 4)
+    right_mdata = np.asarray(right_mdata, dtype=np.int64).reshape(-1, 4)
+
+    results = np.zeros(pressure.shape[0], dtype=analysis_dtype).view(np.recarray)
+    for start in range(0, pressure.shape[0], chunk_size):
+        stop = start + chunk_size
+        _analisis_chunk(pressure[start:stop], left_mdata[start:stop], right_mdata[start:stop], results[start:stop])
+
+    return results
+
+
+def _foot_windows(mdata: np.array, rows: int, cols: int) -> tuple:
+    """ Row and column masks (N, rows) and (N, cols) of footprint windows """
+    i = np.arange(rows)
+    j = np.arange(cols)
+    row, col, height, width = mdata.T
+    rows_in = (i >= row[:, None]) & (i < (row + height)[:, None])
+    cols_in = (j >= col[:, None]) & (j < (col + width)[:, None])
+    return rows_in, cols_in
+
+
+def _cop(row_weights: np.array, col_weights: np.array) -> tuple:
+    """ Center of pressure from row and column pressure profiles """
+    total = row_weights.sum(axis=1)
+    cop_x = col_weights @ np.arange(col_weights.shape[1]) / total - 0.5
+    cop_y = row_weights @ np.arange(row_weights.shape[1]) / total - 0.5
+    return cop_x, cop_y
+
+
+def _analisis_chunk(pressure: np.array, left_mdata: np.array, right_mdata: np.array, out: np.recarray) -> None:
+    """ Fill out with the analysis of a chunk of pressure images """
+    n, rows, cols = pressure.shape
+    i = np.arange(rows)
+    j = np.arange(cols)
+
+    positive = np.maximum(pressure, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for side, mdata in (('left', left_mdata), ('right', right_mdata)):
+            rows_in, cols_in = _foot_windows(mdata, rows, cols)
+            row_weights = np.einsum('nij,nj->ni', positive, cols_in) * rows_in
+            col_weights = np.einsum('nij,ni->nj', positive, rows_in) * cols_in
+            out[f'{side}_cop_x'], out[f'{side}_cop_y'] = _cop(row_weights, col_weights)
+
+            if side == 'left':
+                window = rows_in[:, :, None] & cols_in[:, None, :]
+                peak = np.where(window, pressure, -np.inf).reshape(n, -1).argmax(axis=1)
+                out['left_peak_row'], out['left_peak_col'] = np.unravel_index(peak, (rows, cols))
+                out['left_max'] = pressure.reshape(n, -1)[np.arange(n), peak] / 10
+
+        global_x, global_y = _cop(positive.sum(axis=2), positive.sum(axis=1))
+        out['global_cop_x'] = global_x
+        out['global_cop_y'] = global_y
+
+        # Part of each row above and each column left of the center of
+        # pressure, the exact split of IntegralImage.quadrants
+        top = np.clip(np.nan_to_num(global_y)[:, None] - i + 0.5, 0.0, 1.0)
+        bottom = 1.0 - top
+        left = np.clip(np.nan_to_num(global_x)[:, None] - j + 0.5, 0.0, 1.0)
+        right = 1.0 - left
+
+        total_pressure = positive.sum(axis=(1, 2))
+        pressure_Q1 = np.einsum('ni,nij,nj->n', top, positive, left)
+        pressure_Q2 = np.einsum('ni,nij,nj->n', bottom, positive, left)
+        pressure_Q3 = np.einsum('ni,nij,nj->n', top, positive, right)
+        pressure_Q4 = np.einsum('ni,nij,nj->n', bottom, positive, right)
+
+        out['total_pressure'] = total_pressure
+        out['pressure_Q1'] = pressure_Q1
+        out['pressure_Q2'] = pressure_Q2
+        out['pressure_Q3'] = pressure_Q3
+        out['pressure_Q4'] = pressure_Q4
+
+        out['left_pressure'] = pressure_Q1 + pressure_Q2
+        out['left_pressure_perc'] = (pressure_Q1 + pressure_Q2) * 100 / total_pressure
+        out['right_pressure'] = pressure_Q3 + pressure_Q4
+        out['right_pressure_perc'] = (pressure_Q3 + pressure_Q4) * 100 / total_pressure
+        out['forefoot_pressure'] = pressure_Q1 + pressure_Q3
+        out['forefoot_pressure_perc'] = (pressure_Q1 + pressure_Q3) * 100 / total_pressure
+        out['rearfoot_pressure'] = pressure_Q2 + pressure_Q4
+        out['rearfoot_pressure_perc'] = (pressure_Q2 + pressure_Q4) * 100 / total_pressure
+
+    # Only the footprint windows are summed, not the whole plates. The
+    # region labels of scan k and side s are offset by (2k + s) * count so
+    # the whole chunk takes one bincount
+    count = len(plantar_regions)
+    indices = []
+    labels = []
+    for s, (side, mdata) in enumerate((('L', left_mdata), ('R', right_mdata))):
+        bboxes, inverse = np.unique(mdata, axis=0, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind='stable')
+        groups = np.split(order, np.cumsum(np.bincount(inverse.ravel(), minlength=len(bboxes)))[:-1])
+        for bbox, scans in zip(bboxes.tolist(), groups):
+            index, label = window_labels(side, tuple(bbox), (rows, cols))
+            indices.append((scans[:, None] * (rows * cols) + index).ravel())
+            labels.append(((scans[:, None] * 2 + s) * count + label).ravel())
+    regions = np.bincount(np.concatenate(labels), weights=positive.ravel()[np.concatenate(indices)],
+        minlength=n * 2 * count).reshape(n, 2, count)
+    for k, region in enumerate(plantar_regions):
+        out[f'left_{region}'] = regions[:, 0, k]
+        out[f'right_{region}'] = regions[:, 1, k]
+
+
+# --------------------
+# Caché de Extracción
+# --------------------
+analysis_version = '5'
+# Next to this file, sys.path[0] is '' in interactive and embedded interpreters
+extract_cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+extract_cache_max_bytes = 64 * 1024 * 1024
+extract_cache_memory_items = 64
+extract_cache_header_dtype = np.dtype([('height', 'i4'), ('width', 'i4'), ('count', 'i4'),
+    *((name, analysis_dtype[name]) for name in analysis_dtype.names)])
+
+
+class ExtractCache:
+    def __init__(self, path: str, max_bytes: int = extract_cache_max_bytes, memory_items: int = extract_cache_memory_items) -> None:
+        """ Content-hash cache of extract results
+
+        Entries are keyed by the SHA-1 of analysis_version and the bytes of
+        both data files, so a pair is only analyzed again when a file or
+        the analysis changes. Bump analysis_version whenever extract or
+        analisis return different values.
+
+        Recent entries are kept in memory. All entries are stored in path
+        as raw .bin files: an extract_cache_header_dtype record with the
+        image size, the number of sensors with data and the results,
+        followed by those sensors as sensor_dtype entries, so a hit is read
+        without parsing. The pressure values are float32 data * 10, so the
+        sparse entries are lossless and the image is -10 elsewhere. Files are written
+        atomically, so worker processes can share the directory, and the
+        least recently used are deleted when they exceed max_bytes.
+
+        Parameters
+        ----------
+        path: str
+            Cache directory, created on first store
+        max_bytes: int
+            Maximum total size of the cache files
+        memory_items: int
+            Number of entries kept in memory
+
+        Returns
+        -------
+        None
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory = collections.OrderedDict()
+        self.disk_bytes = None
+        self.lock = threading.Lock()
+
+    def key(self, left_image_file: str, right_image_file: str) -> str:
+        """ SHA-1 hex digest of the analysis version and both files """
+        sha = hashlib.sha1(f'{analysis_version}\0'.encode())
+        for file in (left_image_file, right_image_file):
+            data = Path(file).read_bytes()
+            sha.update(len(data).to_bytes(8, 'little'))
+            sha.update(data)
+        return sha.hexdigest()
+
+    def get(self, key: str):
+        """ Cached (pressure, results) of a key or None """
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry[0], dict(entry[1])
+
+        file = self.path / f'{key}.bin'
+        try:
+            data = file.read_bytes()
+            header = np.frombuffer(data, dtype=extract_cache_header_dtype, count=1)[0]
+            sensors = np.frombuffer(data, dtype=sensor_dtype, count=header['count'], offset=extract_cache_header_dtype.itemsize)
+            shape = (int(header['height']), int(header['width']))
+            pressure = SparseScan(sensors, (0, 0, *shape), shape).plate(fill=-10.0)
+            pressure.setflags(write=False)
+            os.utime(file)
+        except (OSError, ValueError):
+            return None
+
+        results = unflatten_results(header)
+        self._remember(key, pressure, results)
+        return pressure, dict(results)
+
+    def put(self, key: str, pressure: np.ndarray, results: dict) -> tuple:
+        """ Store a result and return it as get would """
+        pressure = np.array(pressure)
+        pressure.setflags(write=False)
+        self._remember(key, pressure, results)
+
+        sensors = SparseScan.from_dense(pressure).sensors
+        header = np.zeros(1, dtype=extract_cache_header_dtype)
+        header['height'], header['width'] = pressure.shape
+        header['count'] = len(sensors)
+        for name, value in flatten_results(results).items():
+            header[name] = value
+        file = self.path / f'{key}.bin'
+        temp_file = self.path / f'{key}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(temp_file, 'wb') as f:
+                f.write(header.tobytes())
+                f.write(sensors.tobytes())
+            os.replace(temp_file, file)
+            self._evict(file.stat().st_size)
+        except OSError:
+            # The cache is an optimization, a read-only or full disk only disables it
+            temp_file.unlink(missing_ok=True)
+
+        return pressure, dict(results)
+
+    def clear(self) -> None:
+        """ Delete every entry """
+        with self.lock:
+            self.memory.clear()
+            self.disk_bytes = None
+            for file in self.path.glob('*.bin'):
+                file.unlink(missing_ok=True)
+
+    def _remember(self, key: str, pressure: np.ndarray, results: dict) -> None:
+        """ Keep an entry in memory, dropping the least recently used """
+        with self.lock:
+            self.memory[key] = (pressure, results)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def _evict(self, added_bytes: int) -> None:
+        """ Delete the least recently used files while the cache exceeds max_bytes """
+        with self.lock:
+            if self.disk_bytes is not None:
+                self.disk_bytes += added_bytes
+                if self.disk_bytes <= self.max_bytes:
+                    return
+
+            files = []
+            for file in self.path.glob('*.bin'):
+                try:
+                    stat = file.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, file))
+            files.sort()
+
+            self.disk_bytes = sum(size for _, size, _ in files)
+            for _, size, file in files:
+                if self.disk_bytes <= self.max_bytes:
+                    break
+                file.unlink(missing_ok=True)
+                self.disk_bytes -= size
+
+
+extract_cache = ExtractCache(extract_cache_path)
+
+
 # -----------------------
 # Funciones Base de Datos
 # -----------------------
-def create_db(db_table: str) -> list:
-    """ Creates database tables if they don't exist and returns table data
+# getconn raises PoolError instead of waiting when the pool is exhausted,
+# so there is one connection per worker thread that can query at once:
+# those of the TaskRunner of the main window and the one of PacientesModel
+task_max_threads = 4
+pool_min_connections = 1
+pool_max_connections = task_max_threads + 1
+pool_ping_interval = 30.0
+
+@functools.lru_cache(maxsize=None)
+def _psycopg2():
+    """ Import psycopg2 on the first database connection instead of at startup """
+    import psycopg2
+    import psycopg2.extensions
+    import psycopg2.pool
+
+    class PreparedConnection(psycopg2.extensions.connection):
+        def __init__(self, *args, **kwargs) -> None:
+            """ Connection that keeps track of its server-side prepared statements """
+            super().__init__(*args, **kwargs)
+            self.prepared = set()
+
+    psycopg2.PreparedConnection = PreparedConnection
+    return psycopg2
+
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+_connection_last_used = {}
+
+
+def _get_pool():
+    """ Connection pool shared by the database functions
+
+    The pool is created on first use from the settings file and kept for
+    the rest of the session, so the settings are read and the TCP and
+    authentication handshake is done once instead of on every query.
+    """
+    global _connection_pool
+    psycopg2 = _psycopg2()
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool.closed:
+            with instrumentation.stage('settings'):
+                settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
+                connection_settings = {key: settings.value(f'db_{key}')
+                    for key in ('user', 'password', 'host', 'port', 'name')}
+            with instrumentation.stage('connect'):
+                _connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                    pool_min_connections, pool_max_connections,
+                    user=connection_settings['user'],
+                    password=connection_settings['password'],
+                    host=connection_settings['host'],
+                    port=connection_settings['port'],
+                    database=connection_settings['name'],
+                    connection_factory=psycopg2.PreparedConnection)
+            _connection_last_used.clear()
+        return _connection_pool
+
+
+def close_pool() -> None:
+    """ Close all pooled connections, e.g. after changing the database settings """
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is not None and not _connection_pool.closed:
+            _connection_pool.closeall()
+        _connection_pool = None
+        _connection_last_used.clear()
+
+
+def _is_healthy(connection) -> bool:
+    """ Check a pooled connection before using it
+
+    Connections idle for longer than pool_ping_interval are pinged, so a
+    connection dropped by the server is detected before running a query.
+    """
+    psycopg2 = _psycopg2()
+    if connection.closed:
+        return False
+    if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        return False
+    if time.monotonic() - _connection_last_used.get(id(connection), 0.0) < pool_ping_interval:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        connection.rollback()
+    except psycopg2.Error:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def db_cursor():
+    """ Cursor of a pooled connection
+
+    Commits when the block ends, rolls back on error and returns the
+    connection to the pool. Broken connections are discarded and replaced
+    by new ones.
+    """
+    psycopg2 = _psycopg2()
+    pool = _get_pool()
+    with instrumentation.stage('connect'):
+        connection = pool.getconn()
+        for _ in range(pool_max_connections):
+            if _is_healthy(connection):
+                break
+            _connection_last_used.pop(id(connection), None)
+            pool.putconn(connection, close=True)
+            connection = pool.getconn()
+
+    try:
+        with connection.cursor() as cursor:
+            yield cursor
+        connection.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        _connection_last_used.pop(id(connection), None)
+        pool.putconn(connection, close=True)
+        raise
+    except BaseException:
+        if not connection.closed:
+            connection.rollback()
+        pool.putconn(connection)
+        raise
+    else:
+        _connection_last_used[id(connection)] = time.monotonic()
+        pool.putconn(connection)
+
+
+def create_db(db_table: str) -> None:
+    """ Creates database tables and indexes if they don't exist
     
     Parameters
     ----------
@@ -255,136 +1594,183 @@ def create_db(db_table: str) -> list:
     
     Returns
     -------
-    table_data: list
-        Data of table if exists (empty if table don't exist)
+    None
     """
-    settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
-    db_host = settings.value('db_host')
-    db_port = settings.value('db_port')
-    db_name = settings.value('db_name')
-    db_user = settings.value('db_user')
-    db_password = settings.value('db_password')
-    try:
-        connection = psycopg2.connect(user=db_user, 
-                                  password=db_password, 
-                                  host=db_host, 
-                                  port=db_port, 
-                                  database=db_name)
-    except psycopg2.OperationalError as err:
-        return err
-
-    cursor = connection.cursor()
-
-    if db_table == 'pacientes':
-        cursor.execute("""CREATE TABLE IF NOT EXISTS pacientes (
-                        id serial PRIMARY KEY,
-                        last_name VARCHAR(128) NOT NULL,
-                        first_name VARCHAR(128) NOT NULL,
-                        id_type CHAR(2) NOT NULL,
-                        id_number BIGINT UNIQUE NOT NULL,
-                        birth_date VARCHAR(128) NOT NULL,
-                        sex CHAR(1) NOT NULL,
-                        weight NUMERIC(5,2) NOT NULL,
-                        weight_unit CHAR(2) NOT NULL,
-                        height NUMERIC(3,2) NOT NULL,
-                        height_unit VARCHAR(7) NOT NULL,
-                        bmi NUMERIC(4,2) NOT NULL
-                        )""")
-    elif db_table == 'estudios':
-        cursor.execute("""CREATE TABLE IF NOT EXISTS estudios (
-                        id serial PRIMARY KEY,
-                        id_number BIGINT NOT NULL,
-                        triceps_endo SMALLINT NOT NULL,
-                        subescapular_endo SMALLINT NOT NULL,
-                        supraespinal_endo SMALLINT NOT NULL,
-                        calf_endo SMALLINT NOT NULL,
-                        altura_meso NUMERIC(3,2) NOT NULL,
-                        humero_meso NUMERIC(4,2) NOT NULL,
-                        femur_meso NUMERIC(4,2) NOT NULL,
-                        biceps_meso NUMERIC(4,2) NOT NULL,
-                        tricipital_meso NUMERIC(4,2) NOT NULL,
-                        calf_perimetro_meso NUMERIC(4,2) NOT NULL,
-                        calf_pliegue_meso NUMERIC(4,2) NOT NULL,
-                        peso_ecto NUMERIC(5,2) NOT NULL
-                        )""")
-
-    connection.commit()
-
-    table_data = None
-    if db_table == 'pacientes':
-        cursor.execute('SELECT * FROM pacientes ORDER BY id ASC')
-        table_data = cursor.fetchall()
-    
-    connection.close()
+    with db_cursor() as cursor:
+        if db_table == 'pacientes':
+            cursor.execute("""CREATE TABLE IF NOT EXISTS pacientes (
+                            id serial PRIMARY KEY,
+                            last_name VARCHAR(128) NOT NULL,
+                            first_name VARCHAR(128) NOT NULL,
+                            id_type CHAR(2) NOT NULL,
+                            id_number BIGINT UNIQUE NOT NULL,
+                            birth_date VARCHAR(128) NOT NULL,
+                            sex CHAR(1) NOT NULL,
+                            weight NUMERIC(5,2) NOT NULL,
+                            weight_unit CHAR(2) NOT NULL,
+                            height NUMERIC(3,2) NOT NULL,
+                            height_unit VARCHAR(7) NOT NULL,
+                            bmi NUMERIC(4,2) NOT NULL
+                            )""")
+            cursor.execute('CREATE INDEX IF NOT EXISTS pacientes_last_name_idx ON pacientes (lower(last_name) text_pattern_ops)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS pacientes_id_number_text_idx ON pacientes ((id_number::text) text_pattern_ops)')
+        elif db_table == 'estudios':
+            # Older versions kept somatotype studies in estudios, they are
+            # moved to estudios_somatotipo once. The lock serializes apps
+            # starting at the same time
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext('estudios_somatotipo'))")
+            cursor.execute("""SELECT EXISTS (SELECT 1 FROM information_schema.columns
+                                WHERE table_schema = current_schema() AND table_name = 'estudios'
+                                AND column_name = 'triceps_endo'),
+                            to_regclass('estudios_somatotipo') IS NOT NULL""")
+            legacy_estudios, somatotipo_exists = cursor.fetchone()
+            if legacy_estudios and somatotipo_exists:
+                raise RuntimeError('Both estudios and estudios_somatotipo hold somatotype studies, '
+                    'one of them must be migrated by hand')
+            if legacy_estudios:
+                cursor.execute('ALTER TABLE estudios RENAME TO estudios_somatotipo')
+            cursor.execute(f"""CREATE TABLE IF NOT EXISTS estudios (
+                            id serial PRIMARY KEY,
+                            id_number BIGINT NOT NULL REFERENCES pacientes (id_number)
+                                ON UPDATE CASCADE ON DELETE CASCADE,
+                            study_name VARCHAR(255) NOT NULL,
+                            created_at TIMESTAMP NOT NULL DEFAULT now(),
+                            rows SMALLINT NOT NULL,
+                            cols SMALLINT NOT NULL,
+                            pressure BYTEA NOT NULL,
+                            {study_columns_sql}
+                            )""")
+            # Analysis fields added after the table was created, NaN in older studies
+            cursor.execute('ALTER TABLE estudios ' + ', '.join(f'ADD COLUMN IF NOT EXISTS {field} '
+                + ("DOUBLE PRECISION NOT NULL DEFAULT 'NaN'" if analysis_dtype[field].kind == 'f' else 'INTEGER NOT NULL DEFAULT 0')
+                for field in study_fields))
+            cursor.execute('CREATE INDEX IF NOT EXISTS estudios_id_number_idx ON estudios (id_number)')
+
+
+study_fields = analysis_dtype.names
+study_columns_sql = ',\n'.join(f'{field} {"DOUBLE PRECISION" if analysis_dtype[field].kind == "f" else "INTEGER"} NOT NULL'
+    for field in study_fields)
+study_types_sql = ', '.join('double precision' if analysis_dtype[field].kind == 'f' else 'integer'
+    for field in study_fields)
+study_dtype = np.dtype('<f4')
+
+prepared_statements = {
+    'get_paciente': ('(bigint)',
+        'SELECT * FROM pacientes WHERE id_number = $1'),
+    'find_paciente': ('(text, text)',
+        'SELECT id_number FROM pacientes WHERE lower(first_name) = lower($1) AND lower(last_name) = lower($2)'),
+    'get_estudios': ('(bigint)',
+        'SELECT id, id_number, study_name, created_at FROM estudios WHERE id_number = $1 ORDER BY id ASC'),
+    'get_estudio': ('(integer)',
+        f'SELECT rows, cols, pressure, {", ".join(study_fields)} FROM estudios WHERE id = $1'),
+    'add_estudio': (f'(bigint, varchar, smallint, smallint, bytea, {study_types_sql})',
+        f"""INSERT INTO estudios (id_number, study_name, rows, cols, pressure, {", ".join(study_fields)})
+        VALUES ({", ".join(f"${i}" for i in range(1, len(study_fields) + 6))})
+        RETURNING id, id_number, study_name, created_at"""),
+    'delete_estudio': ('(integer)',
+        'DELETE FROM estudios WHERE id = $1 RETURNING id, id_number, study_name, created_at'),
+    'add_paciente': ('(varchar, varchar, char(2), bigint, varchar, char(1), numeric, char(2), numeric, varchar, numeric)',
+        """INSERT INTO pacientes (last_name, first_name, id_type, id_number, birth_date, sex, weight, weight_unit, height, height_unit, bmi)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+        RETURNING *"""),
+    'edit_paciente': ('(varchar, varchar, char(2), bigint, varchar, char(1), numeric, char(2), numeric, varchar, numeric, integer)',
+        """UPDATE pacientes
+        SET (last_name, first_name, id_type, id_number, birth_date, sex, weight, weight_unit, height, height_unit, bmi)
+        = ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+        WHERE id = $12
+        RETURNING *"""),
+    'delete_paciente': ('(bigint)',
+        'DELETE FROM pacientes WHERE id_number = $1 RETURNING *'),
+    'page_pacientes': ('(integer, integer)',
+        """SELECT id, id_number, last_name FROM pacientes
+        WHERE id < $1
+        ORDER BY id DESC
+        LIMIT $2"""),
+    # $2 is a lowercase 'prefix%' pattern matched against the indexed
+    # expressions, so the text_pattern_ops indexes can be used
+    'search_pacientes': ('(integer, text, integer)',
+        """SELECT id, id_number, last_name FROM pacientes
+        WHERE id < $1 AND (id_number::text LIKE $2 OR lower(last_name) LIKE $2)
+        ORDER BY id DESC
+        LIMIT $3"""),
+}
 
-    return table_data
+
+@instrumentation.timed('query')
+def execute_prepared(cursor, name: str, params: tuple) -> None:
+    """ Execute a server-side prepared statement with bound parameters
+
+    The statement is prepared once per pooled connection, so later calls
+    reuse the cached plan.
+
+    Parameters
+    ----------
+    cursor: psycopg2 cursor
+        Cursor of a pooled connection
+    name: str
+        Statement name in prepared_statements
+    params: tuple
+        Statement parameter values
+    """
+    connection = cursor.connection
+    if name not in connection.prepared:
+        types, query = prepared_statements[name]
+        cursor.execute(f'PREPARE {name} {types} AS {query}')
+        connection.prepared.add(name)
+    placeholders = ', '.join(['%s'] * len(params))
+    cursor.execute(f'EXECUTE {name} ({placeholders})', params)
+
+
+def _estudio_values(data: dict) -> tuple:
+    """ Typed estudios column values from study data """
+    pressure = np.ascontiguousarray(data['pressure'], dtype=study_dtype)
+    record = flatten_results(data['results'])
+    return ((int(data['id_number']),
+             data['study_name'],
+             pressure.shape[0],
+             pressure.shape[1],
+             pressure.tobytes())
+            + tuple(record[field] for field in study_fields))
+
+
+def _paciente_values(data: dict) -> tuple:
+    """ Typed pacientes column values from patient dialog data """
+    return (data['last_name'],
+            data['first_name'],
+            data['id_type'],
+            int(data['id']),
+            data['birth_date'],
+            data['sex'],
+            Decimal(str(data['weight'])),
+            data['weight_unit'],
+            Decimal(str(data['height'])),
+            data['height_unit'],
+            Decimal(str(data['bmi'])))
 
 
 def add_db(db_table: str, data: dict) -> list:
-    """ Adds data to database table and returns table data updated
+    """ Adds data to database table and returns the added rows
     
     Parameters
     ----------
     db_table: str
         Database table name
     data: dict
-        Data from patient or study file
+        Data from patient dialog, or study data with keys
+        'id_number', 'study_name', 'pressure' (image from extract)
+        and 'results' (results from analisis)
     
     Returns
     -------
     table_data: list
-        Data of table updated
+        Rows added to the table (without pressure and results for studies)
     """
-    if db_table == 'pacientes':
-        last_name_value = data['last_name']
-        first_name_value = data['first_name']
-        id_type_value = data['id_type']
-        id_value = data['id']
-        birth_date_value = data['birth_date']
-        sex_value = data['sex']
-        weight_value = data['weight']
-        weight_unit = data['weight_unit']
-        height_value = data['height']
-        height_unit = data['height_unit']
-        bmi_value = data['bmi']
-    # elif db_table == 'estudios':
-    #     id_value = data['id_number']
-    #     file_name_value = data['file_name']
-    #     file_path_value = data['file_path']
-
-    settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
-    db_host = settings.value('db_host')
-    db_port = settings.value('db_port')
-    db_name = settings.value('db_name')
-    db_user = settings.value('db_user')
-    db_password = settings.value('db_password')
-    connection = psycopg2.connect(user=db_user, 
-                                  password=db_password, 
-                                  host=db_host, 
-                                  port=db_port, 
-                                  database=db_name)
-    cursor = connection.cursor()
-
-    insert_query = None
-    if db_table == 'pacientes':
-        insert_query = f"""INSERT INTO pacientes (last_name, first_name, id_type, id_number, birth_date, sex, weight, weight_unit, height, height_unit, bmi) 
-                    VALUES ('{last_name_value}', '{first_name_value}', '{id_type_value}', '{id_value}', '{birth_date_value}', '{sex_value}', '{weight_value}', '{weight_unit}', '{height_value}', '{height_unit}', '{bmi_value}')"""
-    # elif db_table == 'estudios':
-    #     insert_query = f"""INSERT INTO estudios (id_number, file_name, file_path) 
-    #                 VALUES ('{id_value}', '{file_name_value}', '{file_path_value}')"""
-
-    cursor.execute(insert_query)
-    connection.commit()
-
-    table_data = None
-    if db_table == 'pacientes':
-        cursor.execute('SELECT * FROM pacientes ORDER BY id ASC')
+    with db_cursor() as cursor:
+        if db_table == 'pacientes':
+            execute_prepared(cursor, 'add_paciente', _paciente_values(data))
+        elif db_table == 'estudios':
+            execute_prepared(cursor, 'add_estudio', _estudio_values(data))
         table_data = cursor.fetchall()
-    # elif db_table == 'estudios':
-    #     cursor.execute(f"SELECT * FROM estudios WHERE id_number='{id_value}' ORDER BY id ASC")
-    #     table_data = cursor.fetchall()
-    
-    connection.close()
 
     return table_data
 
@@ -404,32 +1790,18 @@ def get_db(db_table: str, data_id: str) -> list:
     table_data: list
         Data of table
     """
-    settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
-    db_host = settings.value('db_host')
-    db_port = settings.value('db_port')
-    db_name = settings.value('db_name')
-    db_user = settings.value('db_user')
-    db_password = settings.value('db_password')
-    connection = psycopg2.connect(user=db_user, 
-                                  password=db_password, 
-                                  host=db_host, 
-                                  port=db_port, 
-                                  database=db_name)
-    cursor = connection.cursor()
-
-    table_data = None
-    if db_table == 'pacientes':
-        cursor.execute(f"SELECT * FROM pacientes WHERE id_number='{data_id}'")
-    elif db_table == 'estudios':
-        cursor.execute(f"SELECT * FROM estudios WHERE id_number='{data_id}'")
-    table_data = cursor.fetchall()
-    connection.close()
+    with db_cursor() as cursor:
+        if db_table == 'pacientes':
+            execute_prepared(cursor, 'get_paciente', (int(data_id),))
+        elif db_table == 'estudios':
+            execute_prepared(cursor, 'get_estudios', (int(data_id),))
+        table_data = cursor.fetchall()
     
     return table_data
 
 
 def edit_db(db_table: str, id_db: int, data: dict) -> list:
-    """ Edit data of a database table and returns table data updated
+    """ Edit data of a database table and returns the edited rows
     
     Parameters
     ----------
@@ -443,68 +1815,21 @@ def edit_db(db_table: str, id_db: int, data: dict) -> list:
     Returns
     -------
     table_data: list
-        Data of table updated
+        Rows edited in the table
     """
-    if db_table == 'pacientes':
-        last_name_value = data['last_name']
-        first_name_value = data['first_name']
-        id_type_value = data['id_type']
-        id_value = data['id']
-        birth_date_value = data['birth_date']
-        sex_value = data['sex']
-        weight_value = data['weight']
-        weight_unit = data['weight_unit']
-        height_value = data['height']
-        height_unit = data['height_unit']
-        bmi_value = data['bmi']
-    # elif db_table == 'estudios':
-    #     id_value = data['id']
-    #     file_name_value = data['file_name']
-    #     file_path_value = data['file_path']
-
-    settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
-    db_host = settings.value('db_host')
-    db_port = settings.value('db_port')
-    db_name = settings.value('db_name')
-    db_user = settings.value('db_user')
-    db_password = settings.value('db_password')
-    connection = psycopg2.connect(user=db_user, 
-                                  password=db_password, 
-                                  host=db_host, 
-                                  port=db_port, 
-                                  database=db_name)
-    cursor = connection.cursor()    
-    
-    update_query = None
-    if db_table == 'pacientes':
-        update_query = f"""UPDATE pacientes 
-                    SET (last_name, first_name, id_type, id_number, birth_date, sex, weight, weight_unit, height, height_unit, bmi)
-                    = ('{last_name_value}', '{first_name_value}', '{id_type_value}', '{id_value}', '{birth_date_value}', '{sex_value}', '{weight_value}', '{weight_unit}', '{height_value}', '{height_unit}', '{bmi_value}') 
-                    WHERE id = '{id_db}' """
-    # elif db_table == 'estudios':
-    #     update_query = f"""UPDATE estudios 
-    #                 SET (id_number, file_name, file_path)
-    #                 = ('{id_value}', '{file_name_value}', '{file_path_value}') 
-    #                 WHERE id = '{id_db}' """
-    
-    cursor.execute(update_query)
-    connection.commit()
+    # Studies are only added and deleted
+    if db_table != 'pacientes':
+        raise ValueError(f'{db_table}: table rows cannot be edited')
 
-    table_data = None
-    if db_table == 'pacientes':
-        cursor.execute('SELECT * FROM pacientes ORDER BY id ASC')
-        table_data = cursor.fetchall()
-    elif db_table == 'estudios':
-        cursor.execute('SELECT * FROM estudios')
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'edit_paciente', _paciente_values(data) + (int(id_db),))
         table_data = cursor.fetchall()
-    
-    connection.close()
 
     return table_data
 
 
 def delete_db(db_table: str, data: str) -> list:
-    """ Delete data from database table and returns table data updated
+    """ Delete data from database table and returns the deleted rows
     
     Parameters
     ----------
@@ -512,47 +1837,452 @@ def delete_db(db_table: str, data: str) -> list:
         Database table name
     data: str
         From patient: id number
-        From study: study file
+        From study: study id
     
     Returns
     -------
     table_data: list
-        Data of table updated
+        Rows deleted from the table
     """
-    settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
-    db_host = settings.value('db_host')
-    db_port = settings.value('db_port')
-    db_name = settings.value('db_name')
-    db_user = settings.value('db_user')
-    db_password = settings.value('db_password')
-    connection = psycopg2.connect(user=db_user, 
-                                  password=db_password, 
-                                  host=db_host, 
-                                  port=db_port, 
-                                  database=db_name)
-    cursor = connection.cursor()
-
-    delete_query = None
-    if db_table == 'pacientes':
-        delete_query = f"DELETE FROM pacientes WHERE id_number='{data}'"
-    elif db_table == 'estudios':
-        delete_query = f"DELETE FROM estudios WHERE file_name='{data}'"
-    cursor.execute(delete_query)
-    connection.commit()
-
-    table_data = None
-    if db_table == 'pacientes':
-        cursor.execute('SELECT * FROM pacientes ORDER BY id ASC')
+    with db_cursor() as cursor:
+        if db_table == 'pacientes':
+            execute_prepared(cursor, 'delete_paciente', (int(data),))
+        elif db_table == 'estudios':
+            execute_prepared(cursor, 'delete_estudio', (int(data),))
         table_data = cursor.fetchall()
-    elif db_table == 'estudios':
-        cursor.execute('SELECT * FROM estudios')
+
+    return table_data
+
+
+def add_study(left_image_file: str, right_image_file: str, id_number: str, study_name: str) -> tuple:
+    """ Extract, analyze and save a study of a patient
+
+    Parameters
+    ----------
+    left_image_file: str
+        Input data file path of left foot
+    right_image_file: str
+        Input data file path of right foot
+    id_number: str
+        Patient id number
+    study_name: str
+        Study name shown in the studies menu
+
+    Returns
+    -------
+    pressure: np.array
+        Pressure image from extract
+    results: dict
+        Analysis results from analisis
+    table_data: list
+        Study rows added to the table
+    """
+    pressure, results = extract(left_image_file, right_image_file)
+    table_data = add_db('estudios', {
+        'id_number': id_number,
+        'study_name': study_name,
+        'pressure': pressure,
+        'results': results
+    })
+    return pressure, results, table_data
+
+
+def add_studies(studies: list) -> list:
+    """ Save analyzed studies in a single transaction
+
+    Parameters
+    ----------
+    studies: list
+        Study data dicts as in add_db
+
+    Returns
+    -------
+    table_data: list
+        Study rows added to the table
+    """
+    table_data = []
+    with db_cursor() as cursor:
+        for data in studies:
+            execute_prepared(cursor, 'add_estudio', _estudio_values(data))
+            table_data += cursor.fetchall()
+    return table_data
+
+
+def find_paciente(first_name: str, last_name: str) -> list:
+    """ Id numbers of the patients with these names, ignoring case """
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'find_paciente', (first_name.strip(), last_name.strip()))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def load_study(study_id: int) -> tuple:
+    """ Load a saved study without re-reading the data files
+
+    Parameters
+    ----------
+    study_id: int
+        Database study id
+
+    Returns
+    -------
+    pressure: np.array
+        Pressure image as returned by extract (read-only)
+    results: dict
+        Analysis results as returned by analisis
+    """
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'get_estudio', (int(study_id),))
+        row = cursor.fetchone()
+
+    if row is None:
+        raise KeyError(f'Study {study_id} not found')
+    rows, cols, blob = row[:3]
+    pressure = np.frombuffer(blob, dtype=study_dtype).reshape(rows, cols)
+    results = unflatten_results(dict(zip(study_fields, row[3:])))
+    return pressure, results
+
+
+def get_paciente_estudios(data_id: str) -> tuple:
+    """ Get patient data and its studies with one pooled connection
+
+    Parameters
+    ----------
+    data_id: str
+        Patient id number
+
+    Returns
+    -------
+    patient_data: list
+        Patient rows
+    studies_data: list
+        Study rows without pressure and results
+    """
+    with db_cursor() as cursor:
+        execute_prepared(cursor, 'get_paciente', (int(data_id),))
+        patient_data = cursor.fetchall()
+        execute_prepared(cursor, 'get_estudios', (int(data_id),))
+        studies_data = cursor.fetchall()
+
+    return patient_data, studies_data
+
+
+def page_db(before_id: int = None, search: str = '', limit: int = 100) -> list:
+    """ Get a page of patients, newest first, for the patients menu
+
+    Parameters
+    ----------
+    before_id: int
+        Database id of the last patient of the previous page (None for first page)
+    search: str
+        Prefix of the id number or the last name (empty for all patients)
+    limit: int
+        Maximum number of patients in the page
+
+    Returns
+    -------
+    table_data: list
+        (id, id_number, last_name) rows
+    """
+    if before_id is None:
+        before_id = 2**31 - 1
+    prefix = search.strip().lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    with db_cursor() as cursor:
+        if prefix:
+            execute_prepared(cursor, 'search_pacientes', (int(before_id), prefix + '%', int(limit)))
+        else:
+            execute_prepared(cursor, 'page_pacientes', (int(before_id), int(limit)))
         table_data = cursor.fetchall()
-    
-    connection.close()
 
     return table_data
 
 
+class PacientesModel(QtCore.QAbstractListModel):
+    refreshed = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None, page_size: int = 100) -> None:
+        """ Lazily populated list of patients for the patients menu
+
+        Patients are fetched in keyset pages of page_size rows, newest
+        first, only when the menu view scrolls to them. Pages are read in
+        a background thread. Rows are (id, id_number, last_name), the id
+        number is displayed and returned as int by the UserRole. refreshed
+        is emitted with the search text when the first page after refresh
+        arrives.
+
+        Parameters
+        ----------
+        parent: QObject
+            Parent object
+        page_size: int
+            Number of patients fetched at once
+
+        Returns
+        -------
+        None
+        """
+        super().__init__(parent)
+        self.page_size = page_size
+        self.search = ''
+        self.rows = []
+        self.has_more = False
+        self.tasks = TaskRunner(self, 1)
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self.rows[index.row()]
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+            return str(row[1])
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            return row[2]
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return row[1]
+        return None
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()) -> bool:
+        return not parent.isValid() and self.has_more and not self.tasks.is_busy()
+
+    def fetchMore(self, parent=QtCore.QModelIndex()) -> None:
+        if parent.isValid() or self.tasks.is_busy():
+            return
+        before_id = self.rows[-1][0] if self.rows else None
+        first_page = not self.rows
+        self.tasks.start('page', page_db, before_id, self.search, self.page_size,
+            on_finished=lambda page: self.on_page_loaded(page, first_page))
+
+    def on_page_loaded(self, page: list, first_page: bool) -> None:
+        """ Append a page of patients """
+        self.has_more = len(page) == self.page_size
+        if page:
+            self.beginInsertRows(QtCore.QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+            self.rows.extend(page)
+            self.endInsertRows()
+        if first_page:
+            self.refreshed.emit(self.search)
+
+    def refresh(self, search: str = '') -> None:
+        """ Drop loaded patients and fetch the first page matching search """
+        self.tasks.cancel_all()
+        self.beginResetModel()
+        self.search = search
+        self.rows = []
+        self.has_more = True
+        self.endResetModel()
+        self.fetchMore()
+
+    def find(self, id_number: str) -> int:
+        """ Row of a loaded patient by id number (-1 if not loaded) """
+        for i, row in enumerate(self.rows):
+            if str(row[1]) == str(id_number):
+                return i
+        return -1
+
+    def insert_patient(self, patient_row: tuple) -> int:
+        """ Insert a new pacientes row at the top and return its row """
+        self.beginInsertRows(QtCore.QModelIndex(), 0, 0)
+        self.rows.insert(0, (patient_row[0], patient_row[4], patient_row[1]))
+        self.endInsertRows()
+        return 0
+
+    def update_patient(self, id_number: str, patient_row: tuple) -> None:
+        """ Replace a loaded patient with an edited pacientes row """
+        i = self.find(id_number)
+        if i >= 0:
+            self.rows[i] = (patient_row[0], patient_row[4], patient_row[1])
+            self.dataChanged.emit(self.index(i), self.index(i))
+
+    def remove_patient(self, id_number: str) -> None:
+        """ Remove a loaded patient """
+        i = self.find(id_number)
+        if i >= 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), i, i)
+            del self.rows[i]
+            self.endRemoveRows()
+
+
+# ------------------------------
+# Tareas en Segundo Plano
+# ------------------------------
+class TaskSignals(QtCore.QObject):
+    """ Signals of a background task, delivered in the thread that created it """
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(object)
+    done = QtCore.pyqtSignal()
+
+
+class Task(QtCore.QRunnable):
+    def __init__(self, function, *args, **kwargs) -> None:
+        """ Function call run in a worker thread
+
+        Emits signals.finished with the returned value or signals.failed
+        with the raised exception, unless the task was cancelled.
+
+        Parameters
+        ----------
+        function: callable
+            Function run in the worker thread. It must not touch widgets
+        args, kwargs:
+            Function arguments
+
+        Returns
+        -------
+        None
+        """
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TaskSignals()
+        self.cancelled = False
+        self.cancellable = True
+        self.started = False
+        self.lock = threading.Lock()
+
+    def cancel(self) -> bool:
+        """ Drop the result of the task. A running function is not interrupted
+
+        Returns
+        -------
+        queued: bool
+            True if the task has not started. Qt deletes a task when it
+            returns, so a started task must not be passed to the pool again
+        """
+        with self.lock:
+            self.cancelled = True
+            return not self.started
+
+    def run(self) -> None:
+        try:
+            with self.lock:
+                if self.cancelled:
+                    return
+                self.started = True
+            try:
+                result = self.function(*self.args, **self.kwargs)
+            except Exception as err:
+                if not self.cancelled:
+                    self.signals.failed.emit(err)
+                return
+            if not self.cancelled:
+                self.signals.finished.emit(result)
+        finally:
+            # Emitted last, so the signals are deleted after every result
+            # queued for the receiving thread
+            self.signals.done.emit()
+
+
+class TaskRunner(QtCore.QObject):
+    busy_changed = QtCore.pyqtSignal(bool)
+
+    def __init__(self, parent=None, max_threads: int = task_max_threads) -> None:
+        """ Runs keyed background tasks in a thread pool
+
+        Starting a task cancels the previous task with the same key, so
+        only the latest request of each kind reaches the callbacks.
+        Database writes are started with cancellable=False: they always
+        run and reach their callbacks, since a dropped result would leave
+        the widgets out of sync with the committed data.
+        busy_changed is emitted when the first task starts and when the
+        last one ends.
+
+        Parameters
+        ----------
+        parent: QObject
+            Parent object
+        max_threads: int
+            Maximum number of worker threads
+
+        Returns
+        -------
+        None
+        """
+        super().__init__(parent)
+        self.thread_pool = QtCore.QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(max_threads)
+        self.tasks = {}
+        self.writes = 0
+
+    def start(self, key: str, function, *args, on_finished=None, on_failed=None, cancellable: bool = True) -> Task:
+        """ Run function(*args) in the background
+
+        Parameters
+        ----------
+        key: str
+            Task kind, a running task with the same key is cancelled
+        function: callable
+            Function run in a worker thread
+        args:
+            Function arguments
+        on_finished: callable
+            Called in this thread with the returned value
+        on_failed: callable
+            Called in this thread with the raised exception
+        cancellable: bool
+            False for writes, which neither cancel other tasks nor are
+            cancelled by cancel or cancel_all
+
+        Returns
+        -------
+        task: Task
+            Started task
+        """
+        if cancellable:
+            self.cancel(key)
+        else:
+            self.writes += 1
+            key = f'{key}:{self.writes}'
+        task = Task(function, *args)
+        task.cancellable = cancellable
+        # The runner owns the signals until the task is done, a cancelled
+        # task is dropped from tasks while its results may still be queued
+        task.signals.setParent(self)
+        task.signals.done.connect(task.signals.deleteLater)
+        task.signals.finished.connect(lambda result: self._deliver(key, task, on_finished, result))
+        task.signals.failed.connect(lambda err: self._deliver(key, task, on_failed, err))
+        self.tasks[key] = task
+        if len(self.tasks) == 1:
+            self.busy_changed.emit(True)
+        self.thread_pool.start(task)
+        return task
+
+    def cancel(self, key: str) -> None:
+        """ Cancel the task of a key, dropping it if it has not started yet """
+        task = self.tasks.get(key)
+        if task is None or not task.cancellable:
+            return
+        del self.tasks[key]
+        if task.cancel() and self.thread_pool.tryTake(task):
+            task.signals.deleteLater()
+        if not self.tasks:
+            self.busy_changed.emit(False)
+
+    def cancel_all(self) -> None:
+        """ Cancel every task but the writes """
+        for key in list(self.tasks):
+            self.cancel(key)
+
+    def wait(self) -> None:
+        """ Block until the running tasks and the writes end """
+        self.thread_pool.waitForDone()
+
+    def is_busy(self, key: str = None) -> bool:
+        """ Whether any task, or the task of a key, is pending """
+        return bool(self.tasks) if key is None else key in self.tasks
+
+    def _deliver(self, key: str, task: Task, callback, value) -> None:
+        """ Forward a task result unless it was cancelled in the meantime """
+        if task.cancelled or self.tasks.get(key) is not task:
+            return
+        del self.tasks[key]
+        if not self.tasks:
+            self.busy_changed.emit(False)
+        if callback is not None:
+            callback(value)
+
+
 # ----------------
 # About App Dialog
 # ----------------
@@ -652,6 +2382,77 @@ class AboutApp(QtWidgets.QDialog):
     def on_aceptar_button_clicked(self):
         self.close()
 
+# ------------------
+# Diagnostics Dialog
+# ------------------
+class DiagnosticsDialog(QtWidgets.QDialog):
+    def __init__(self, count: int = 50) -> None:
+        """ Last stage timings of the instrumentation, refreshed every second
+
+        Parameters
+        ----------
+        count: int
+            Number of measurements shown
+
+        Returns
+        -------
+        None
+        """
+        super().__init__()
+        self.count = count
+        # --------
+        # Settings
+        # --------
+        self.settings = QSettings(f'{sys.path[0]}/settings.ini', QSettings.Format.IniFormat)
+        self.language_value = int(self.settings.value('language'))
+        self.theme_value = eval(self.settings.value('theme'))
+
+        # ----------------
+        # Generación de UI
+        # ----------------
+        width = 480
+        height = 480
+        if self.language_value == 0:
+            self.setWindowTitle('Diagnóstico')
+        elif self.language_value == 1:
+            self.setWindowTitle('Diagnostics')
+        self.resize(width, height)
+        self.setObjectName('object_diagnostics')
+
+        self.diagnostics_card = mt3.Card(self, 'diagnostics_card',
+            (8, 8, width-16, height-16), ('Tiempos por Etapa', 'Stage Timings'),
+            self.theme_value, self.language_value)
+
+        self.timings_text = QtWidgets.QPlainTextEdit(self.diagnostics_card)
+        self.timings_text.setGeometry(8, 48, width-32, height-72)
+        self.timings_text.setReadOnly(True)
+        self.timings_text.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont))
+
+        self.refresh_timer = QtCore.QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def refresh(self) -> None:
+        """ Show the last measurements and the totals by stage """
+        hour, stage = (('hora', 'etapa'), ('time', 'stage'))[self.language_value]
+        lines = [f'{hour:<9} {stage:<10} {"ms":>10} {"KiB":>10}']
+        for record in instrumentation.last(self.count):
+            allocated = '' if record['bytes'] is None else f'{record["bytes"] / 1024:.1f}'
+            lines.append(f'{time.strftime("%H:%M:%S", time.localtime(record["time"]))} '
+                f'{record["stage"]:<10} {record["seconds"] * 1e3:10.2f} {allocated:>10}')
+        lines += ['', instrumentation.prometheus()]
+        self.timings_text.setPlainText('\n'.join(lines))
+
+    def showEvent(self, a0: QtGui.QShowEvent) -> None:
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(a0)
+
+    def hideEvent(self, a0: QtGui.QHideEvent) -> None:
+        self.refresh_timer.stop()
+        super().hideEvent(a0)
+
+
 # ---------------
 # About Qt Dialog
 # ---------------
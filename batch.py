@@ -0,0 +1,203 @@
+"""
+Batch
+
+This file contains the headless batch analysis of pressure data files.
+
+Left and right foot files are paired by name inside each directory of a
+tree (L01.apd <-> R01.apd), analyzed in parallel worker processes and the
+results are streamed to a CSV or Parquet file.
+
+Usage:
+    python batch.py <input_dir> <output_file> [--workers N] [--chunksize N] [--index FILE [--reindex]]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import csv
+import os
+
+import backend
+
+
+result_fields = ['left_file', 'right_file', *backend.analysis_dtype.names, 'error']
+
+
+def find_pairs(input_dir: str, files: list = None) -> list:
+    """ Find left and right foot data files in a directory tree
+
+    Parameters
+    ----------
+    input_dir: str
+        Root directory of the data files
+    files: list
+        Data file paths of the tree, e.g. from a scan_index.ScanIndex,
+        instead of walking the directory
+
+    Returns
+    -------
+    pairs: list
+        Sorted (left_file, right_file) path tuples. Left files without a
+        right counterpart in the same directory are skipped
+    """
+    if files is None:
+        files = sorted(Path(input_dir).rglob('*.apd'))
+        exists = Path.is_file
+    else:
+        files = sorted(map(Path, files))
+        exists = set(files).__contains__
+
+    pairs = []
+    for left_file in files:
+        if not left_file.name[:1] in ('L', 'l'):
+            continue
+        for prefix in ('R', 'r'):
+            right_file = left_file.with_name(f'{prefix}{left_file.name[1:]}')
+            if exists(right_file):
+                pairs.append((str(left_file), str(right_file)))
+                break
+    return pairs
+
+
+def analyze_pair(pair: tuple) -> dict:
+    """ Extract and analyze one pair of data files
+
+    Errors are reported in the 'error' field instead of being raised, so
+    a single damaged file does not stop the whole batch.
+    """
+    left_file, right_file = pair
+    row = dict.fromkeys(result_fields)
+    row['left_file'] = left_file
+    row['right_file'] = right_file
+    try:
+        _, results = backend.extract(left_file, right_file)
+        row.update(backend.flatten_results(results))
+    except Exception as err:
+        row['error'] = f'{type(err).__name__}: {err}'
+    return row
+
+
+def analyze(pairs: list, workers: int = None, chunksize: int = 16):
+    """ Analyze pairs of data files in parallel worker processes
+
+    Parameters
+    ----------
+    pairs: list
+        (left_file, right_file) path tuples
+    workers: int
+        Number of worker processes (number of CPUs by default)
+    chunksize: int
+        Number of pairs sent to a worker at once
+
+    Returns
+    -------
+    rows: generator
+        Result rows in the same order as pairs
+    """
+    if workers == 1:
+        yield from map(analyze_pair, pairs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(analyze_pair, pairs, chunksize=chunksize)
+
+
+def write_csv(rows, output_file: str) -> int:
+    """ Stream result rows to a CSV file and return the number of rows """
+    count = 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=result_fields)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def write_parquet(rows, output_file: str, batch_size: int = 4096) -> int:
+    """ Stream result rows to a Parquet file and return the number of rows
+
+    Requires pyarrow. Rows are written in row groups of batch_size.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ImportError('Parquet output requires pyarrow (pip install pyarrow)') from err
+
+    schema = pa.schema([(field, pa.string()) if field in ('left_file', 'right_file', 'error')
+        else (field, pa.int64()) if field in ('left_peak_row', 'left_peak_col')
+        else (field, pa.float64()) for field in result_fields])
+
+    count = 0
+    batch = []
+    with pq.ParquetWriter(output_file, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+
+def run(input_dir: str, output_file: str, workers: int = None, chunksize: int = 16, index: str = None,
+        reindex: bool = False) -> int:
+    """ Analyze every pair of data files of a directory tree
+
+    Parameters
+    ----------
+    input_dir: str
+        Root directory of the data files
+    output_file: str
+        Output file path. Parquet is used for .parquet files, CSV otherwise
+    workers: int
+        Number of worker processes (number of CPUs by default)
+    chunksize: int
+        Number of pairs sent to a worker at once
+    index: str
+        SQLite scan index (scan_index.py) used to list the data files
+        instead of walking the directory
+    reindex: bool
+        Update the scan index with the new and changed files of the tree
+        before listing them
+
+    Returns
+    -------
+    count: int
+        Number of analyzed pairs
+    """
+    files = None
+    if index is not None:
+        import scan_index
+
+        scans = scan_index.ScanIndex(index)
+        if reindex:
+            scans.update(input_dir)
+        files = scans.files(input_dir)
+        scans.close()
+    rows = analyze(find_pairs(input_dir, files), workers, chunksize)
+    if Path(output_file).suffix.lower() == '.parquet':
+        return write_parquet(rows, output_file)
+    return write_csv(rows, output_file)
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Batch analysis of plantar pressure data files')
+    parser.add_argument('input_dir', help='root directory of the .apd files')
+    parser.add_argument('output_file', help='output .csv or .parquet file')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=16, help='pairs sent to a worker at once')
+    parser.add_argument('--index', help='SQLite scan index used to list the files')
+    parser.add_argument('--reindex', action='store_true', help='update the scan index before listing the files')
+    args = parser.parse_args()
+    if args.reindex and not args.index:
+        parser.error('--reindex requires --index')
+    if args.index and not args.reindex and not os.path.isfile(args.index):
+        parser.error(f'{args.index} does not exist, build it with --reindex')
+
+    count = run(args.input_dir, args.output_file, args.workers, args.chunksize, args.index, args.reindex)
+    print(f'{count} pairs analyzed')
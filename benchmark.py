@@ -0,0 +1,240 @@
+"""
+Benchmark
+
+This file contains the benchmarks of the analysis hot path.
+
+Each stage (parse, stitch, center of pressure, regional sums, integral
+image region queries, analisis of dense and sparse footprints, extract) is timed on the pairs of examples/ and on synthetic data: large
+pressure images, a pair on a walkway plate, a stack of studies for
+analisis_batch and a long dynamic recording for iter_frame_analysis. The best time per item and the peak
+memory allocated by one run of each stage are reported.
+
+With --save the results are written as the baseline. Otherwise they are
+compared with the baseline, if there is one, and the check fails when a
+stage is slower or allocates more than the baseline by more than the
+threshold. Timings depend on the machine, so the baseline is saved and
+compared on the same one.
+
+Only backend is imported, so no Qt display or database is needed. The
+import time of the application is checked by startup_time.py.
+
+Usage:
+    python benchmark.py [--save] [--baseline FILE] [--threshold RATIO] [--stage NAME]
+"""
+
+from pathlib import Path
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import backend
+import batch
+
+
+examples_dir = Path(__file__).parent / 'examples'
+default_baseline = Path(__file__).parent / 'benchmark_baseline.json'
+
+
+def synthetic_recording(file_path: str, frames: int, seed: int = 0) -> None:
+    """ Write a dynamic recording with the header and footprint of an example
+
+    Each frame is the footprint of examples/L01.apd scaled by a random
+    load, with the foot off the plate one frame in ten.
+    """
+    header = (examples_dir / 'L01.apd').read_text(encoding='ISO-8859-1').split('[Data]')[0]
+    footprint = backend.ApdReader(examples_dir / 'L01.apd').data
+    rng = np.random.default_rng(seed)
+    with open(file_path, 'w', encoding='ISO-8859-1') as f:
+        f.write(header.replace('[Technical]', '[Technical]\nFrameRate=100'))
+        f.write('[Data]\n')
+        for i in range(frames):
+            frame = np.where(footprint > 0, footprint * rng.uniform(0.5, 1.5), -1)
+            if i % 10 == 9:
+                frame[:] = -1
+            np.savetxt(f, frame, fmt='%.1f', delimiter='\t')
+
+
+def synthetic_walkway(work_dir: str, shape: tuple = (2048, 256)) -> tuple:
+    """ Write the example pair L01/R01 with its footprints on a large plate
+
+    Returns
+    -------
+    files: tuple
+        (left_file, right_file) paths
+    """
+    files = []
+    for name, start in (('L01.apd', (shape[0] // 2, shape[1] // 2 - 12)), ('R01.apd', (shape[0] // 2, shape[1] // 2 + 2))):
+        text = (examples_dir / name).read_text(encoding='ISO-8859-1')
+        for key, value in (('MaxSensorsX', shape[0]), ('MaxSensorsY', shape[1]), ('StartSensX', start[0]), ('StartSensY', start[1])):
+            text = re.sub(rf'^{key}=.*$', f'{key}={value}', text, count=1, flags=re.MULTILINE)
+        file = Path(work_dir) / f'walkway_{name}'
+        file.write_text(text, encoding='ISO-8859-1')
+        files.append(str(file))
+    return tuple(files)
+
+
+def synthetic_studies(count: int, seed: int = 0) -> tuple:
+    """ Stack of pressure images built from the examples with random loads
+
+    Returns
+    -------
+    pressure: np.array
+        (count, 48, 48) pressure images
+    left_mdata: np.array
+        (count, 4) left footprint windows
+    right_mdata: np.array
+        (count, 4) right footprint windows
+    """
+    studies = []
+    for left_file, right_file in batch.find_pairs(examples_dir):
+        left_reader = backend.ApdReader(left_file)
+        right_reader = backend.ApdReader(right_file)
+        studies.append((backend.stitch(left_reader, right_reader),
+            backend._bbox(left_reader.metadata), backend._bbox(right_reader.metadata)))
+
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(len(studies), size=count)
+    pressure = np.stack([studies[i][0] for i in ids])
+    pressure = np.where(pressure > 0, pressure * rng.uniform(0.5, 1.5, (count, 1, 1)), pressure)
+    left_mdata = np.array([studies[i][1] for i in ids])
+    right_mdata = np.array([studies[i][2] for i in ids])
+    return pressure, left_mdata, right_mdata
+
+
+def stages(work_dir: str) -> list:
+    """ Benchmark stages
+
+    Parameters
+    ----------
+    work_dir: str
+        Directory of the synthetic files and of a private extract cache
+
+    Returns
+    -------
+    stages: list
+        (name, function, items) tuples. function runs the stage once over
+        items inputs
+    """
+    pairs = batch.find_pairs(examples_dir)
+    files = [file for pair in pairs for file in pair]
+    readers = [(backend.ApdReader(left_file), backend.ApdReader(right_file)) for left_file, right_file in pairs]
+    footprints = [reader.data for pair in readers for reader in pair]
+    studies = [(left.data, right.data, backend.stitch(left, right), left.metadata, right.metadata)
+        for left, right in readers]
+    sparse_studies = [(left.sparse(), right.sparse()) for left, right in readers]
+    large_images = np.random.default_rng(0).uniform(-1, 100, (10, 192, 192))
+    integral = backend.IntegralImage(studies[0][2])
+    rois = np.random.default_rng(0).uniform(-0.5, 47.5, (4, 10000))
+
+    pressure, left_mdata, right_mdata = synthetic_studies(10000)
+    walkway = synthetic_walkway(work_dir)
+    recording_file = str(Path(work_dir) / 'recording.apd')
+    synthetic_recording(recording_file, 2000)
+
+    backend.extract_cache = backend.ExtractCache(Path(work_dir) / 'cache')
+    for left_file, right_file in pairs:
+        backend.extract(left_file, right_file)
+
+    def regions():
+        for left_df, right_df, image, left_mdata, right_mdata in studies:
+            positive = np.maximum(image, 0.0)
+            backend.region_sums(positive, 'L', backend._bbox(left_mdata))
+            backend.region_sums(positive, 'R', backend._bbox(right_mdata))
+
+    return [
+        ('parse', lambda: [backend.ApdReader(file) for file in files], len(files)),
+        ('stitch', lambda: [backend.stitch(left, right) for left, right in readers], len(readers)),
+        ('center_pressure', lambda: [backend.center_pressure(footprint) for footprint in footprints], len(footprints)),
+        ('center_pressure 192x192', lambda: [backend.center_pressure(image) for image in large_images], len(large_images)),
+        ('regions', regions, len(studies)),
+        ('integral image', lambda: [backend.IntegralImage(study[2]) for study in studies], len(studies)),
+        ('area_sum 10000', lambda: integral.area_sum(*rois), rois.shape[1]),
+        ('analisis', lambda: [backend.analisis(*study) for study in studies], len(studies)),
+        ('analisis sparse', lambda: [backend.analisis(*study) for study in sparse_studies], len(sparse_studies)),
+        ('extract', lambda: [backend.extract(*pair, use_cache=False) for pair in pairs], len(pairs)),
+        ('extract cached', lambda: [backend.extract(*pair) for pair in pairs], len(pairs)),
+        ('extract walkway 2048x256', lambda: backend.extract(*walkway, use_cache=False), 1),
+        ('analisis_batch 10000', lambda: backend.analisis_batch(pressure, left_mdata, right_mdata), len(pressure)),
+        ('iter_frame_analysis 2000', lambda: backend.analisis_recording(recording_file), 2000),
+    ]
+
+
+def measure(function, items: int, repeat: int = 5) -> dict:
+    """ Best time per item in seconds and peak memory in bytes of a stage """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat, number)) / number / items
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': seconds, 'peak': peak}
+
+
+def check(baseline_file: str = default_baseline, threshold: float = 0.25, save: bool = False, stage: str = None) -> bool:
+    """ Print the benchmark report and return whether there is no regression
+
+    Parameters
+    ----------
+    baseline_file: str
+        JSON file of the baseline results
+    threshold: float
+        Allowed relative increase of time and memory over the baseline
+    save: bool
+        Write the results as the new baseline instead of comparing
+    stage: str
+        Run only the stages whose name starts with stage
+
+    Returns
+    -------
+    passed: bool
+        True if no stage is slower or allocates more than the baseline
+        by more than the threshold
+    """
+    baseline_file = Path(baseline_file)
+    baseline = json.loads(baseline_file.read_text()) if baseline_file.is_file() else {}
+
+    results = {}
+    regressions = []
+    print(f'{"stage":<26} {"items":>6} {"time [us]":>12} {"peak [KiB]":>11} {"time":>8} {"memory":>8}')
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, function, items in stages(work_dir):
+            if stage and not name.startswith(stage):
+                continue
+            result = results[name] = measure(function, items)
+            line = f'{name:<26} {items:>6} {result["time"] * 1e6:12.2f} {result["peak"] / 1024:11.1f}'
+            if name in baseline and not save:
+                for key in ('time', 'peak'):
+                    change = result[key] / max(baseline[name][key], 1e-12) - 1
+                    line += f' {change:+8.1%}'
+                    if change > threshold:
+                        regressions.append(f'{name} {key}')
+            print(line)
+
+    if save:
+        baseline.update(results)
+        baseline_file.write_text(json.dumps(baseline, indent=4))
+        print(f'\nbaseline saved to {baseline_file}')
+    elif regressions:
+        print(f'\nregressions over {threshold:.0%}: {", ".join(regressions)}')
+
+    return not regressions
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Benchmarks of the analysis hot path')
+    parser.add_argument('--save', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--baseline', default=default_baseline, help='baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative increase over the baseline')
+    parser.add_argument('--stage', help='run only the stages whose name starts with this')
+    args = parser.parse_args()
+
+    sys.exit(0 if check(args.baseline, args.threshold, args.save, args.stage) else 1)
@@ -51,12 +51,6 @@ class Database(QtWidgets.QDialog):
         self.setMaximumSize(width, height)
         self.setModal(True)
         self.setObjectName('object_database')
-        if self.theme_value:
-            self.setStyleSheet(f'QWidget#object_database {{ background-color: #E5E9F0;'
-                f'color: #000000 }}')
-        else:
-            self.setStyleSheet(f'QWidget#object_database {{ background-color: #3B4253;'
-                f'color: #E5E9F0 }}')
 
 
         self.database_card = mt3.Card(self, 'database_card', (8, 8, width-16, height-16),
@@ -9,9 +9,7 @@ from PyQt6.QtWidgets import QWidget, QApplication
 from PyQt6.QtCore import QSettings, Qt
 
 import sys
-import pandas as pd
-import matplotlib
-import matplotlib.pyplot as plt
+import math
 from pathlib import Path
 
 import material3_components as mt3
@@ -31,6 +29,10 @@ class App(QWidget):
         self.language_value = int(self.settings.value('language'))
         self.theme_value = eval(self.settings.value('theme'))
         self.default_path = self.settings.value('default_path')
+        self.plot_backend = self.settings.value('plot_backend', 'matplotlib')
+        if self.settings.value('diagnostics', 'false') == 'true':
+            backend.instrumentation.enable(self.settings.value('diagnostics_memory', 'false') == 'true',
+                self.settings.value('diagnostics_log'))
 
         self.idioma_dict = {0: ('ESP', 'SPA'), 1: ('ING', 'ENG')}
     
@@ -38,6 +40,7 @@ class App(QWidget):
         # Variables
         # ---------
         self.patient_data = None
+        self.estudios_list = []
         self.data_lat_max = 0.0
         self.data_lat_t_max = 0.0
         self.data_lat_min = 0.0
@@ -65,14 +68,7 @@ class App(QWidget):
             self.setWindowTitle('Plantar Pressure')
         self.setGeometry(screen_x, screen_y, width, height)
         self.setMinimumSize(1300, 700)
-        if self.theme_value:
-            self.setStyleSheet(f'QWidget {{ background-color: #E5E9F0; color: #000000 }}'
-                f'QComboBox QListView {{ border: 1px solid #000000; border-radius: 4;'
-                f'background-color: #B2B2B2; color: #000000 }}')
-        else:
-            self.setStyleSheet(f'QWidget {{ background-color: #3B4253; color: #E5E9F0 }}'
-                f'QComboBox QListView {{ border: 1px solid #E5E9F0; border-radius: 4;'
-                f'background-color: #2E3441; color: #E5E9F0 }}')
+        mt3.apply_theme(self.theme_value)
         
         # -----------
         # Card Título
@@ -110,6 +106,15 @@ class App(QWidget):
             (8, 8), 'about_qt.png', self.theme_value)
         self.aboutQt_button.clicked.connect(self.on_aboutQt_button_clicked)
 
+        self.busy_bar = mt3.ProgressBar(self.titulo_card, 'busy_bar',
+            (8, 42, width-32), self.theme_value)
+        self.busy_bar.hide()
+
+        # Panel oculto de diagnóstico
+        self.diagnostics = None
+        self.diagnostics_shortcut = QtGui.QShortcut(QtGui.QKeySequence('Ctrl+Shift+D'), self)
+        self.diagnostics_shortcut.activated.connect(self.on_diagnostics_shortcut_activated)
+
         # -------------
         # Card Paciente
         # -------------
@@ -120,7 +125,22 @@ class App(QWidget):
         y_1 = 48
         self.pacientes_menu = mt3.Menu(self.paciente_card, 'pacientes_menu',
             (8, y_1, 164), 10, 10, {}, self.theme_value, self.language_value)
+        self.pacientes_model = backend.PacientesModel(self)
+        self.pacientes_model.refreshed.connect(self.on_pacientes_model_refreshed)
+        self.pacientes_model.tasks.busy_changed.connect(self.on_tasks_busy_changed)
+        self.pacientes_menu.setModel(self.pacientes_model)
+        self.pacientes_menu.setEditable(True)
+        self.pacientes_menu.setInsertPolicy(QtWidgets.QComboBox.InsertPolicy.NoInsert)
+        self.pacientes_menu.setCompleter(None)
         self.pacientes_menu.textActivated.connect(self.on_pacientes_menu_textActivated)
+        self.pacientes_menu.currentIndexChanged.connect(self.on_pacientes_menu_currentIndexChanged)
+
+        self.pacientes_search_timer = QtCore.QTimer(self)
+        self.pacientes_search_timer.setSingleShot(True)
+        self.pacientes_search_timer.setInterval(300)
+        self.pacientes_search_timer.timeout.connect(self.on_pacientes_search_timer_timeout)
+        self.pacientes_search_text = ''
+        self.pacientes_menu.lineEdit().textEdited.connect(self.on_pacientes_menu_textEdited)
 
         y_1 += 40
         self.paciente_add_button = mt3.IconButton(self.paciente_card, 'paciente_add_button',
@@ -146,7 +166,7 @@ class App(QWidget):
         self.analisis_menu = mt3.Menu(self.analisis_card, 'analisis_menu',
             (8, y_2, 164), 10, 10, {}, self.theme_value, self.language_value)
         self.analisis_menu.setEnabled(False)
-        # self.analisis_menu.textActivated.connect(self.on_analisis_menu_textActivated)
+        self.analisis_menu.textActivated.connect(self.on_analisis_menu_textActivated)
 
         y_2 += 40
         self.analisis_add_button = mt3.IconButton(self.analisis_card, 'analisis_add_button',
@@ -157,7 +177,7 @@ class App(QWidget):
         self.analisis_del_button = mt3.IconButton(self.analisis_card, 'analisis_del_button',
             (140, y_2), 'delete.png', self.theme_value)
         self.analisis_del_button.setEnabled(False)
-        # self.analisis_del_button.clicked.connect(self.on_analisis_del_button_clicked)
+        self.analisis_del_button.clicked.connect(self.on_analisis_del_button_clicked)
 
         # ----------------
         # Card Información
@@ -219,7 +239,8 @@ class App(QWidget):
         self.presion_plot_card = mt3.Card(self, 'presion_plot_card',
             (196, 64, 900, 215), ('Mapa de Presiones Plantares','Plantar Pressures Map'), 
             self.theme_value, self.language_value)
-        self.somatotipo_plot = backend.MPLCanvas(self.presion_plot_card, self.theme_value)
+        self.somatotipo_plot = None
+        QtCore.QTimer.singleShot(0, self.create_plot)
 
         # -------------
         # Card Opciones
@@ -499,23 +520,11 @@ class App(QWidget):
         # -------------
         # Base de Datos
         # -------------
-        try:
-            self.patientes_list = backend.create_db('pacientes')
-            self.estudios_list = backend.create_db('estudios')
-
-            for data in self.patientes_list:
-                self.pacientes_menu.addItem(str(data[4]))
-            self.pacientes_menu.setCurrentIndex(-1)
-        except:
-            self.pacientes_menu.setEnabled(False)
-            self.paciente_add_button.setEnabled(False)
-            self.paciente_edit_button.setEnabled(False)
-            self.paciente_del_button.setEnabled(False)
-            
-            if self.language_value == 0:
-                QtWidgets.QMessageBox.critical(self, 'Error de Base de Datos', 'La base de datos no está configurada')
-            elif self.language_value == 1:
-                QtWidgets.QMessageBox.critical(self, 'Database Error', 'Database not configured')
+        self.tasks = backend.TaskRunner(self)
+        self.tasks.busy_changed.connect(self.on_tasks_busy_changed)
+
+        self.tasks.start('database', self.create_tables,
+            on_finished=self.on_database_ready, on_failed=self.on_database_failed)
 
     # ----------------
     # Funciones Título
@@ -588,204 +597,17 @@ class App(QWidget):
         -------
         None
         """
-        if state: self.setStyleSheet('background-color: #E5E9F0; color: #000000')
-        else: self.setStyleSheet('background-color: #3B4253; color: #E5E9F0')
+        mt3.apply_theme(state)
 
-        self.titulo_card.apply_styleSheet(state)
-        self.idioma_menu.apply_styleSheet(state)
         self.tema_switch.set_state(state)
-        self.tema_switch.apply_styleSheet(state)
-        self.database_button.apply_styleSheet(state)
-        self.manual_button.apply_styleSheet(state)
-        self.about_button.apply_styleSheet(state)
-        self.aboutQt_button.apply_styleSheet(state)
-
-        self.paciente_card.apply_styleSheet(state)
-        self.paciente_add_button.apply_styleSheet(state)
-        self.paciente_edit_button.apply_styleSheet(state)
-        self.paciente_del_button.apply_styleSheet(state)
-        self.pacientes_menu.apply_styleSheet(state)
-
-        self.analisis_card.apply_styleSheet(state)
-        self.analisis_add_button.apply_styleSheet(state)
-        self.analisis_del_button.apply_styleSheet(state)
-        self.analisis_menu.apply_styleSheet(state)
-
-        self.info_card.apply_styleSheet(state)
-        self.apellido_value.apply_styleSheet(state)
-        self.nombre_value.apply_styleSheet(state)
-        self.id_label.apply_styleSheet(state)
         self.id_label.set_icon('id', state)
-        self.id_value.apply_styleSheet(state)
-        self.fecha_label.apply_styleSheet(state)
         self.fecha_label.set_icon('calendar', state)
-        self.fecha_value.apply_styleSheet(state)
-        self.sex_label.apply_styleSheet(state)
-        self.sex_value.apply_styleSheet(state)
-        
         if self.sex_value.text() == 'F': self.sex_label.set_icon('woman', state)
         elif self.sex_value.text() == 'M': self.sex_label.set_icon('man', state)
-
-        self.peso_label.apply_styleSheet(state)
         self.peso_label.set_icon('weight', state)
-        self.peso_value.apply_styleSheet(state)
-        self.altura_label.apply_styleSheet(state)
         self.altura_label.set_icon('height', state)
-        self.altura_value.apply_styleSheet(state)
-        self.bmi_value.apply_styleSheet(state)
-
-        self.presion_plot_card.apply_styleSheet(state)
-
-        self.somatotipo_plot.apply_styleSheet(state)
-    #     if self.lat_text_1:
-    #         self.lat_text_1.remove()
-    #         self.lat_text_2.remove()
-    #         if state:
-    #             self.lat_text_1 = self.somatotipo_plot.axes.text(self.data_lat_t_max, self.data_lat_max, f'{self.data_lat_max:.2f}', color='#000000')
-    #             self.lat_text_2 = self.somatotipo_plot.axes.text(self.data_lat_t_min, self.data_lat_min, f'{self.data_lat_min:.2f}', color='#000000')
-    #         else:
-    #             self.lat_text_1 = self.somatotipo_plot.axes.text(self.data_lat_t_max, self.data_lat_max, f'{self.data_lat_max:.2f}', color='#E5E9F0')
-    #             self.lat_text_2 = self.somatotipo_plot.axes.text(self.data_lat_t_min, self.data_lat_min, f'{self.data_lat_min:.2f}', color='#E5E9F0')
-        self.somatotipo_plot.draw()
-
-        self.opciones_card.apply_styleSheet(state)
-        self.opciones_plot_label.apply_styleSheet(state)
-        self.regiones_chip.apply_styleSheet(state)
-        self.presion_pico_local_chip.apply_styleSheet(state)
-        self.baricentros_chip.apply_styleSheet(state)
-        self.distribucion_chip.apply_styleSheet(state)
-        self.opciones_results_label.apply_styleSheet(state)
-        self.picos_button.apply_styleSheet(state)
-        self.means_button.apply_styleSheet(state)
-        self.areas_button.apply_styleSheet(state)
-
-        self.globales_card.apply_styleSheet(state)
-        self.presion_total_label.apply_styleSheet(state)
-        self.presion_total_value.apply_styleSheet(state)
-        self.presion_total_percent.apply_styleSheet(state)
-        self.presion_left_label.apply_styleSheet(state)
-        self.presion_left_value.apply_styleSheet(state)
-        self.presion_left_percent.apply_styleSheet(state)
-        self.presion_right_label.apply_styleSheet(state)
-        self.presion_right_value.apply_styleSheet(state)
-        self.presion_right_percent.apply_styleSheet(state)
-        self.presion_antepie_label.apply_styleSheet(state)
-        self.presion_antepie_value.apply_styleSheet(state)
-        self.presion_antepie_percent.apply_styleSheet(state)
-        self.presion_retropie_label.apply_styleSheet(state)
-        self.presion_retropie_value.apply_styleSheet(state)
-        self.presion_retropie_percent.apply_styleSheet(state)
-     
-        self.regiones_card.apply_styleSheet(state)
-        self.talon_interno_label.apply_styleSheet(state)
-        self.talon_externo_label.apply_styleSheet(state)
-        self.left_talon_interno_value.apply_styleSheet(state)
-        self.right_talon_interno_value.apply_styleSheet(state)
-        self.left_talon_externo_value.apply_styleSheet(state)
-        self.right_talon_externo_value.apply_styleSheet(state)
-        self.mediopie_interno_label.apply_styleSheet(state)
-        self.mediopie_externo_label.apply_styleSheet(state)
-        self.left_mediopie_interno_value.apply_styleSheet(state)
-        self.right_mediopie_interno_value.apply_styleSheet(state)
-        self.left_mediopie_externo_value.apply_styleSheet(state)
-        self.right_mediopie_externo_value.apply_styleSheet(state)
-        self.metatarsiano_1_label.apply_styleSheet(state)
-        self.metatarsiano_2_label.apply_styleSheet(state)
-        self.left_metatarsiano_1_value.apply_styleSheet(state)
-        self.right_metatarsiano_1_value.apply_styleSheet(state)
-        self.left_metatarsiano_2_value.apply_styleSheet(state)
-        self.right_metatarsiano_2_value.apply_styleSheet(state)
-        self.metatarsiano_3_label.apply_styleSheet(state)
-        self.metatarsiano_4_label.apply_styleSheet(state)
-        self.left_metatarsiano_3_value.apply_styleSheet(state)
-        self.right_metatarsiano_3_value.apply_styleSheet(state)
-        self.left_metatarsiano_4_value.apply_styleSheet(state)
-        self.right_metatarsiano_4_value.apply_styleSheet(state)
-        self.metatarsiano_5_label.apply_styleSheet(state)
-        self.dedo_1_label.apply_styleSheet(state)
-        self.left_metatarsiano_5_value.apply_styleSheet(state)
-        self.right_metatarsiano_5_value.apply_styleSheet(state)
-        self.left_dedo_1_value.apply_styleSheet(state)
-        self.right_dedo_1_value.apply_styleSheet(state)
-        self.dedo_2_label.apply_styleSheet(state)
-        self.dedo_3_5_label.apply_styleSheet(state)
-        self.left_dedo_2_value.apply_styleSheet(state)
-        self.right_dedo_2_value.apply_styleSheet(state)
-        self.left_dedo_3_5_value.apply_styleSheet(state)
-        self.right_dedo_3_5_value.apply_styleSheet(state)
 
-        self.left_talon_interno_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_talon_interno_value.setStyleSheet(f'QLabel#{self.left_talon_interno_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_talon_interno_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_talon_interno_value.setStyleSheet(f'QLabel#{self.right_talon_interno_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_talon_externo_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_talon_externo_value.setStyleSheet(f'QLabel#{self.left_talon_externo_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_talon_externo_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_talon_externo_value.setStyleSheet(f'QLabel#{self.right_talon_externo_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_mediopie_interno_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_mediopie_interno_value.setStyleSheet(f'QLabel#{self.left_mediopie_interno_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_mediopie_interno_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_mediopie_interno_value.setStyleSheet(f'QLabel#{self.right_mediopie_interno_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_mediopie_externo_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_mediopie_externo_value.setStyleSheet(f'QLabel#{self.left_mediopie_externo_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_mediopie_externo_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_mediopie_externo_value.setStyleSheet(f'QLabel#{self.right_mediopie_externo_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_metatarsiano_1_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_metatarsiano_1_value.setStyleSheet(f'QLabel#{self.left_metatarsiano_1_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_metatarsiano_1_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_metatarsiano_1_value.setStyleSheet(f'QLabel#{self.right_metatarsiano_1_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_metatarsiano_2_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_metatarsiano_2_value.setStyleSheet(f'QLabel#{self.left_metatarsiano_2_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_metatarsiano_2_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_metatarsiano_2_value.setStyleSheet(f'QLabel#{self.right_metatarsiano_2_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_metatarsiano_3_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_metatarsiano_3_value.setStyleSheet(f'QLabel#{self.left_metatarsiano_3_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_metatarsiano_3_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_metatarsiano_3_value.setStyleSheet(f'QLabel#{self.right_metatarsiano_3_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_metatarsiano_4_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_metatarsiano_4_value.setStyleSheet(f'QLabel#{self.left_metatarsiano_4_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_metatarsiano_4_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_metatarsiano_4_value.setStyleSheet(f'QLabel#{self.right_metatarsiano_4_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_metatarsiano_5_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_metatarsiano_5_value.setStyleSheet(f'QLabel#{self.left_metatarsiano_5_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_metatarsiano_5_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_metatarsiano_5_value.setStyleSheet(f'QLabel#{self.right_metatarsiano_5_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_dedo_1_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_dedo_1_value.setStyleSheet(f'QLabel#{self.left_dedo_1_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_dedo_1_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_dedo_1_value.setStyleSheet(f'QLabel#{self.right_dedo_1_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_dedo_2_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_dedo_2_value.setStyleSheet(f'QLabel#{self.left_dedo_2_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_dedo_2_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_dedo_2_value.setStyleSheet(f'QLabel#{self.right_dedo_2_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
-        self.left_dedo_3_5_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.left_dedo_3_5_value.setStyleSheet(f'QLabel#{self.left_dedo_3_5_value.name} {{'
-            f'border: 2px solid #FF0000; border-radius: 16 }}')
-        self.right_dedo_3_5_value.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.right_dedo_3_5_value.setStyleSheet(f'QLabel#{self.right_dedo_3_5_value.name} {{'
-            f'border: 2px solid #0000FF; border-radius: 16 }}')
+        if self.somatotipo_plot: self.somatotipo_plot.apply_styleSheet(state)
 
         self.settings.setValue('theme', f'{state}')
         self.theme_value = eval(self.settings.value('theme'))
@@ -797,22 +619,14 @@ class App(QWidget):
         self.db_info.exec()
         
         if self.db_info.database_data:
-            self.patientes_list = backend.create_db('pacientes')
-            self.estudios_list = backend.create_db('estudios')
-
-            for data in self.patientes_list:
-                self.pacientes_menu.addItem(str(data[4]))
-            self.pacientes_menu.setCurrentIndex(-1)
-
-            self.pacientes_menu.setEnabled(True)
-            self.paciente_add_button.setEnabled(True)
-            self.paciente_edit_button.setEnabled(True)
-            self.paciente_del_button.setEnabled(True)
-
-            if self.language_value == 0:
-                QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Base de datos configurada')
-            elif self.language_value == 1:
-                QtWidgets.QMessageBox.information(self, 'Data Saved', 'Database configured')
+            # Pending writes still go to the previous database
+            self.tasks.cancel_all()
+            self.pacientes_model.tasks.cancel_all()
+            self.tasks.wait()
+            self.pacientes_model.tasks.wait()
+            backend.close_pool()
+            self.tasks.start('database', self.create_tables,
+                on_finished=self.on_database_configured, on_failed=self.on_database_failed)
         else:
             if self.language_value == 0:
                 QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se dio información de la base de datos')
@@ -820,6 +634,16 @@ class App(QWidget):
                 QtWidgets.QMessageBox.critical(self, 'Data Error', 'No information on the database was given')
 
 
+    def on_database_configured(self, result=None) -> None:
+        """ Reload the patients menu after configuring the database """
+        self.on_database_ready()
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Base de datos configurada')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Database configured')
+
+
     def on_manual_button_clicked(self) -> None:
         """ Manual button to open manual window """
         return 0
@@ -831,6 +655,16 @@ class App(QWidget):
         self.about.exec()
 
 
+    def on_diagnostics_shortcut_activated(self) -> None:
+        """ Hidden diagnostics panel, measuring starts when it is first opened """
+        if not backend.instrumentation.enabled:
+            backend.instrumentation.enable()
+        if self.diagnostics is None:
+            self.diagnostics = backend.DiagnosticsDialog()
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+
+
     def on_aboutQt_button_clicked(self) -> None:
         """ About Qt button to open about Qt window dialog """
         backend.about_qt_dialog(self, self.language_value)
@@ -849,10 +683,12 @@ class App(QWidget):
         self.manual_button.move(width - 136, 8)
         self.about_button.move(width - 96, 8)
         self.aboutQt_button.move(width - 56, 8)
+        self.busy_bar.resize(width - 32, 4)
 
         self.presion_plot_card.setGeometry(196, 64, width - 636, int(height - 248))
         self.presion_plot_card.title.resize(width - 652, 32)
-        self.somatotipo_plot.setGeometry(8, 48, self.presion_plot_card.width()-16, self.presion_plot_card.height()-56)
+        if self.somatotipo_plot:
+            self.somatotipo_plot.setGeometry(8, 48, self.presion_plot_card.width()-16, self.presion_plot_card.height()-56)
        
         self.opciones_card.setGeometry(196, self.presion_plot_card.height()+72, width - 636, 168)
         self.globales_card.setGeometry(width - 432, 64, 424, 216)
@@ -861,9 +697,112 @@ class App(QWidget):
 
         return super().resizeEvent(a0)
 
+    # ----------------
+    # Funciones Tareas
+    # ----------------
+    def on_tasks_busy_changed(self, busy: bool) -> None:
+        """ Show the progress bar while any background task is running """
+        busy = self.tasks.is_busy() or self.pacientes_model.tasks.is_busy()
+        self.busy_bar.setVisible(busy)
+        if busy: self.setCursor(Qt.CursorShape.BusyCursor)
+        else: self.unsetCursor()
+
+
+    def on_task_failed(self, err: Exception) -> None:
+        """ Present the error of a failed background task
+        
+        Parameters
+        ----------
+        err: Exception
+            Exception raised by the task
+        
+        Returns
+        -------
+        None
+        """
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.critical(self, 'Error de Base de Datos', f'{err}')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.critical(self, 'Database Error', f'{err}')
+
+
+    @staticmethod
+    def create_tables() -> None:
+        """ Create the database tables, run in a background task """
+        backend.create_db('pacientes')
+        backend.create_db('estudios')
+
+
+    def on_database_ready(self, result=None) -> None:
+        """ Enable patient controls and load the patients menu once the database is ready """
+        self.pacientes_model.refresh()
+        self.pacientes_menu.setCurrentIndex(-1)
+
+        self.pacientes_menu.setEnabled(True)
+        self.paciente_add_button.setEnabled(True)
+        self.paciente_edit_button.setEnabled(True)
+        self.paciente_del_button.setEnabled(True)
+
+
+    def on_database_failed(self, err: Exception) -> None:
+        """ Disable patient controls when the database is not available """
+        self.pacientes_menu.setEnabled(False)
+        self.paciente_add_button.setEnabled(False)
+        self.paciente_edit_button.setEnabled(False)
+        self.paciente_del_button.setEnabled(False)
+        
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.critical(self, 'Error de Base de Datos', 'La base de datos no está configurada')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.critical(self, 'Database Error', 'Database not configured')
+
+
+    def cancel_study_tasks(self) -> None:
+        """ Drop pending study loads when the active patient changes, writes are not cancelled """
+        self.tasks.cancel('estudio')
+
     # ------------------
     # Funciones Paciente
     # ------------------
+    def pacientes_menu_insert(self, patient_row: tuple) -> None:
+        """ Add a patient row to the patients menu and select it """
+        self.pacientes_menu.setCurrentIndex(self.pacientes_model.insert_patient(patient_row))
+
+
+    def pacientes_menu_update(self, patient_id: str, patient_row: tuple) -> None:
+        """ Replace the text of a patient in the patients menu """
+        self.pacientes_model.update_patient(patient_id, patient_row)
+        self.pacientes_menu.setCurrentIndex(-1)
+
+
+    def pacientes_menu_remove(self, patient_id: str) -> None:
+        """ Remove a patient from the patients menu """
+        self.pacientes_model.remove_patient(patient_id)
+        self.pacientes_menu.setCurrentIndex(-1)
+
+
+    def on_pacientes_menu_textEdited(self, search_text: str) -> None:
+        """ Keep the typed text and restart the search delay """
+        self.pacientes_search_text = search_text
+        self.pacientes_search_timer.start()
+
+
+    def on_pacientes_search_timer_timeout(self) -> None:
+        """ Search patients by id number or last name prefix while typing """
+        search_text = self.pacientes_menu.lineEdit().text()
+        self.pacientes_model.refresh(search_text)
+        self.pacientes_menu.setCurrentIndex(-1)
+        self.pacientes_menu.lineEdit().setText(search_text)
+
+
+    def on_pacientes_model_refreshed(self, search_text: str) -> None:
+        """ Keep the typed text and show the matching patients once the first page arrives """
+        self.pacientes_menu.setCurrentIndex(-1)
+        self.pacientes_menu.lineEdit().setText(self.pacientes_search_text)
+        if search_text and self.pacientes_model.rowCount():
+            self.pacientes_menu.showPopup()
+
+
     def on_paciente_add_button_clicked(self) -> None:
         """ Add patient button to the database """
         self.patient_window = patient.Patient()
@@ -887,21 +826,14 @@ class App(QWidget):
             # -------------
             # Base de datos
             # -------------
-            self.patientes_list = backend.add_db('pacientes', self.patient_window.patient_data)
-            
-            self.pacientes_menu.clear()
-            for data in self.patientes_list:
-                self.pacientes_menu.addItem(str(data[4]))
-            self.pacientes_menu.setCurrentIndex(len(self.patientes_list)-1)
-
-            self.analisis_add_button.setEnabled(True)
-            self.analisis_del_button.setEnabled(True)
-            self.analisis_menu.setEnabled(True)
-
-            if self.language_value == 0:
-                QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente agregado a la base de datos')
-            elif self.language_value == 1:
-                QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient added to database')
+            self.tasks.cancel('paciente')
+            self.cancel_study_tasks()
+            self.estudios_list = []
+            self.analisis_menu.clear()
+            self.clear_results()
+
+            self.tasks.start('paciente_write', backend.add_db, 'pacientes', self.patient_window.patient_data,
+                on_finished=self.on_paciente_added, on_failed=self.on_task_failed, cancellable=False)
         else:
             if self.language_value == 0:
                 QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se dio información de un paciente nuevo')
@@ -909,72 +841,28 @@ class App(QWidget):
                 QtWidgets.QMessageBox.critical(self, 'Data Error', 'No information on a new patient was given')
 
 
+    def on_paciente_added(self, added_rows: list) -> None:
+        """ Select the added patient once it is saved in the database """
+        self.pacientes_menu_insert(added_rows[0])
+
+        self.analisis_add_button.setEnabled(True)
+        self.analisis_del_button.setEnabled(True)
+        self.analisis_menu.setEnabled(True)
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente agregado a la base de datos')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient added to database')
+
+
     def on_paciente_edit_button_clicked(self) -> None:
         """ Edit patient button in the database """
-        patient_id = self.pacientes_menu.currentText()
-
-        if patient_id != '':
-            patient_data = backend.get_db('pacientes', patient_id)
-
-            id_db = patient_data[0][0]
-            self.patient_window = patient.Patient()
-            self.patient_window.apellido_text.text_field.setText(patient_data[0][1])
-            self.patient_window.nombre_text.text_field.setText(patient_data[0][2])
-            if patient_data[0][3] == 'CC':
-                self.patient_window.cc_button.set_state(True)
-            elif patient_data[0][3] == 'TI':
-                self.patient_window.ti_button.set_state(True)
-            self.patient_window.id_text.text_field.setText(str(patient_data[0][4]))
-            self.patient_window.fecha_date.text_field.setDate(QtCore.QDate.fromString(patient_data[0][5], 'dd/MM/yyyy'))
-            if patient_data[0][6] == 'F':
-                self.patient_window.f_button.set_state(True)
-            elif patient_data[0][6] == 'M':
-                self.patient_window.m_button.set_state(True)
-            self.patient_window.peso_text.text_field.setText(str(patient_data[0][7]))
-            if patient_data[0][8] == 'Kg':
-                self.patient_window.kg_button.set_state(True)
-            elif patient_data[0][8] == 'Lb':
-                self.patient_window.lb_button.set_state(True)
-            self.patient_window.altura_text.text_field.setText(str(patient_data[0][9]))
-            if patient_data[0][10] == 'm':
-                self.patient_window.mt_button.set_state(True)
-            elif patient_data[0][10] == 'ft - in':
-                self.patient_window.fi_button.set_state(True)
-            self.patient_window.bmi_value_label.setText(str(patient_data[0][11]))
-
-            self.patient_window.exec()
-
-            if self.patient_window.patient_data:
-                self.patientes_list = backend.edit_db('pacientes', id_db, self.patient_window.patient_data)
-
-                self.pacientes_menu.clear()
-                for data in self.patientes_list:
-                    self.pacientes_menu.addItem(str(data[4]))
-                self.pacientes_menu.setCurrentIndex(-1)
-
-                self.analisis_add_button.setEnabled(False)
-                self.analisis_del_button.setEnabled(False)
-                self.analisis_menu.setEnabled(False)
-
-                self.apellido_value.setText('')
-                self.nombre_value.setText('')
-                self.id_value.setText('')
-                self.fecha_value.setText('')
-                self.sex_value.setText('')
-                self.sex_label.set_icon('', self.theme_value)
-                self.peso_value.setText('')
-                self.altura_value.setText('')
-                self.bmi_value.setText('')
-
-                if self.language_value == 0:
-                    QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente editado en la base de datos')
-                elif self.language_value == 1:
-                    QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient edited in database')
-            else:
-                if self.language_value == 0:
-                    QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se dio información del paciente')
-                elif self.language_value == 1:
-                    QtWidgets.QMessageBox.critical(self, 'Data Error', 'No information on a patient was given')
+        patient_id = self.pacientes_menu.currentData(QtCore.Qt.ItemDataRole.UserRole)
+
+        if patient_id is not None:
+            self.tasks.start('paciente', backend.get_db, 'pacientes', patient_id,
+                on_finished=lambda patient_data: self.on_paciente_edit_loaded(patient_id, patient_data),
+                on_failed=self.on_task_failed)
         else:
             if self.language_value == 0:
                 QtWidgets.QMessageBox.critical(self, 'Error de Paciente', 'No se seleccionó un paciente')
@@ -982,36 +870,96 @@ class App(QWidget):
                 QtWidgets.QMessageBox.critical(self, 'Patient Error', 'No patient selected')
 
 
-    def on_paciente_del_button_clicked(self) -> None:
-        """ Delete patient button from the database """
-        patient_id = self.pacientes_menu.currentText()
-
-        if patient_id != '':
-            self.patientes_list = backend.delete_db('pacientes', patient_id)
+    def on_paciente_edit_loaded(self, patient_id: str, patient_data: list) -> None:
+        """ Open the patient window with the loaded patient data and save the changes
+        
+        Parameters
+        ----------
+        patient_id: str
+            Patient id number in the patients menu
+        patient_data: list
+            Patient rows from the database
+        
+        Returns
+        -------
+        None
+        """
+        if not patient_data:
+            return
 
-            self.pacientes_menu.clear()
-            for data in self.patientes_list:
-                self.pacientes_menu.addItem(str(data[4]))
-            self.pacientes_menu.setCurrentIndex(-1)
+        id_db = patient_data[0][0]
+        self.patient_window = patient.Patient()
+        self.patient_window.apellido_text.text_field.setText(patient_data[0][1])
+        self.patient_window.nombre_text.text_field.setText(patient_data[0][2])
+        if patient_data[0][3] == 'CC':
+            self.patient_window.cc_button.set_state(True)
+        elif patient_data[0][3] == 'TI':
+            self.patient_window.ti_button.set_state(True)
+        self.patient_window.id_text.text_field.setText(str(patient_data[0][4]))
+        self.patient_window.fecha_date.text_field.setDate(QtCore.QDate.fromString(patient_data[0][5], 'dd/MM/yyyy'))
+        if patient_data[0][6] == 'F':
+            self.patient_window.f_button.set_state(True)
+        elif patient_data[0][6] == 'M':
+            self.patient_window.m_button.set_state(True)
+        self.patient_window.peso_text.text_field.setText(str(patient_data[0][7]))
+        if patient_data[0][8] == 'Kg':
+            self.patient_window.kg_button.set_state(True)
+        elif patient_data[0][8] == 'Lb':
+            self.patient_window.lb_button.set_state(True)
+        self.patient_window.altura_text.text_field.setText(str(patient_data[0][9]))
+        if patient_data[0][10] == 'm':
+            self.patient_window.mt_button.set_state(True)
+        elif patient_data[0][10] == 'ft - in':
+            self.patient_window.fi_button.set_state(True)
+        self.patient_window.bmi_value_label.setText(str(patient_data[0][11]))
 
-            self.analisis_add_button.setEnabled(False)
-            self.analisis_del_button.setEnabled(False)
-            self.analisis_menu.setEnabled(False)
-
-            self.apellido_value.setText('')
-            self.nombre_value.setText('')
-            self.id_value.setText('')
-            self.fecha_value.setText('')
-            self.sex_value.setText('')
-            self.sex_label.set_icon('', self.theme_value)
-            self.peso_value.setText('')
-            self.altura_value.setText('')
-            self.bmi_value.setText('')
+        self.patient_window.exec()
 
+        if self.patient_window.patient_data:
+            self.tasks.start('paciente_write', backend.edit_db, 'pacientes', id_db, self.patient_window.patient_data,
+                on_finished=lambda edited_rows: self.on_paciente_edited(patient_id, edited_rows),
+                on_failed=self.on_task_failed, cancellable=False)
+        else:
             if self.language_value == 0:
-                QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente eliminado de la base de datos')
+                QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se dio información del paciente')
             elif self.language_value == 1:
-                QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient deleted from database')
+                QtWidgets.QMessageBox.critical(self, 'Data Error', 'No information on a patient was given')
+
+
+    def on_paciente_edited(self, patient_id: str, edited_rows: list) -> None:
+        """ Update the patients menu once the patient is edited in the database """
+        self.pacientes_menu_update(patient_id, edited_rows[0])
+        self.cancel_study_tasks()
+
+        self.analisis_add_button.setEnabled(False)
+        self.analisis_del_button.setEnabled(False)
+        self.analisis_menu.setEnabled(False)
+
+        self.apellido_value.setText('')
+        self.nombre_value.setText('')
+        self.id_value.setText('')
+        self.fecha_value.setText('')
+        self.sex_value.setText('')
+        self.sex_label.set_icon('', self.theme_value)
+        self.peso_value.setText('')
+        self.altura_value.setText('')
+        self.bmi_value.setText('')
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente editado en la base de datos')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient edited in database')
+
+
+    def on_paciente_del_button_clicked(self) -> None:
+        """ Delete patient button from the database """
+        patient_id = self.pacientes_menu.currentData(QtCore.Qt.ItemDataRole.UserRole)
+
+        if patient_id is not None:
+            self.tasks.cancel('paciente')
+            self.tasks.start('paciente_write', backend.delete_db, 'pacientes', patient_id,
+                on_finished=lambda deleted_rows: self.on_paciente_deleted(patient_id),
+                on_failed=self.on_task_failed, cancellable=False)
         else:
             if self.language_value == 0:
                 QtWidgets.QMessageBox.critical(self, 'Error de Paciente', 'No se seleccionó un paciente')
@@ -1019,6 +967,37 @@ class App(QWidget):
                 QtWidgets.QMessageBox.critical(self, 'Patient Error', 'No patient selected')
 
 
+    def on_paciente_deleted(self, patient_id: str) -> None:
+        """ Remove the patient from the patients menu once it is deleted from the database """
+        self.pacientes_menu_remove(patient_id)
+        self.cancel_study_tasks()
+
+        self.analisis_add_button.setEnabled(False)
+        self.analisis_del_button.setEnabled(False)
+        self.analisis_menu.setEnabled(False)
+
+        self.apellido_value.setText('')
+        self.nombre_value.setText('')
+        self.id_value.setText('')
+        self.fecha_value.setText('')
+        self.sex_value.setText('')
+        self.sex_label.set_icon('', self.theme_value)
+        self.peso_value.setText('')
+        self.altura_value.setText('')
+        self.bmi_value.setText('')
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Paciente eliminado de la base de datos')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Patient deleted from database')
+
+
+    def on_pacientes_menu_currentIndexChanged(self, index: int) -> None:
+        """ Studies can only be added to a patient selected in the patients menu """
+        if index < 0:
+            self.analisis_add_button.setEnabled(False)
+
+
     def on_pacientes_menu_textActivated(self, current_pacient: str) -> None:
         """ Change active patient and present previously saved studies and information
         
@@ -1031,7 +1010,29 @@ class App(QWidget):
         -------
         None
         """
-        patient_data = backend.get_db('pacientes', current_pacient)
+        if not current_pacient.isdigit():
+            return
+        self.pacientes_search_text = ''
+        self.cancel_study_tasks()
+        self.tasks.start('paciente', backend.get_paciente_estudios, current_pacient,
+            on_finished=self.on_paciente_loaded, on_failed=self.on_task_failed)
+
+
+    def on_paciente_loaded(self, loaded_data: tuple) -> None:
+        """ Present the loaded patient information and its saved studies
+        
+        Parameters
+        ----------
+        loaded_data: tuple
+            Patient rows and study rows from get_paciente_estudios
+        
+        Returns
+        -------
+        None
+        """
+        patient_data, self.estudios_list = loaded_data
+        if not patient_data:
+            return
 
         if patient_data[0][6] == 'F':
             self.sex_label.set_icon('woman', self.theme_value)
@@ -1051,15 +1052,105 @@ class App(QWidget):
         self.analisis_del_button.setEnabled(True)
         self.analisis_menu.setEnabled(True)
 
-        self.estudios_list = backend.get_db('estudios', current_pacient)
         self.analisis_menu.clear()
         for data in self.estudios_list:
             self.analisis_menu.addItem(data[2])
         self.analisis_menu.setCurrentIndex(-1)
 
-        # self.lateral_plot.axes.cla()
-        # self.lateral_plot.draw()
- 
+        self.clear_results()
+
+
+    # -----------------
+    # Funciones Estudio
+    # -----------------
+    def create_plot(self):
+        """ Create the pressure plot once the window is shown
+
+        matplotlib is imported here instead of at startup, so the window
+        appears before the plotting library is loaded.
+        """
+        if self.somatotipo_plot is None:
+            if self.plot_backend == 'qimage':
+                self.somatotipo_plot = backend.HeatmapView(self.presion_plot_card, self.theme_value)
+            else:
+                self.somatotipo_plot = backend.MPLCanvas(self.presion_plot_card, self.theme_value)
+            self.somatotipo_plot.setGeometry(8, 48, self.presion_plot_card.width()-16, self.presion_plot_card.height()-56)
+            self.somatotipo_plot.show()
+        return self.somatotipo_plot
+
+
+    def show_analysis(self, extracted_image, analysis_results: dict) -> None:
+        """ Plot pressure image and present analysis results
+        
+        Parameters
+        ----------
+        extracted_image: np.array
+            Pressure image from extract or from a saved study
+        analysis_results: dict
+            Analysis results from analisis or from a saved study
+        
+        Returns
+        -------
+        None
+        """
+        left_y = analysis_results['left_peak_pos'][0]
+        left_x = analysis_results['left_peak_pos'][1]
+
+        left_cop_x = analysis_results['left_cop'][0]
+        left_cop_y = analysis_results['left_cop'][1]
+        right_cop_x = analysis_results['right_cop'][0]
+        right_cop_y = analysis_results['right_cop'][1]
+        global_cop_x = analysis_results['global_cop'][0]
+        global_cop_y = analysis_results['global_cop'][1]
+
+        total_pressure = analysis_results['total_pressure']
+        left_pressure = analysis_results['left_pressure']
+        left_pressure_perc = analysis_results['left_pressure_perc']
+        right_pressure = analysis_results['right_pressure']
+        right_pressure_perc = analysis_results['right_pressure_perc']
+        forefoot_pressure = analysis_results['forefoot_pressure']
+        forefoot_pressure_perc = analysis_results['forefoot_pressure_perc']
+        rearfoot_pressure = analysis_results['rearfoot_pressure']
+        rearfoot_pressure_perc = analysis_results['rearfoot_pressure_perc']
+        
+        # ----------------
+        # Gráficas Señales
+        # ----------------
+        # Percentages at the middle of the plate edges, for any plate size
+        height, width = extracted_image.shape
+        middle_x = width // 2 - 1
+        middle_y = height // 2 + 1
+        self.create_plot().set_pressure(extracted_image, (left_x, left_y),
+            [(left_cop_x, left_cop_y), (right_cop_x, right_cop_y), (global_cop_x, global_cop_y)],
+            [(0, middle_y, f'{left_pressure_perc:.2f}%'), (width - 5, middle_y, f'{right_pressure_perc:.2f}%'),
+            (middle_x, 2, f'{forefoot_pressure_perc:.2f}%'), (middle_x, height - 2, f'{rearfoot_pressure_perc:.2f}%')])
+
+        # --------------------------
+        # Presentación de resultados
+        # --------------------------
+        self.presion_total_value.setText(f'{total_pressure}')
+        self.presion_total_percent.setText(f'100%')
+        
+        self.presion_left_value.setText(f'{left_pressure}')
+        self.presion_left_percent.setText(f'{left_pressure_perc:.2f}%')
+        self.presion_right_value.setText(f'{right_pressure}')
+        self.presion_right_percent.setText(f'{right_pressure_perc:.2f}%')
+
+        self.presion_antepie_value.setText(f'{forefoot_pressure}')
+        self.presion_antepie_percent.setText(f'{forefoot_pressure_perc:.2f}%')
+        self.presion_retropie_value.setText(f'{rearfoot_pressure}')
+        self.presion_retropie_percent.setText(f'{rearfoot_pressure_perc:.2f}%')
+
+        # Studies saved before the regional analysis have NaN regions
+        for side in ('left', 'right'):
+            for region, value in zip(backend.plantar_regions, analysis_results[f'{side}_regions']):
+                getattr(self, f'{side}_{region}_value').setText('' if math.isnan(value) else f'{value:.1f}')
+
+
+    def clear_results(self) -> None:
+        """ Clear pressure plot and analysis results """
+        if self.somatotipo_plot: self.somatotipo_plot.clear_pressure()
+
         self.presion_total_value.setText('')
         self.presion_total_percent.setText('')
         self.presion_left_value.setText('')
@@ -1097,11 +1188,16 @@ class App(QWidget):
         self.right_dedo_3_5_value.setText('')
 
 
-    # -----------------
-    # Funciones Estudio
-    # -----------------
     def on_analisis_add_button_clicked(self) -> None:
         """ Add analysis button to the database """
+        patient_id = self.pacientes_menu.currentData(QtCore.Qt.ItemDataRole.UserRole)
+        if patient_id is None:
+            if self.language_value == 0:
+                QtWidgets.QMessageBox.critical(self, 'Error de Paciente', 'No se seleccionó un paciente')
+            elif self.language_value == 1:
+                QtWidgets.QMessageBox.critical(self, 'Patient Error', 'No patient selected')
+            return
+
         selected_left_foot_file = QtWidgets.QFileDialog.getOpenFileName(None,
                 'Seleccione el archivo de datos del pie izquierdo', self.default_path,
                 'Archivos de Datos (*.apd)')[0]
@@ -1113,208 +1209,96 @@ class App(QWidget):
         if selected_left_foot_file and selected_right_foot_file:
             self.default_path = self.settings.setValue('default_path', str(Path(selected_left_foot_file).parent))
 
-            extracted_image, analysis_results = backend.extract(selected_left_foot_file, selected_right_foot_file)
-            left_y = analysis_results['left_peak_pos'][0]
-            left_x = analysis_results['left_peak_pos'][1]
-
-            left_cop_x = analysis_results['left_cop'][0]
-            left_cop_y = analysis_results['left_cop'][1]
-            right_cop_x = analysis_results['right_cop'][0]
-            right_cop_y = analysis_results['right_cop'][1]
-            global_cop_x = analysis_results['global_cop'][0]
-            global_cop_y = analysis_results['global_cop'][1]
-
-            total_pressure = analysis_results['total_pressure']
-            left_pressure = analysis_results['left_pressure']
-            left_pressure_perc = analysis_results['left_pressure_perc']
-            right_pressure = analysis_results['right_pressure']
-            right_pressure_perc = analysis_results['right_pressure_perc']
-            forefoot_pressure = analysis_results['forefoot_pressure']
-            forefoot_pressure_perc = analysis_results['forefoot_pressure_perc']
-            rearfoot_pressure = analysis_results['rearfoot_pressure']
-            rearfoot_pressure_perc = analysis_results['rearfoot_pressure_perc']
-            
-            # ----------------
-            # Gráficas Señales
-            # ----------------
-            self.somatotipo_plot.axes.cla()
-            self.somatotipo_plot.fig.subplots_adjust(left=0.05, bottom=0.15, right=1, top=0.95, wspace=0, hspace=0)
-            cmap = matplotlib.cm.get_cmap("jet").copy()
-            cmap.set_under('w')
-            self.somatotipo_plot.axes.imshow(extracted_image, cmap=cmap)
-            self.somatotipo_plot.axes.plot(left_x, left_y, marker="o", markersize=3, markeredgecolor='#FF2D55', markerfacecolor='#FF2D55')
-            self.somatotipo_plot.axes.plot(left_cop_x, left_cop_y, marker="o", markersize=3, markeredgecolor='#FFFFFF', markerfacecolor='#FFFFFF')
-            self.somatotipo_plot.axes.plot(right_cop_x, right_cop_y, marker="o", markersize=3, markeredgecolor='#FFFFFF', markerfacecolor='#FFFFFF')
-            self.somatotipo_plot.axes.plot(global_cop_x, global_cop_y, marker="o", markersize=3, markeredgecolor='#FFFFFF', markerfacecolor='#FFFFFF')
-        
-            # if self.theme_value:
-            self.lat_text_1 = self.somatotipo_plot.axes.text(0, 25, f'{left_pressure_perc:.2f}%', color='#FFFFFF')
-            self.lat_text_2 = self.somatotipo_plot.axes.text(43, 25, f'{right_pressure_perc:.2f}%', color='#FFFFFF')
-            self.lat_text_1 = self.somatotipo_plot.axes.text(23, 2, f'{forefoot_pressure_perc:.2f}%', color='#FFFFFF')
-            self.lat_text_2 = self.somatotipo_plot.axes.text(23, 46, f'{rearfoot_pressure_perc:.2f}%', color='#FFFFFF')
-            # else:
-            #     self.lat_text_1 = self.lateral_plot.axes.text(self.data_lat_t_max, self.data_lat_max, f'{self.data_lat_max:.2f}', color='#E5E9F0')
-            #     self.lat_text_2 = self.lateral_plot.axes.text(self.data_lat_t_min, self.data_lat_min, f'{self.data_lat_min:.2f}', color='#E5E9F0')
-            self.somatotipo_plot.draw()
-
-            # --------------------------
-            # Presentación de resultados
-            # --------------------------
-            self.presion_total_value.setText(f'{total_pressure}')
-            self.presion_total_percent.setText(f'100%')
-            
-            self.presion_left_value.setText(f'{left_pressure}')
-            self.presion_left_percent.setText(f'{left_pressure_perc:.2f}%')
-            self.presion_right_value.setText(f'{right_pressure}')
-            self.presion_right_percent.setText(f'{right_pressure_perc:.2f}%')
-
-            self.presion_antepie_value.setText(f'{forefoot_pressure}')
-            self.presion_antepie_percent.setText(f'{forefoot_pressure_perc:.2f}%')
-            self.presion_retropie_value.setText(f'{rearfoot_pressure}')
-            self.presion_retropie_percent.setText(f'{rearfoot_pressure_perc:.2f}%')
-
-
-
-    #         # -------------
-    #         # Base de datos
-    #         # -------------
-    #         study_data = {
-    #             'id_number': self.pacientes_menu.currentText(),
-    #             'file_name': Path(selected_file).name,
-    #             'file_path': selected_file
-    #             }
-    #         self.estudios_list = backend.add_db('estudios', study_data)
-            
-    #         self.analisis_menu.clear()
-    #         for data in self.estudios_list:
-    #             self.analisis_menu.addItem(data[2])
-    #         self.analisis_menu.setCurrentIndex(len(self.patientes_list)-1)
-
-    #         if self.language_value == 0:
-    #             QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Estudio agregado a la base de datos')
-    #         elif self.language_value == 1:
-    #             QtWidgets.QMessageBox.information(self, 'Data Saved', 'Study added to database')
-    #     else:
-    #         if self.language_value == 0:
-    #             QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se seleccióno un archivo para el estudio')
-    #         elif self.language_value == 1:
-    #             QtWidgets.QMessageBox.critical(self, 'Data Error', 'No file for a study was given')
-
-
-    # def on_analisis_del_button_clicked(self) -> None:
-    #     """ Delete analysis button from the database """
-    #     current_study = self.analisis_menu.currentText()
-
-    #     if current_study != '':
-    #         self.estudios_list = backend.delete_db('estudios', current_study)
-            
-    #         self.analisis_menu.clear()
-    #         for data in self.estudios_list:
-    #             self.analisis_menu.addItem(data[2])
-    #         self.analisis_menu.setCurrentIndex(-1)
-
-    #         self.lateral_plot.axes.cla()
-    #         self.lateral_plot.draw()
-    #         self.antePost_plot.axes.cla()
-    #         self.antePost_plot.draw()
-    #         self.elipse_plot.axes.cla()
-    #         self.elipse_plot.draw()
-    #         self.hull_plot.axes.cla()
-    #         self.hull_plot.draw()
-    #         self.pca_plot.axes.cla()
-    #         self.pca_plot.draw()
-
-    #         self.lat_rango_value.setText('')
-    #         self.lat_vel_value.setText('')
-    #         self.lat_rms_value.setText('')
-    #         self.ap_rango_value.setText('')
-    #         self.ap_vel_value.setText('')
-    #         self.ap_rms_value.setText('')
-    #         self.cop_vel_value.setText('')
-    #         self.distancia_value.setText('')
-    #         self.frecuencia_value.setText('')
-    #         self.elipse_value.setText('')
-    #         self.hull_value.setText('')
-    #         self.pca_value.setText('')
-
-    #         if self.language_value == 0:
-    #             QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Análisis eliminado de la base de datos')
-    #         elif self.language_value == 1:
-    #             QtWidgets.QMessageBox.information(self, 'Data Saved', 'Analysis deleted from database')
-    #     else:
-    #         if self.language_value == 0:
-    #             QtWidgets.QMessageBox.critical(self, 'Error de Análisis', 'No se seleccionó un análisis')
-    #         elif self.language_value == 1:
-    #             QtWidgets.QMessageBox.critical(self, 'Analysis Error', 'No analysis selected')
-
-
-    # def on_analisis_menu_textActivated(self, current_study: str):
-    #     """ Change analysis and present results
+            study_name = f'{Path(selected_left_foot_file).name} - {Path(selected_right_foot_file).name}'
+            self.tasks.cancel('estudio')
+            self.tasks.start('estudio_write', backend.add_study, selected_left_foot_file, selected_right_foot_file,
+                patient_id, study_name,
+                on_finished=self.on_estudio_added, on_failed=self.on_task_failed, cancellable=False)
+        else:
+            if self.language_value == 0:
+                QtWidgets.QMessageBox.critical(self, 'Error de Datos', 'No se seleccióno un archivo para el estudio')
+            elif self.language_value == 1:
+                QtWidgets.QMessageBox.critical(self, 'Data Error', 'No file for a study was given')
+
+
+    def on_estudio_added(self, added_study: tuple) -> None:
+        """ Present the analyzed study once it is saved in the database
         
-    #     Parameters
-    #     ----------
-    #     current_study: str
-    #         Current study text
+        Parameters
+        ----------
+        added_study: tuple
+            Pressure image, analysis results and study rows from add_study
         
-    #     Returns
-    #     -------
-    #     None
-    #     """
-    #     analisis_data = backend.get_db('estudios', self.pacientes_menu.currentText())
-    #     study_path = [item for item in analisis_data if item[2] == current_study][0][3]
+        Returns
+        -------
+        None
+        """
+        extracted_image, analysis_results, added_rows = added_study
+        # The active patient may have changed while the study was saved
+        if added_rows[0][1] == self.pacientes_menu.currentData(QtCore.Qt.ItemDataRole.UserRole):
+            self.show_analysis(extracted_image, analysis_results)
+
+            self.estudios_list.append(added_rows[0])
+            self.analisis_menu.addItem(added_rows[0][2])
+            self.analisis_menu.setCurrentIndex(self.analisis_menu.count()-1)
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Estudio agregado a la base de datos')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Study added to database')
+
+
+    def on_analisis_del_button_clicked(self) -> None:
+        """ Delete analysis button from the database """
+        current_index = self.analisis_menu.currentIndex()
 
-    #     df = pd.read_csv(study_path, sep='\t', skiprows=43, encoding='ISO-8859-1')
+        if current_index >= 0:
+            study_id = self.estudios_list[current_index][0]
+            self.tasks.cancel('estudio')
+            self.tasks.start('estudio_write', backend.delete_db, 'estudios', study_id,
+                on_finished=lambda deleted_rows: self.on_estudio_deleted(study_id),
+                on_failed=self.on_task_failed, cancellable=False)
+        else:
+            if self.language_value == 0:
+                QtWidgets.QMessageBox.critical(self, 'Error de Análisis', 'No se seleccionó un análisis')
+            elif self.language_value == 1:
+                QtWidgets.QMessageBox.critical(self, 'Analysis Error', 'No analysis selected')
+
+
+    def on_estudio_deleted(self, study_id: int) -> None:
+        """ Remove the study from the studies menu once it is deleted from the database """
+        # The study is not listed if the active patient changed meanwhile
+        study_ids = [data[0] for data in self.estudios_list]
+        if study_id in study_ids:
+            current_index = study_ids.index(study_id)
+            del self.estudios_list[current_index]
+            self.analisis_menu.removeItem(current_index)
+            self.analisis_menu.setCurrentIndex(-1)
+
+            self.clear_results()
+
+        if self.language_value == 0:
+            QtWidgets.QMessageBox.information(self, 'Datos Guardados', 'Análisis eliminado de la base de datos')
+        elif self.language_value == 1:
+            QtWidgets.QMessageBox.information(self, 'Data Saved', 'Analysis deleted from database')
 
-    #     results = backend.analisis(df)
+
+    def on_analisis_menu_textActivated(self, current_study: str) -> None:
+        """ Change analysis and present saved results
+        
+        Parameters
+        ----------
+        current_study: str
+            Current study text
         
-    #     # ----------------
-    #     # Gráficas Señales
-    #     # ----------------
-    #     data_lat = results['data_x']
-    #     data_ap = results['data_y']
-    #     data_t = results['data_t']
-
-    #     self.data_lat_max = results['lat_max']
-    #     self.data_lat_t_max = results['lat_t_max']
-    #     self.data_lat_min = results['lat_min']
-    #     self.data_lat_t_min = results['lat_t_min']
-
-    #     self.lateral_plot.axes.cla()
-    #     self.lateral_plot.fig.subplots_adjust(left=0.05, bottom=0.1, right=1, top=0.95, wspace=0, hspace=0)
-    #     self.lateral_plot.axes.plot(data_t, data_lat, '#42A4F5')
-    #     self.lateral_plot.axes.plot(self.data_lat_t_max, self.data_lat_max, marker="o", markersize=3, markeredgecolor='#FF2D55', markerfacecolor='#FF2D55')
-    #     self.lateral_plot.axes.plot(self.data_lat_t_min, self.data_lat_min, marker="o", markersize=3, markeredgecolor='#FF2D55', markerfacecolor='#FF2D55')
-    #     if self.theme_value:
-    #         self.lat_text_1 = self.lateral_plot.axes.text(self.data_lat_t_max, self.data_lat_max, f'{self.data_lat_max:.2f}', color='#000000')
-    #         self.lat_text_2 = self.lateral_plot.axes.text(self.data_lat_t_min, self.data_lat_min, f'{self.data_lat_min:.2f}', color='#000000')
-    #     else:
-    #         self.lat_text_1 = self.lateral_plot.axes.text(self.data_lat_t_max, self.data_lat_max, f'{self.data_lat_max:.2f}', color='#E5E9F0')
-    #         self.lat_text_2 = self.lateral_plot.axes.text(self.data_lat_t_min, self.data_lat_min, f'{self.data_lat_min:.2f}', color='#E5E9F0')
-    #     self.lateral_plot.draw()
-
-    #     self.data_ap_max = results['ap_max']
-    #     self.data_ap_t_max = results['ap_t_max']
-    #     self.data_ap_min = results['ap_min']
-    #     self.data_ap_t_min = results['ap_t_min']
-
-    #     # --------------------------
-    #     # Presentación de resultados
-    #     # --------------------------
-    #     self.lat_rango_value.setText(f'{results["lat_rango"]:.2f}')
-    #     self.lat_vel_value.setText(f'{results["lat_vel"]:.2f}')
-    #     self.lat_rms_value.setText(f'{results["lat_rms"]:.2f}')
-
-    #     self.ap_rango_value.setText(f'{results["ap_rango"]:.2f}')
-    #     self.ap_vel_value.setText(f'{results["ap_vel"]:.2f}')
-    #     self.ap_rms_value.setText(f'{results["ap_rms"]:.2f}')
-
-    #     self.cop_vel_value.setText(f'{results["centro_vel"]:.2f}')
-    #     self.distancia_value.setText(f'{results["centro_dist"]:.2f}')
-    #     self.frecuencia_value.setText(f'{results["centro_frec"]:.2f}')
-
-    #     self.elipse_value.setText(f'{data_elipse["area"]:.2f}')
-    #     self.hull_value.setText(f'{data_convex["area"]:.2f}')
-    #     self.pca_value.setText(f'{data_pca["area"]:.2f}')
+        Returns
+        -------
+        None
+        """
+        study_id = self.estudios_list[self.analisis_menu.currentIndex()][0]
+        self.tasks.start('estudio', backend.load_study, study_id,
+            on_finished=lambda loaded_study: self.show_analysis(*loaded_study),
+            on_failed=self.on_task_failed)
 
 
 if __name__=="__main__":
@@ -0,0 +1,211 @@
+"""
+Heatmap View
+
+This file contains the matplotlib-free pressure map widget and its color
+lookup tables. It is imported by backend on first use of
+backend.HeatmapView, so the widget code is only loaded when it is used.
+"""
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+import numpy as np
+
+from backend import light, dark, instrumentation, IntegralImage
+
+
+jet_segments = {
+    'red': ((0.0, 0.0), (0.35, 0.0), (0.66, 1.0), (0.89, 1.0), (1.0, 0.5)),
+    'green': ((0.0, 0.0), (0.125, 0.0), (0.375, 1.0), (0.64, 1.0), (0.91, 0.0), (1.0, 0.0)),
+    'blue': ((0.0, 0.5), (0.11, 1.0), (0.34, 1.0), (0.65, 0.0), (1.0, 0.0))
+}
+
+
+def color_lut(segments: dict = jet_segments, size: int = 256, under: int = None) -> np.ndarray:
+    """ Precompute an ARGB32 lookup table from piecewise linear color segments
+
+    Parameters
+    ----------
+    segments: dict
+        (x, value) points of the red, green and blue channels, same
+        format as the matplotlib segment data
+    size: int
+        Number of colors of the table
+    under: int
+        ARGB32 color of values below the minimum, stored at index size.
+        The first color by default, so negative values look like 0
+
+    Returns
+    -------
+    lut: np.array
+        uint32 table of size + 1 colors
+    """
+    x = np.linspace(0.0, 1.0, size)
+    r, g, b = ((np.interp(x, *zip(*segments[channel])) * 255).astype(np.uint32)
+        for channel in ('red', 'green', 'blue'))
+    lut = np.empty(size + 1, np.uint32)
+    lut[:size] = 0xFF000000 | (r << 16) | (g << 8) | b
+    lut[size] = lut[0] if under is None else under
+    return lut
+
+
+class HeatmapView(QtWidgets.QWidget):
+    def __init__(self, parent, theme: bool) -> None:
+        """ Pressure image widget drawn with QPainter
+
+        Same plotting interface as MPLCanvas without matplotlib. The
+        pressure image is mapped through a 256 color lookup table into a
+        uint32 buffer that a QImage wraps without copying, and it is
+        scaled with nearest neighbor to the widget size. Negative values
+        are drawn as 0.
+
+        Dragging with the left button selects a region of interest, whose
+        pressure sum and percentage of the total are drawn while dragging.
+        The sums are read from the integral image of the pressure, built
+        on the first selection of each image, so they take four lookups.
+
+        Parameters
+        ----------
+        parent: QWidget
+            Parent widget
+        theme: bool
+            App theme
+            True: Light theme, False: Dark theme
+
+        Returns
+        -------
+        None
+        """
+        super().__init__(parent)
+        self.lut = color_lut()
+        self.lut_size = len(self.lut) - 1
+        self.scaled = None
+        self.index = None
+        self.argb = None
+        self.image = None
+        self.peak = None
+        self.cops = []
+        self.texts = []
+        self.pressure_visible = False
+        self.pressure = None
+        self.integral = None
+        self.roi = None
+
+        self.apply_styleSheet(theme)
+
+    def apply_styleSheet(self, theme: bool) -> None:
+        if theme:
+            self.background_color = QtGui.QColor(light['surface'])
+        else:
+            self.background_color = QtGui.QColor(dark['surface'])
+        self.update()
+
+    def set_pressure(self, image: np.ndarray, peak: tuple, cops: list, texts: list) -> None:
+        """ Update the pressure image, markers and labels
+
+        Parameters
+        ----------
+        image: np.array
+            Pressure image, negative values are drawn as 0
+        peak: tuple
+            Peak pressure position (x, y)
+        cops: list
+            Centers of pressure [(x, y), ...]
+        texts: list
+            Labels [(x, y, text), ...]
+
+        Returns
+        -------
+        None
+        """
+        height, width = image.shape
+        if self.argb is None or self.argb.shape != image.shape:
+            self.scaled = np.empty(image.shape, np.float32)
+            self.index = np.empty(image.shape, np.intp)
+            self.argb = np.empty(image.shape, np.uint32)
+            self.image = QtGui.QImage(self.argb.data, width, height, width * 4,
+                QtGui.QImage.Format.Format_ARGB32)
+
+        vmax = float(np.max(image))
+        np.multiply(image, self.lut_size / vmax if vmax > 0 else 0.0, out=self.scaled)
+        np.minimum(self.scaled, self.lut_size - 1, out=self.scaled)
+        np.copyto(self.index, self.scaled, casting='unsafe')
+        np.putmask(self.index, image < 0, self.lut_size)
+        np.take(self.lut, self.index, out=self.argb)
+
+        self.peak = peak
+        self.cops = cops
+        self.texts = texts
+        self.pressure = image
+        self.integral = None
+        self.roi = None
+        self.pressure_visible = True
+        self.update()
+
+    def clear_pressure(self) -> None:
+        """ Hide the pressure image, markers and labels """
+        self.pressure_visible = False
+        self.roi = None
+        self.update()
+
+    def roi_pressure(self) -> tuple:
+        """ Pressure sum and percentage of the total of the region of interest """
+        if self.integral is None:
+            self.integral = IntegralImage(self.pressure)
+        total = self.integral.total
+        roi_sum = self.integral.area_sum(*self.roi)
+        return roi_sum, roi_sum * 100 / total if total > 0 else 0.0
+
+    def _layout(self) -> tuple:
+        """ Cell size and widget position of the image, square cells centered in the widget """
+        height, width = self.argb.shape
+        scale = min(self.width() / width, self.height() / height)
+        return scale, (self.width() - width * scale) / 2, (self.height() - height * scale) / 2
+
+    def _data_position(self, position: QtCore.QPointF) -> tuple:
+        """ Image coordinates (x, y) of a widget position, cell (0, 0) centered at (0, 0) """
+        scale, x_0, y_0 = self._layout()
+        return ((position.x() - x_0) / scale - 0.5, (position.y() - y_0) / scale - 0.5)
+
+    def mousePressEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if self.pressure_visible and a0.button() == QtCore.Qt.MouseButton.LeftButton:
+            self.roi = (*self._data_position(a0.position()),) * 2
+            self.update()
+
+    def mouseMoveEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if self.roi is not None and a0.buttons() & QtCore.Qt.MouseButton.LeftButton:
+            self.roi = (*self.roi[:2], *self._data_position(a0.position()))
+            self.update()
+
+    @instrumentation.timed('draw')
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), self.background_color)
+        if not self.pressure_visible:
+            return
+
+        # Square cells centered in the widget, cell (0, 0) centered at data (0, 0)
+        height, width = self.argb.shape
+        scale, x_0, y_0 = self._layout()
+        painter.drawImage(QtCore.QRectF(x_0, y_0, width * scale, height * scale), self.image)
+
+        def point(x, y):
+            return QtCore.QPointF(x_0 + (x + 0.5) * scale, y_0 + (y + 0.5) * scale)
+
+        painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing)
+        painter.setPen(QtCore.Qt.PenStyle.NoPen)
+        painter.setBrush(QtGui.QColor('#FFFFFF'))
+        for x, y in self.cops:
+            painter.drawEllipse(point(x, y), 2.0, 2.0)
+        painter.setBrush(QtGui.QColor('#FF2D55'))
+        painter.drawEllipse(point(*self.peak), 2.0, 2.0)
+
+        painter.setPen(QtGui.QColor('#FFFFFF'))
+        for x, y, text in self.texts:
+            painter.drawText(point(x, y), text)
+
+        if self.roi is not None and self.roi[:2] != self.roi[2:]:
+            x_1, y_1, x_2, y_2 = self.roi
+            roi_sum, roi_perc = self.roi_pressure()
+            painter.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+            painter.setPen(QtGui.QPen(QtGui.QColor('#FFFFFF'), 1.0, QtCore.Qt.PenStyle.DashLine))
+            painter.drawRect(QtCore.QRectF(point(x_1, y_1), point(x_2, y_2)).normalized())
+            painter.drawText(QtCore.QPointF(x_0 + 4, y_0 + 16), f'{roi_sum:.1f} ({roi_perc:.2f}%)')
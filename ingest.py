@@ -0,0 +1,379 @@
+"""
+Ingest
+
+This file contains the headless ingestion of the pressure data files that
+the pressure plate software exports to a shared directory.
+
+New .apd files are detected with watchdog (inotify, FSEvents, ...) when it
+is installed and by polling the directory otherwise. A file is read once
+its size and modification time have not changed for a settle time. Left
+and right files are paired in order of scan time by the [Customer] names
+and FootSide of their headers, and each pair is saved as a study of the
+patient with the same names. Pairs of patients not yet in the database are
+kept and retried periodically.
+
+Files are collected until no file has changed for a debounce time, so a
+burst of exports is analyzed as one batch in parallel worker processes
+and saved in a single transaction. Saved files are listed in a state
+file and skipped after a restart.
+
+Usage:
+    python ingest.py <watch_dir> [--patient ID] [--state FILE] [--workers N] [--retry SECONDS] [--once]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import collections
+import datetime
+import os
+import queue
+import sys
+import time
+
+import backend
+
+
+def analyze_pair(pair: tuple):
+    """ Extract and analyze one pair, errors are returned as a message """
+    try:
+        return backend.extract(*pair)
+    except Exception as err:
+        return f'{type(err).__name__}: {err}'
+
+
+class Ingestor:
+    def __init__(self, watch_dir: str, state_file: str, patient: str = None, settle: float = 1.0,
+            debounce: float = 2.0, max_batch: int = 256, workers: int = None, retry: float = 60.0) -> None:
+        """ Incremental ingestion of the .apd files of a directory
+
+        Parameters
+        ----------
+        watch_dir: str
+            Directory where the pressure plate software exports files
+        state_file: str
+            File listing the files already saved as studies
+        patient: str
+            Id number of the patient of every study. By default the patient
+            is found by the [Customer] names of the files
+        settle: float
+            Seconds without changes before a file is read
+        debounce: float
+            Seconds without new files before a batch is processed
+        max_batch: int
+            Number of ready files that starts a batch without waiting
+        workers: int
+            Number of worker processes (number of CPUs by default)
+        retry: float
+            Seconds between retries of the pairs without a single patient
+
+        Returns
+        -------
+        None
+        """
+        self.watch_dir = Path(watch_dir).resolve()
+        self.state_file = Path(state_file)
+        self.patient = patient
+        self.settle = settle
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.workers = workers
+        self.retry = retry
+
+        self.ingested = set(self.state_file.read_text(encoding='utf-8').splitlines()) if self.state_file.is_file() else set()
+        self.known = {}
+        self.listed_mtime = None
+        self.candidates = {}
+        self.ready = []
+        self.last_change = 0.0
+        self.waiting = collections.defaultdict(lambda: {'L': collections.deque(), 'R': collections.deque()})
+        self.unmatched = []
+        self.next_retry = 0.0
+        self.events = queue.SimpleQueue()
+        self.executor = None
+
+    # ---------------------
+    # Detección de Archivos
+    # ---------------------
+    def poll(self) -> None:
+        """ Find new and changed files by listing the directory, without reading them
+
+        The directory is only listed when its modification time changed
+        since the last listing, that is when files were added, removed or
+        renamed. Files that are still being written are followed by
+        settle_candidates.
+        """
+        mtime = os.stat(self.watch_dir).st_mtime_ns
+        if mtime == self.listed_mtime:
+            return
+        # A change in the same timestamp tick as the listing would not
+        # change the modification time, so recent times are listed again
+        self.listed_mtime = mtime if time.time_ns() - mtime > 2_000_000_000 else None
+        with os.scandir(self.watch_dir) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith('.apd') and entry.path not in self.ingested and entry.is_file():
+                    stat = entry.stat()
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    if self.known.get(entry.path) != signature:
+                        self.changed(entry.path, signature)
+
+    def drain_events(self) -> None:
+        """ Take the paths reported by the file system observer """
+        while True:
+            try:
+                path = self.events.get_nowait()
+            except queue.Empty:
+                return
+            if not path.lower().endswith('.apd') or path in self.ingested:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.candidates.pop(path, None)
+                continue
+            self.changed(path, (stat.st_mtime_ns, stat.st_size))
+
+    def changed(self, path: str, signature: tuple) -> None:
+        """ Wait for a new or changed file to settle """
+        now = time.monotonic()
+        self.known[path] = signature
+        self.candidates[path] = (signature, now)
+        self.last_change = now
+
+    def settle_candidates(self) -> None:
+        """ Move the files unchanged for the settle time to the ready list """
+        now = time.monotonic()
+        for path, (signature, changed_at) in list(self.candidates.items()):
+            if now - changed_at < self.settle:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.candidates[path]
+                continue
+            if (stat.st_mtime_ns, stat.st_size) != signature:
+                self.changed(path, (stat.st_mtime_ns, stat.st_size))
+                continue
+            del self.candidates[path]
+            self.ready.append(path)
+
+    # -------------------------
+    # Emparejamiento y Análisis
+    # -------------------------
+    def pair(self, files: list) -> list:
+        """ Pair ready files with the waiting files of the opposite foot
+
+        Files are taken in order of the scan date and time of their headers,
+        then of modification time.
+
+        Returns
+        -------
+        pairs: list
+            (left_file, right_file, first_name, last_name) tuples. Files
+            without a counterpart wait for the next batches
+        """
+        readers = []
+        for path in files:
+            try:
+                readers.append(backend.ApdReader(path, read_data=False))
+            except (OSError, ValueError) as err:
+                print(f'{path}: {err}')
+
+        # Order of the scans, files copied at once have no meaningful order on disk
+        readers.sort(key=lambda reader: (reader.scan_time or datetime.datetime.max,
+            self.known.get(reader.file_path, (0, 0))[0], reader.file_path))
+
+        pairs = []
+        for reader in readers:
+            path = reader.file_path
+            customer = reader.header.get('Customer', {})
+            side = customer.get('FootSide', '').upper()[:1]
+            if side not in ('L', 'R'):
+                print(f'{path}: unknown FootSide {customer.get("FootSide", "")!r}')
+                continue
+            first_name = customer.get('FirstName', '')
+            last_name = customer.get('LastName', '')
+            waiting = self.waiting[(first_name.strip().lower(), last_name.strip().lower())]
+            other = 'R' if side == 'L' else 'L'
+            if waiting[other]:
+                left_file, right_file = (path, waiting[other].popleft()) if side == 'L' else (waiting[other].popleft(), path)
+                pairs.append((left_file, right_file, first_name, last_name))
+            else:
+                waiting[side].append(path)
+        return pairs
+
+    def analyze(self, pairs: list) -> list:
+        """ Extract and analyze pairs in parallel worker processes """
+        files = [(left_file, right_file) for left_file, right_file, *_ in pairs]
+        if self.workers == 1 or len(files) == 1:
+            return list(map(analyze_pair, files))
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return list(self.executor.map(analyze_pair, files, chunksize=max(1, len(files) // 32)))
+
+    def patient_of(self, first_name: str, last_name: str) -> str:
+        """ Id number of the patient of a study, None if it is not unique """
+        if self.patient is not None:
+            return self.patient
+        id_numbers = backend.find_paciente(first_name, last_name)
+        return id_numbers[0] if len(id_numbers) == 1 else None
+
+    def save(self, pairs: list) -> int:
+        """ Analyze pairs and save them as studies in one transaction
+
+        Returns
+        -------
+        count: int
+            Number of saved studies
+        """
+        studies = []
+        saved_files = []
+        unmatched = []
+        for (left_file, right_file, first_name, last_name), analysis in zip(pairs, self.analyze(pairs)):
+            if isinstance(analysis, str):
+                print(f'{left_file} - {right_file}: {analysis}')
+                continue
+            id_number = self.patient_of(first_name, last_name)
+            if id_number is None:
+                # The patient may be added later, the pair is retried by step
+                print(f'{left_file} - {right_file}: no single patient named {first_name} {last_name}, retried later')
+                unmatched.append((left_file, right_file, first_name, last_name))
+                continue
+            pressure, results = analysis
+            studies.append({
+                'id_number': id_number,
+                'study_name': f'{Path(left_file).name} - {Path(right_file).name}',
+                'pressure': pressure,
+                'results': results
+            })
+            saved_files += [left_file, right_file]
+
+        if studies:
+            backend.add_studies(studies)
+            self.ingested.update(saved_files)
+            with open(self.state_file, 'a', encoding='utf-8') as f:
+                f.writelines(f'{file}\n' for file in saved_files)
+        if unmatched and not self.unmatched:
+            self.next_retry = time.monotonic() + self.retry
+        self.unmatched += unmatched
+        print(f'{len(studies)} of {len(pairs)} studies saved')
+        return len(studies)
+
+    # ---------------
+    # Ciclo Principal
+    # ---------------
+    def step(self, flush: bool = False) -> int:
+        """ Process the ready files once the directory is quiet
+
+        The pairs without a single patient are retried every retry seconds.
+
+        Parameters
+        ----------
+        flush: bool
+            Process the ready files without waiting for the debounce time
+
+        Returns
+        -------
+        count: int
+            Number of saved studies
+        """
+        self.drain_events()
+        self.settle_candidates()
+        now = time.monotonic()
+        pairs = []
+        if self.unmatched and now >= self.next_retry:
+            pairs, self.unmatched = self.unmatched, []
+        quiet = now - self.last_change >= self.debounce
+        if self.ready and (flush or quiet or len(self.ready) >= self.max_batch):
+            files, self.ready = self.ready[:self.max_batch], self.ready[self.max_batch:]
+            pairs += self.pair(files)
+        if not pairs:
+            return 0
+        try:
+            return self.save(pairs)
+        except backend._psycopg2().Error as err:
+            if flush:
+                raise
+            # Retried after the debounce time
+            self.ready = [file for pair in pairs for file in pair[:2]] + self.ready
+            self.last_change = time.monotonic()
+            print(f'Database error: {err}')
+            return 0
+
+    def start_observer(self):
+        """ Watch the directory with watchdog, None if it is not installed """
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        events = self.events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    events.put(os.fsdecode(getattr(event, 'dest_path', '') or event.src_path))
+
+        observer = Observer()
+        observer.schedule(Handler(), str(self.watch_dir))
+        observer.start()
+        return observer
+
+    def run(self, interval: float = 0.5, once: bool = False, polling: bool = False) -> None:
+        """ Ingest files until interrupted
+
+        Parameters
+        ----------
+        interval: float
+            Seconds between steps (and between directory listings when polling)
+        once: bool
+            Ingest the files already in the directory and return
+        polling: bool
+            Poll the directory even if watchdog is installed
+        """
+        observer = None if once or polling else self.start_observer()
+        try:
+            self.poll()
+            if once:
+                self.settle = 0.0
+                while self.candidates or self.ready:
+                    self.step(flush=True)
+                if self.unmatched:
+                    print(f'{len(self.unmatched)} pairs without a single patient were not saved')
+                return
+            print(f'Watching {self.watch_dir} ({"watchdog" if observer else "polling"})')
+            while True:
+                if observer is None:
+                    self.poll()
+                self.step()
+                time.sleep(interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            if self.executor is not None:
+                self.executor.shutdown()
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Ingestion of the plantar pressure files exported to a directory')
+    parser.add_argument('watch_dir', help='directory of the exported .apd files')
+    parser.add_argument('--patient', help='id number of the patient of every study')
+    parser.add_argument('--state', default=f'{sys.path[0]}/ingest_state.txt', help='file listing the ingested files')
+    parser.add_argument('--interval', type=float, default=0.5, help='seconds between steps')
+    parser.add_argument('--settle', type=float, default=1.0, help='seconds without changes before a file is read')
+    parser.add_argument('--debounce', type=float, default=2.0, help='seconds without new files before a batch is processed')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--retry', type=float, default=60.0, help='seconds between retries of the pairs without a single patient')
+    parser.add_argument('--polling', action='store_true', help='poll the directory even if watchdog is installed')
+    parser.add_argument('--once', action='store_true', help='ingest the files already in the directory and exit')
+    args = parser.parse_args()
+
+    ingestor = Ingestor(args.watch_dir, args.state, args.patient, args.settle, args.debounce, workers=args.workers,
+        retry=args.retry)
+    try:
+        ingestor.run(args.interval, args.once, args.polling)
+    except KeyboardInterrupt:
+        pass
@@ -8,6 +8,7 @@ from PyQt6 import QtGui, QtWidgets, QtCore
 from PyQt6.QtCore import Qt
 
 import sys
+import functools
 
 light = {
     'background': '#E5E9F0',
@@ -38,6 +39,180 @@ dark = {
 current_path = sys.path[0].replace("\\","/")
 images_path = f'{current_path}/images'
 
+# ----------------
+# Caché de Iconos
+# ----------------
+@functools.lru_cache(maxsize=None)
+def get_icon(icon: str) -> QtGui.QIcon:
+    """ Icon of an image file, loaded from disk once per process
+
+    Parameters
+    ----------
+    icon: str
+        Icon file with extension
+    
+    Returns
+    -------
+    icon: QIcon
+        Shared icon
+    """
+    return QtGui.QIcon(f'{images_path}/{icon}')
+
+
+@functools.lru_cache(maxsize=None)
+def get_pixmap(icon: str, theme: bool, size: int) -> QtGui.QPixmap:
+    """ Pixmap of a themed icon, rendered once per (icon, theme, size)
+
+    Parameters
+    ----------
+    icon: str
+        Icon file without extension, '_L.png' or '_D.png' is added for the theme
+    theme: bool
+        App theme
+        True: Light theme, False: Dark theme
+    size: int
+        Pixmap size in pixels
+    
+    Returns
+    -------
+    pixmap: QPixmap
+        Shared pixmap
+    """
+    if theme: return get_icon(f'{icon}_L.png').pixmap(size)
+    else: return get_icon(f'{icon}_D.png').pixmap(size)
+
+# -----------------------
+# Hoja de Estilo de la App
+# -----------------------
+@functools.lru_cache(maxsize=None)
+def app_styleSheet(theme: bool) -> str:
+    """ Application style sheet of every component for a theme
+
+    Components are selected by their 'component' dynamic property instead
+    of a style sheet per widget.
+
+    Parameters
+    ----------
+    theme: bool
+        App theme
+        True: Light theme, False: Dark theme
+    
+    Returns
+    -------
+    style_sheet: str
+        Application style sheet
+    """
+    if theme:
+        colors = light
+        triangle_image = 'triangle_down_L.png'
+    else:
+        colors = dark
+        triangle_image = 'triangle_down_D.png'
+    background = colors['background']
+    surface = colors['surface']
+    primary = colors['primary']
+    secondary = colors['secondary']
+    on_background = colors['on_background']
+    on_surface = colors['on_surface']
+    on_primary = colors['on_primary']
+    on_secondary = colors['on_secondary']
+    disable = colors['disable']
+
+    return (f'QWidget {{ background-color: {background}; color: {on_background} }}'
+        f'QComboBox QListView {{ border: 1px solid {on_background}; border-radius: 4;'
+        f'background-color: {surface}; color: {on_surface} }}'
+        # Card
+        f'QFrame[component="card"] {{ border-radius: 12px; background-color: {surface} }}'
+        f'QFrame[component="card"] QLabel {{ background-color: {surface}; color: {on_surface} }}'
+        # Labels
+        f'QLabel[component="item_label"], QLabel[component="value_label"], QLabel[component="icon_label"] {{'
+        f'background-color: {surface}; color: {on_surface} }}'
+        f'QLabel[component="field_label"] {{ border: 0px solid; background-color: {surface};'
+        f'color: {on_surface} }}'
+        # Buttons
+        f'QToolButton[component="text_button"] {{ border: 0px solid; border-radius: 16;'
+        f'padding: 0 8 0 8; background-color: {primary}; color: {on_primary} }}'
+        f'QToolButton[component="text_button"]:hover {{ background-color: {secondary};'
+        f'color: {on_secondary} }}'
+        f'QToolButton[component="segmented_button"] {{ border: 1px solid {on_surface};'
+        f'padding: 0 8 0 8; background-color: {primary}; color: {on_primary} }}'
+        f'QToolButton[component="segmented_button"][position="left"] {{'
+        f'border-top-left-radius: 16; border-bottom-left-radius: 16 }}'
+        f'QToolButton[component="segmented_button"][position="center"] {{ border-radius: 0 }}'
+        f'QToolButton[component="segmented_button"][position="right"] {{'
+        f'border-top-right-radius: 16; border-bottom-right-radius: 16 }}'
+        f'QToolButton[component="segmented_button"]:checked {{ background-color: {secondary};'
+        f'color: {on_secondary} }}'
+        f'QToolButton[component="icon_button"] {{ border: 0px solid; border-radius: 16;'
+        f'background-color: {primary}; color: {on_primary} }}'
+        f'QToolButton[component="icon_button"]:hover {{ border: 0px solid; border-radius: 16;'
+        f'background-color: {secondary}; color: {on_secondary} }}'
+        f'QToolButton[component="switch"] {{ border: 0px solid; border-radius: 16;'
+        f'padding: 0 16 0 16; background-color: {primary}; color: {on_primary} }}'
+        f'QToolButton[component="switch"]:checked {{ background-color: {secondary};'
+        f'color: {on_secondary} }}'
+        f'QToolButton[component="chip"] {{ border: 1px solid {on_surface};'
+        f'border-radius: 8; padding: 0 8 0 8;'
+        f'background-color: {surface}; color: {on_surface} }}'
+        f'QToolButton[component="chip"]:checked {{ background-color: {secondary};'
+        f'color: {on_secondary} }}'
+        # Fields
+        f'QFrame[component="text_field"] {{ background-color: {surface} }}'
+        f'QFrame[component="text_field"] QLineEdit {{ border: 1px solid {on_surface}; border-radius: 4;'
+        f'padding: 0 8 0 8; background-color: {surface}; color: {on_surface}; }}'
+        f'QFrame[component="text_field"] QLabel {{ border: 0px solid; padding: 0 4 0 4;'
+        f'background-color: {surface}; color: {on_surface} }}'
+        f'QFrame[component="date_field"] {{ background-color: {surface} }}'
+        f'QFrame[component="date_field"] QLabel {{ border: 0px solid; padding: 0 4 0 4;'
+        f'background-color: {surface}; color: {on_surface} }}'
+        f'QFrame[component="date_field"] QDateEdit {{ border: 1px solid {on_surface}; border-radius: 4;'
+        f'padding: 0 8 0 8; background-color: {surface}; color: {on_surface}; }}'
+        f'QFrame[component="date_field"] QDateEdit::drop-down {{ background-color: {primary};'
+        f'width: 32; height: 32; subcontrol-position: center right; left: -4;'
+        f'border-radius: 16 }}'
+        f'QFrame[component="date_field"] QDateEdit::down-arrow {{'
+        f'image: url({images_path}/calendar_L.png); width: 16; height: 16 }}'
+        # Menu
+        f'QComboBox[component="menu"] {{ border: 1px solid {on_surface};'
+        f'border-radius: 4; background-color: {surface}; color: {on_surface} }}'
+        f'QComboBox[component="menu"]::drop-down {{ border-color: {background} }}'
+        f'QComboBox[component="menu"]::down-arrow {{ width: 16; height: 16;'
+        f'image: url({images_path}/{triangle_image}) }}'
+        f'QComboBox[component="menu"]:!Enabled {{ background-color: {disable} }}'
+        f'QComboBox[component="menu"] QListView {{ border: 1px solid {on_surface}; border-radius: 4;'
+        f'background-color: {surface}; color: {on_surface} }}'
+        # Slider and progress bar
+        f'QSlider[component="slider"] {{ background-color: {surface} }}'
+        f'QProgressBar[component="progress_bar"] {{ border: none; border-radius: 2px;'
+        f'background-color: {surface} }}'
+        f'QProgressBar[component="progress_bar"]::chunk {{ background-color: {primary} }}')
+
+
+_current_theme = None
+
+
+def apply_theme(theme: bool) -> None:
+    """ Apply the theme style sheet to the whole application
+
+    Restyles every component in one pass. Calling it again with the
+    current theme does nothing, so components call it on creation.
+
+    Parameters
+    ----------
+    theme: bool
+        App theme
+        True: Light theme, False: Dark theme
+    
+    Returns
+    -------
+    None
+    """
+    global _current_theme
+    if theme == _current_theme:
+        return
+    _current_theme = theme
+    QtWidgets.QApplication.instance().setStyleSheet(app_styleSheet(theme))
+
 # ----
 # Card
 # ----
@@ -79,21 +254,10 @@ class Card(QtWidgets.QFrame):
         self.title.setGeometry(8, 8, w-16, 32)
         self.title.setFont(QtGui.QFont('Segoe UI', 14))
 
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'card')
+        apply_theme(theme)
         self.language_text(language)
     
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QFrame#{self.name} {{ border-radius: 12px;'
-                f'background-color: {background_color} }}'
-                f'QLabel {{ background-color: {background_color}; color: {color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of title text """
         if language == 0:   self.title.setText(self.label_es)
@@ -137,20 +301,10 @@ class ItemLabel(QtWidgets.QLabel):
         self.setGeometry(x, y, parent.geometry().width()-16, 16)
         self.setFont(QtGui.QFont('Segoe UI', 9, QtGui.QFont.Weight.Bold))
         
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'item_label')
+        apply_theme(theme)
         self.language_text(language)
     
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QLabel#{self.name} {{ background-color: {background_color};'
-                f'color: {color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of label text """
         if language == 0:   self.setText(self.label_es)
@@ -186,18 +340,8 @@ class ValueLabel(QtWidgets.QLabel):
         self.setObjectName(self.name)
         self.setGeometry(x, y, w, 32)
         
-        self.apply_styleSheet(theme)
-    
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QLabel#{self.name} {{ background-color: {background_color};'
-                f'color: {color} }}')
+        self.setProperty('component', 'value_label')
+        apply_theme(theme)
 
 # ----------
 # Icon Label
@@ -233,23 +377,12 @@ class IconLabel(QtWidgets.QLabel):
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         self.set_icon(icon, theme)
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'icon_label')
+        apply_theme(theme)
 
     def set_icon(self, icon: str, theme: bool) -> None:
         """ Apply icon corresponding to the theme """
-        if theme: self.setPixmap(QtGui.QIcon(f'{images_path}/{icon}_L.png').pixmap(24))
-        else: self.setPixmap(QtGui.QIcon(f'{images_path}/{icon}_D.png').pixmap(24))
-
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QLabel#{self.name} {{ background-color: {background_color};'
-                f'color: {color} }}')
+        self.setPixmap(get_pixmap(icon, theme, 24))
 
 # -----------
 # Color Label
@@ -324,21 +457,10 @@ class FieldLabel(QtWidgets.QLabel):
         self.setObjectName(self.name)
         self.setGeometry(x, y, 16, 16)
 
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'field_label')
+        apply_theme(theme)
         self.language_text(language)
     
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QLabel#{self.name} {{ border: 0px solid;'
-                f'background-color: {background_color};'
-                f'color: {color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of label text """
         if language == 0:   self.setText(self.label_es)
@@ -385,29 +507,12 @@ class TextButton(QtWidgets.QToolButton):
         self.setGeometry(x, y, w, 32)
         self.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonTextBesideIcon)
         self.setAutoRaise(True)
-        self.setIcon(QtGui.QIcon(f'{images_path}/{icon}'))
+        self.setIcon(get_icon(icon))
 
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'text_button')
+        apply_theme(theme)
         self.language_text(language)
         
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["primary"]
-            color = light["on_primary"]
-            hover_background_color = light["secondary"]
-            hover_color = light["on_secondary"]
-        else:
-            background_color = dark["primary"]
-            color = dark["on_primary"]
-            hover_background_color = dark["secondary"]
-            hover_color = dark["on_secondary"]
-        self.setStyleSheet(f'QToolButton#{self.name} {{ border: 0px solid; border-radius: 16;'
-                f'padding: 0 8 0 8; background-color: {background_color};'
-                f'color: {color} }}'
-                f'QToolButton#{self.name}:hover {{ background-color: {hover_background_color};'
-                f'color: {hover_color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of button text """
         if language == 0:   self.setText(self.label_es)
@@ -465,45 +570,20 @@ class SegmentedButton(QtWidgets.QToolButton):
         self.setEnabled(True)
 
         self.set_state(state)
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'segmented_button')
+        self.setProperty('position', self.position)
+        apply_theme(theme)
         self.language_text(language)
         
     def set_state(self, state: bool) -> None:
         """ Set button state and corresponding icon """
         if state:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_on}'))
+            self.setIcon(get_icon(self.icon_on))
             self.setChecked(True)
         else:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_off}'))
+            self.setIcon(get_icon(self.icon_off))
             self.setChecked(False)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if self.position == 'left':
-            border_position = 'border-top-left-radius: 16; border-bottom-left-radius: 16'
-        elif self.position == 'center':
-            border_position = 'border-radius: 0'
-        elif self.position == 'right':
-            border_position = 'border-top-right-radius: 16; border-bottom-right-radius: 16'
-        
-        if theme:
-            border_color = light["on_surface"]
-            background_color = light["primary"]
-            color = light["on_primary"]
-            checked_background_color = light["secondary"]
-            checked_color = light["on_secondary"]
-        else:
-            border_color = dark["on_surface"]
-            background_color = dark["primary"]
-            color = dark["on_primary"]
-            checked_background_color = dark["secondary"]
-            checked_color = dark["on_secondary"]
-        self.setStyleSheet(f'QToolButton#{self.name} {{ border: 1px solid {border_color};'
-                f'{border_position}; padding: 0 8 0 8;'
-                f'background-color: {background_color}; color: {color} }}'
-                f'QToolButton#{self.name}:checked {{ background-color: {checked_background_color};'
-                f'color: {checked_color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of button text """
         if language == 0:   self.setText(self.label_es)
@@ -543,27 +623,10 @@ class IconButton(QtWidgets.QToolButton):
         self.setToolButtonStyle(Qt.ToolButtonStyle.ToolButtonIconOnly)
         self.setAutoRaise(True)
         self.setEnabled(True)
-        self.setIcon(QtGui.QIcon(f'{images_path}/{icon}'))
+        self.setIcon(get_icon(icon))
 
-        self.apply_styleSheet(theme)
-        
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["primary"]
-            color = light["on_primary"]
-            hover_background_color = light["secondary"]
-            hover_color = light["on_secondary"]
-        else:
-            background_color = dark["primary"]
-            color = dark["on_primary"]
-            hover_background_color = dark["secondary"]
-            hover_color = dark["on_secondary"]
-        
-        self.setStyleSheet(f'QToolButton#{self.name} {{ border: 0px solid; border-radius: 16;'
-                f'background-color: {background_color}; color: {color} }}'
-                f'QToolButton#{self.name}:hover {{ border: 0px solid; border-radius: 16;'
-                f'background-color: {hover_background_color}; color: {hover_color} }}')
+        self.setProperty('component', 'icon_button')
+        apply_theme(theme)
 
 # ------------
 # Color Button
@@ -661,35 +724,19 @@ class Switch(QtWidgets.QToolButton):
         self.setCheckable(True)
         
         self.set_state(state)
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'switch')
+        apply_theme(theme)
         self.language_text(language)
         
     def set_state(self, state: bool) -> None:
         """ Set button state and corresponding icon """
         if state:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_on}'))
+            self.setIcon(get_icon(self.icon_on))
             self.setChecked(True)
         else:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_off}'))
+            self.setIcon(get_icon(self.icon_off))
             self.setChecked(False)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["primary"]
-            color = light["on_primary"]
-            checked_background_color = light["secondary"]
-            checked_color = light["on_secondary"]
-        else:
-            background_color = dark["primary"]
-            color = dark["on_primary"]
-            checked_background_color = dark["secondary"]
-            checked_color = dark["on_secondary"]
-        self.setStyleSheet(f'QToolButton#{self.name} {{ border: 0px solid; border-radius: 16;'
-                f'padding: 0 16 0 16; background-color: {background_color}; color: {color} }}'
-                f'QToolButton#{self.name}:checked {{ background-color: {checked_background_color};'
-                f'color: {checked_color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of switch text """
         if language == 0:   self.setText(self.label_es)
@@ -743,38 +790,19 @@ class Chip(QtWidgets.QToolButton):
         self.setEnabled(True)
 
         self.set_state(state)
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'chip')
+        apply_theme(theme)
         self.language_text(language)
         
     def set_state(self, state: bool) -> None:
         """ Set button state and corresponding icon """
         if state:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_on}'))
+            self.setIcon(get_icon(self.icon_on))
             self.setChecked(True)
         else:
-            self.setIcon(QtGui.QIcon(f'{images_path}/{self.icon_off}'))
+            self.setIcon(get_icon(self.icon_off))
             self.setChecked(False)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            border_color = light["on_surface"]
-            background_color = light["surface"]
-            color = light["on_surface"]
-            checked_background_color = light["secondary"]
-            checked_color = light["on_secondary"]
-        else:
-            border_color = dark["on_surface"]
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-            checked_background_color = dark["secondary"]
-            checked_color = dark["on_secondary"]
-        self.setStyleSheet(f'QToolButton#{self.name} {{ border: 1px solid {border_color};'
-                f'border-radius: 8; padding: 0 8 0 8;'
-                f'background-color: {background_color}; color: {color} }}'
-                f'QToolButton#{self.name}:checked {{ background-color: {checked_background_color};'
-                f'color: {checked_color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of button text """
         if language == 0:   self.setText(self.label_es)
@@ -821,23 +849,10 @@ class TextField(QtWidgets.QFrame):
         self.label_field.setGeometry(8, 0, 16, 16)
         self.label_field.setFont(QtGui.QFont('Segoe UI', 9))
         
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'text_field')
+        apply_theme(theme)
         self.language_text(language)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-        self.setStyleSheet(f'QFrame {{ background-color: {background_color} }}'
-                f'QLineEdit {{ border: 1px solid {color}; border-radius: 4;'
-                f'padding: 0 8 0 8; background-color: {background_color}; color: {color}; }}'
-                f'QLabel {{ border: 0px solid; padding: 0 4 0 4;'
-                f'background-color: {background_color}; color: {color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of label text """
         if language == 0:   self.label_field.setText(self.label_es)
@@ -888,29 +903,10 @@ class DateField(QtWidgets.QFrame):
         self.label_field.setGeometry(8, 0, 16, 16)
         self.label_field.setFont(QtGui.QFont('Segoe UI', 9))
 
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'date_field')
+        apply_theme(theme)
         self.language_text(language)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-            drop_background_color = light["primary"]
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-            drop_background_color = dark["primary"]
-        self.setStyleSheet(f'QLabel {{ border: 0px solid; padding: 0 4 0 4;'
-                f'background-color: {background_color}; color: {color} }}'
-                f'QDateEdit {{ border: 1px solid {color}; border-radius: 4; padding: 0 8 0 8;'
-                f'background-color: {background_color}; color: {color}; }}'
-                f'QDateEdit::drop-down {{ background-color: {drop_background_color};'
-                f'width: 32; height: 32; subcontrol-position: center right; left: -4;'
-                f'border-radius: 16 }}'
-                f'QDateEdit::down-arrow {{ image: url({images_path}/calendar_L.png);'
-                f'width: 16; height: 16 }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of label text """
         if language == 0:   self.label_field.setText(self.label_es)
@@ -964,32 +960,10 @@ class Menu(QtWidgets.QComboBox):
         self.view().window().setWindowFlags(Qt.WindowType.Popup | Qt.WindowType.FramelessWindowHint | Qt.WindowType.NoDropShadowWindowHint)
         self.view().window().setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
         
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'menu')
+        apply_theme(theme)
         self.language_text(language)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme:
-            background_color = light["surface"]
-            color = light["on_surface"]
-            border_color = light["background"]
-            disable_color = light["disable"]
-            triangle_image = 'triangle_down_L.png'
-        else:
-            background_color = dark["surface"]
-            color = dark["on_surface"]
-            border_color = dark["background"]
-            disable_color = dark["disable"]
-            triangle_image = 'triangle_down_D.png'
-        self.setStyleSheet(f'QComboBox#{self.name} {{ border: 1px solid {color};'
-                f'border-radius: 4; background-color: {background_color}; color: {color} }}'
-                f'QComboBox#{self.name}::drop-down {{ border-color: {border_color} }}'
-                f'QComboBox#{self.name}::down-arrow {{ width: 16; height: 16;'
-                f'image: url({images_path}/{triangle_image}) }}'
-                f'QComboBox#{self.name}:!Enabled {{ background-color: {disable_color} }}'
-                f'QComboBox#{self.name} QListView {{ border: 1px solid {color}; border-radius: 4;'
-                f'background-color: {background_color}; color: {color} }}')
-
     def language_text(self, language: int) -> None:
         """ Change language of label text """
         for key, value in self.options_dict.items():
@@ -1029,10 +1003,39 @@ class Slider(QtWidgets.QSlider):
         self.setOrientation(Qt.Orientation.Horizontal)
         self.setMinimum(0)
         self.setSingleStep(1)
-        self.apply_styleSheet(theme)
+        self.setProperty('component', 'slider')
+        apply_theme(theme)
 
-    def apply_styleSheet(self, theme: bool) -> None:
-        """ Apply theme style sheet to component """
-        if theme: background_color = light["surface"]
-        else: background_color = dark["surface"]
-        self.setStyleSheet(f'QSlider#{self.name} {{ background-color: {background_color} }}')
+# ------------
+# Progress Bar
+# ------------
+class ProgressBar(QtWidgets.QProgressBar):
+    def __init__(self, parent, name: str, geometry: tuple, theme: bool) -> None:
+        """ Material Design 3 Component: Indeterminate Linear Progress Indicator
+
+        Parameters
+        ----------
+        name: str
+            Widget name
+        geometry: tuple
+            Progress bar position and width
+            (x, y, w) -> x, y: upper left corner, w: width
+        theme: bool
+            App theme
+            True: Light theme, False: Dark theme
+        
+        Returns
+        -------
+        None
+        """
+        super(ProgressBar, self).__init__(parent)
+
+        self.name = name
+        x, y, w = geometry
+
+        self.setObjectName(self.name)
+        self.setGeometry(x, y, w, 4)
+        self.setRange(0, 0)
+        self.setTextVisible(False)
+        self.setProperty('component', 'progress_bar')
+        apply_theme(theme)
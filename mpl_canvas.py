@@ -0,0 +1,195 @@
+"""
+MPL Canvas
+
+This file contains the matplotlib canvas of the pressure map. It is
+imported by backend on first use of backend.MPLCanvas, so matplotlib is
+only loaded when the matplotlib plot is used.
+"""
+
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+import matplotlib
+import numpy as np
+
+from backend import light, dark, instrumentation, IntegralImage
+
+
+class MPLCanvas(FigureCanvasQTAgg):
+    def __init__(self, parent, theme: bool) -> None:
+        """ Canvas settings for plotting signals
+
+        The pressure image, markers and labels are persistent animated
+        artists. New scans only update their data and are repainted by
+        blitting over the background cached on the last full draw.
+
+        Dragging with the left button selects a region of interest, as in
+        HeatmapView, whose sum is read from the integral image of the
+        pressure built on the first selection of each image.
+        """
+        self.fig = Figure()
+        self.axes = self.fig.add_subplot(111)
+
+        FigureCanvasQTAgg.__init__(self, self.fig)
+        self.setParent(parent)
+
+        # Values under vmin=0 take the first color, so negatives look like 0
+        self.pressure_cmap = matplotlib.colormaps['jet']
+        self.pressure_image = None
+        self.peak_marker = None
+        self.cop_markers = None
+        self.pressure_texts = []
+        self.roi_patch = None
+        self.roi_text = None
+        self.background = None
+        self.pressure = None
+        self.integral = None
+        self.roi = None
+        self.roi_dragging = False
+        self.mpl_connect('draw_event', self.on_draw)
+        self.mpl_connect('button_press_event', self.on_roi_press)
+        self.mpl_connect('motion_notify_event', self.on_roi_motion)
+        self.mpl_connect('button_release_event', self.on_roi_release)
+
+        self.apply_styleSheet(theme)
+
+    def apply_styleSheet(self, theme):
+        self.fig.subplots_adjust(left=0.05, bottom=0.15, right=1, top=0.95, wspace=0, hspace=0)
+        self.axes.spines['top'].set_visible(False)
+        self.axes.spines['right'].set_visible(False)
+        self.axes.spines['bottom'].set_visible(False)
+        self.axes.spines['left'].set_visible(False)
+        if theme:
+            self.fig.set_facecolor(f'{light["surface"]}')
+            self.axes.set_facecolor(f'{light["surface"]}')
+            self.axes.xaxis.label.set_color(f'{light["on_surface"]}')
+            self.axes.yaxis.label.set_color(f'{light["on_surface"]}')
+            self.axes.tick_params(axis='both', colors=f'{light["on_surface"]}', labelsize=8)
+        else:
+            self.fig.set_facecolor(f'{dark["surface"]}')
+            self.axes.set_facecolor(f'{dark["surface"]}')
+            self.axes.xaxis.label.set_color(f'{dark["on_surface"]}')
+            self.axes.yaxis.label.set_color(f'{dark["on_surface"]}')
+            self.axes.tick_params(axis='both', colors=f'{dark["on_surface"]}', labelsize=8)
+        self.draw_idle()
+
+    def animated_artists(self) -> list:
+        """ Artists repainted by blitting """
+        if self.pressure_image is None:
+            return []
+        return [self.pressure_image, self.peak_marker, self.cop_markers, *self.pressure_texts,
+            self.roi_patch, self.roi_text]
+
+    @instrumentation.timed('draw')
+    def draw(self) -> None:
+        """ Full draw of the figure, measured as the draw stage """
+        super().draw()
+
+    def on_draw(self, event) -> None:
+        """ Cache the background after a full draw and paint the animated artists over it """
+        self.background = self.copy_from_bbox(self.fig.bbox)
+        for artist in self.animated_artists():
+            self.fig.draw_artist(artist)
+
+    @instrumentation.timed('draw')
+    def blit_pressure(self) -> None:
+        """ Repaint the animated artists over the cached background """
+        if self.background is None:
+            self.draw_idle()
+            return
+        self.restore_region(self.background)
+        for artist in self.animated_artists():
+            self.fig.draw_artist(artist)
+        self.blit(self.fig.bbox)
+
+    def set_pressure(self, image: np.ndarray, peak: tuple, cops: list, texts: list) -> None:
+        """ Update the pressure image, markers and labels
+
+        Parameters
+        ----------
+        image: np.array
+            Pressure image, negative values are drawn as 0
+        peak: tuple
+            Peak pressure position (x, y)
+        cops: list
+            Centers of pressure [(x, y), ...]
+        texts: list
+            Labels [(x, y, text), ...]
+
+        Returns
+        -------
+        None
+        """
+        height, width = image.shape
+        vmax = max(float(np.max(image)), 0.0)
+        if self.pressure_image is None:
+            self.pressure_image = self.axes.imshow(image, cmap=self.pressure_cmap,
+                vmin=0, vmax=vmax, interpolation='nearest', animated=True)
+            self.peak_marker = self.axes.scatter([], [], s=9, c='#FF2D55', animated=True)
+            self.cop_markers = self.axes.scatter([], [], s=9, c='#FFFFFF', animated=True)
+            self.roi_patch = self.axes.add_patch(Rectangle((0, 0), 0, 0, fill=False,
+                edgecolor='#FFFFFF', linestyle='--', linewidth=1.0, animated=True))
+            self.roi_text = self.axes.text(0.01, 0.99, '', transform=self.axes.transAxes,
+                verticalalignment='top', color='#FFFFFF', animated=True)
+            self.background = None
+        elif self.pressure_image.get_array().shape != image.shape:
+            self.pressure_image.set_data(image)
+            self.pressure_image.set_extent((-0.5, width - 0.5, height - 0.5, -0.5))
+            self.background = None
+        else:
+            self.pressure_image.set_data(image)
+        self.pressure_image.set_clim(0, vmax)
+
+        for _ in range(len(texts) - len(self.pressure_texts)):
+            self.pressure_texts.append(self.axes.text(0, 0, '', color='#FFFFFF', animated=True))
+            self.background = None
+        for artist, (x, y, text) in zip(self.pressure_texts, texts):
+            artist.set_position((x, y))
+            artist.set_text(text)
+
+        self.peak_marker.set_offsets([peak])
+        self.cop_markers.set_offsets(cops)
+        self.pressure = image
+        self.integral = None
+        self.roi = None
+        for artist in self.animated_artists():
+            artist.set_visible(True)
+        self.roi_patch.set_visible(False)
+        self.roi_text.set_visible(False)
+        self.blit_pressure()
+
+    def clear_pressure(self) -> None:
+        """ Hide the pressure image, markers and labels """
+        self.roi = None
+        for artist in self.animated_artists():
+            artist.set_visible(False)
+        self.blit_pressure()
+
+    def roi_pressure(self) -> tuple:
+        """ Pressure sum and percentage of the total of the region of interest """
+        if self.integral is None:
+            self.integral = IntegralImage(self.pressure)
+        total = self.integral.total
+        roi_sum = self.integral.area_sum(*self.roi)
+        return roi_sum, roi_sum * 100 / total if total > 0 else 0.0
+
+    def on_roi_press(self, event) -> None:
+        if (event.button == 1 and event.inaxes is self.axes and self.pressure_image is not None
+                and self.pressure_image.get_visible()):
+            self.roi = (event.xdata, event.ydata) * 2
+            self.roi_dragging = True
+
+    def on_roi_motion(self, event) -> None:
+        if not self.roi_dragging or event.inaxes is not self.axes:
+            return
+        self.roi = (*self.roi[:2], event.xdata, event.ydata)
+        x_1, y_1, x_2, y_2 = self.roi
+        roi_sum, roi_perc = self.roi_pressure()
+        self.roi_patch.set_bounds(min(x_1, x_2), min(y_1, y_2), abs(x_2 - x_1), abs(y_2 - y_1))
+        self.roi_text.set_text(f'{roi_sum:.1f} ({roi_perc:.2f}%)')
+        self.roi_patch.set_visible(True)
+        self.roi_text.set_visible(True)
+        self.blit_pressure()
+
+    def on_roi_release(self, event) -> None:
+        self.roi_dragging = False
@@ -71,12 +71,6 @@ class Patient(QtWidgets.QDialog):
         self.setMaximumSize(width, height)
         self.setModal(True)
         self.setObjectName('object_patient')
-        if self.theme_value:
-            self.setStyleSheet(f'QWidget#object_patient {{ background-color: #E5E9F0;'
-                f'color: #000000 }}')
-        else:
-            self.setStyleSheet(f'QWidget#object_patient {{ background-color: #3B4253;'
-                f'color: #E5E9F0 }}')
 
 
         self.paciente_card = mt3.Card(self, 'paciente_card',
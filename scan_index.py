@@ -0,0 +1,225 @@
+"""
+Scan Index
+
+This file contains the metadata index of pressure data files.
+
+Only the [General], [Customer] and [Technical] header of each .apd file is
+read, up to the [Data] line, and stored in a SQLite database keyed by path
+with the modification time and size of the file. Rescans only list the
+directory tree and read the headers of new or changed files, so scans are
+searched by patient, foot and date without opening every file.
+
+Usage:
+    python scan_index.py <index.db> update <input_dir>
+    python scan_index.py <index.db> query [--root DIR] [--first-name NAME] [--last-name NAME]
+        [--side L|R] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+"""
+
+from pathlib import Path
+
+import argparse
+import os
+import sqlite3
+import sys
+
+import backend
+
+
+schema_version = 1
+
+columns = ('path', 'mtime_ns', 'size', 'first_name', 'last_name', 'foot_side', 'scan_time',
+    'max_sensors_x', 'max_sensors_y', 'start_sens_x', 'start_sens_y', 'sens_count_x', 'sens_count_y')
+
+
+def walk(input_dir: str):
+    """ Generator of the (path, stat) of the .apd files of a directory tree """
+    stack = [str(Path(input_dir).resolve())]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith('.apd') and entry.is_file():
+                        yield entry.path, entry.stat()
+        except OSError:
+            continue
+
+
+def read_metadata(path: str, stat: os.stat_result) -> tuple:
+    """ Index row of a file from its header, None if it cannot be read """
+    try:
+        reader = backend.ApdReader(path, read_data=False)
+        customer = reader.header.get('Customer', {})
+        scan_time = reader.scan_time
+        return (path, stat.st_mtime_ns, stat.st_size,
+            customer.get('FirstName', ''), customer.get('LastName', ''), customer.get('FootSide', '').upper()[:1],
+            scan_time.isoformat(' ') if scan_time else None,
+            reader.technical('MaxSensorsX'), reader.technical('MaxSensorsY'),
+            reader.technical('StartSensX'), reader.technical('StartSensY'),
+            reader.technical('SensCountX'), reader.technical('SensCountY'))
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class ScanIndex:
+    def __init__(self, index_path: str) -> None:
+        """ SQLite metadata index of pressure data files
+
+        Parameters
+        ----------
+        index_path: str
+            SQLite database file, created if it does not exist
+
+        Returns
+        -------
+        None
+        """
+        self.index_path = index_path
+        self.connection = sqlite3.connect(index_path)
+        self.connection.row_factory = sqlite3.Row
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != schema_version:
+            with self.connection:
+                self.connection.execute('DROP TABLE IF EXISTS scans')
+                self.connection.execute('''CREATE TABLE scans (
+                    path TEXT PRIMARY KEY,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    first_name TEXT NOT NULL,
+                    last_name TEXT NOT NULL,
+                    foot_side TEXT NOT NULL,
+                    scan_time TEXT,
+                    max_sensors_x INTEGER NOT NULL,
+                    max_sensors_y INTEGER NOT NULL,
+                    start_sens_x INTEGER NOT NULL,
+                    start_sens_y INTEGER NOT NULL,
+                    sens_count_x INTEGER NOT NULL,
+                    sens_count_y INTEGER NOT NULL
+                    )''')
+                self.connection.execute('CREATE INDEX scans_name_idx ON scans (last_name COLLATE NOCASE, first_name COLLATE NOCASE)')
+                self.connection.execute('CREATE INDEX scans_time_idx ON scans (scan_time)')
+                self.connection.execute(f'PRAGMA user_version = {schema_version}')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(self, input_dir: str) -> tuple:
+        """ Index the new and changed files of a directory tree
+
+        Files whose path, modification time and size are already indexed
+        are not opened. Rows of files removed from the tree are deleted.
+
+        Parameters
+        ----------
+        input_dir: str
+            Root directory of the data files
+
+        Returns
+        -------
+        changed: int
+            Number of files read
+        removed: int
+            Number of files removed from the index
+        """
+        root = str(Path(input_dir).resolve())
+        indexed = {row['path']: (row['mtime_ns'], row['size']) for row in self.connection.execute(
+            'SELECT path, mtime_ns, size FROM scans WHERE path >= ? AND path < ?', _prefix_range(root))}
+
+        rows = []
+        for path, stat in walk(root):
+            if indexed.pop(path, None) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            row = read_metadata(path, stat)
+            if row is not None:
+                rows.append(row)
+
+        with self.connection:
+            self.connection.executemany(f'INSERT OR REPLACE INTO scans ({", ".join(columns)}) '
+                f'VALUES ({", ".join("?" * len(columns))})', rows)
+            self.connection.executemany('DELETE FROM scans WHERE path = ?', ((path,) for path in indexed))
+        return len(rows), len(indexed)
+
+    def query(self, root: str = None, first_name: str = None, last_name: str = None, foot_side: str = None,
+            start: str = None, end: str = None) -> list:
+        """ Indexed scans matching all the given fields
+
+        Parameters
+        ----------
+        root: str
+            Only files inside this directory
+        first_name: str
+            First name, ignoring case
+        last_name: str
+            Last name, ignoring case
+        foot_side: str
+            'L' or 'R'
+        start: str
+            First scan date or time, as YYYY-MM-DD[ HH:MM:SS]
+        end: str
+            Last scan date, as YYYY-MM-DD, or time
+
+        Returns
+        -------
+        scans: list
+            sqlite3.Row rows with the fields of columns, sorted by path
+        """
+        conditions = []
+        params = []
+        if root is not None:
+            conditions.append('path >= ? AND path < ?')
+            params += _prefix_range(str(Path(root).resolve()))
+        if first_name is not None:
+            conditions.append('first_name = ? COLLATE NOCASE')
+            params.append(first_name.strip())
+        if last_name is not None:
+            conditions.append('last_name = ? COLLATE NOCASE')
+            params.append(last_name.strip())
+        if foot_side is not None:
+            conditions.append('foot_side = ?')
+            params.append(foot_side.upper())
+        if start is not None:
+            conditions.append('scan_time >= ?')
+            params.append(start)
+        if end is not None:
+            # A date includes the whole day
+            conditions.append('scan_time <= ?')
+            params.append(end if len(end) > 10 else f'{end} 23:59:59')
+
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        return self.connection.execute(f'SELECT * FROM scans {where} ORDER BY path', params).fetchall()
+
+    def files(self, root: str) -> list:
+        """ Sorted paths of the indexed files of a directory tree """
+        return [row['path'] for row in self.query(root)]
+
+
+def _prefix_range(root: str) -> tuple:
+    """ Bounds of the paths inside a directory for a range search on the primary key """
+    prefix = os.path.join(root, '')
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Metadata index of plantar pressure data files')
+    parser.add_argument('index', help='SQLite index file')
+    commands = parser.add_subparsers(dest='command', required=True)
+    update_parser = commands.add_parser('update', help='index the new and changed files of a directory tree')
+    update_parser.add_argument('input_dir', help='root directory of the .apd files')
+    query_parser = commands.add_parser('query', help='print the paths of the matching scans')
+    query_parser.add_argument('--root', help='only files inside this directory')
+    query_parser.add_argument('--first-name', help='first name, ignoring case')
+    query_parser.add_argument('--last-name', help='last name, ignoring case')
+    query_parser.add_argument('--side', choices=('L', 'R'), help='foot side')
+    query_parser.add_argument('--from', dest='start', help='first scan date, YYYY-MM-DD')
+    query_parser.add_argument('--to', dest='end', help='last scan date, YYYY-MM-DD')
+    args = parser.parse_args()
+
+    index = ScanIndex(args.index)
+    if args.command == 'update':
+        changed, removed = index.update(args.input_dir)
+        print(f'{changed} files indexed, {removed} removed')
+    else:
+        for row in index.query(args.root, args.first_name, args.last_name, args.side, args.start, args.end):
+            print(row['path'])
+    index.close()
+    sys.exit(0)
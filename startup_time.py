@@ -0,0 +1,93 @@
+"""
+Startup Time
+
+This file checks the import time budget of the application.
+
+The frontend is imported in a new interpreter with `python -X importtime`,
+the slowest modules are printed and the check fails if the total import
+time exceeds the budget or if a module that must be imported on first use
+(cv2, pandas, matplotlib, psycopg2) is imported at startup.
+
+Usage:
+    python startup_time.py [--budget SECONDS] [--top N] [--module NAME]
+"""
+
+from pathlib import Path
+
+import argparse
+import subprocess
+import sys
+
+
+deferred_modules = ('cv2', 'pandas', 'matplotlib', 'psycopg2')
+
+
+def measure_imports(module: str = 'frontend') -> list:
+    """ Import a module in a new interpreter and parse -X importtime
+
+    Parameters
+    ----------
+    module: str
+        Module imported from the application directory
+
+    Returns
+    -------
+    imports: list
+        (name, level, self_us, cumulative_us) tuples in import order.
+        level is the nesting depth, 0 for modules imported by the script
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=Path(__file__).parent, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), level, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def check(budget: float = 1.0, top: int = 15, module: str = 'frontend') -> bool:
+    """ Print the import time report and return whether it is within budget
+
+    Parameters
+    ----------
+    budget: float
+        Maximum total import time in seconds
+    top: int
+        Number of slowest modules printed
+    module: str
+        Module imported from the application directory
+
+    Returns
+    -------
+    passed: bool
+        True if the import time is within budget and no deferred module
+        was imported
+    """
+    imports = measure_imports(module)
+    total = sum(cumulative_us for _, level, _, cumulative_us in imports if level == 0) / 1e6
+    deferred = sorted({name.split('.')[0] for name, *_ in imports} & set(deferred_modules))
+
+    print(f'{"cumulative [ms]":>16} {"self [ms]":>10}  module')
+    for name, level, self_us, cumulative_us in sorted(imports, key=lambda i: i[3], reverse=True)[:top]:
+        print(f'{cumulative_us / 1e3:16.1f} {self_us / 1e3:10.1f}  {"  " * level}{name}')
+    print(f'\nimport {module}: {total:.3f} s (budget {budget:.3f} s)')
+    if deferred:
+        print(f'modules that must be imported on first use: {", ".join(deferred)}')
+
+    return total <= budget and not deferred
+
+
+if __name__=="__main__":
+    parser = argparse.ArgumentParser(description='Import time budget of the application')
+    parser.add_argument('--budget', type=float, default=1.0, help='maximum import time in seconds')
+    parser.add_argument('--top', type=int, default=15, help='number of slowest modules printed')
+    parser.add_argument('--module', default='frontend', help='module to import')
+    args = parser.parse_args()
+
+    sys.exit(0 if check(args.budget, args.top, args.module) else 1)
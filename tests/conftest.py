@@ -0,0 +1,30 @@
+import os
+import sys
+import glob
+
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+import backend
+
+
+@pytest.fixture(scope='session')
+def example_pairs() -> list:
+    """ (left, right) .apd file paths of the examples """
+    left_files = sorted(glob.glob(os.path.join(root, 'examples', 'L*.apd')))
+    return [(left, left.replace(os.sep + 'L', os.sep + 'R')) for left in left_files]
+
+
+@pytest.fixture(scope='session')
+def example_scans(example_pairs) -> list:
+    """ Uncached extract results with the footprint windows of each example pair """
+    scans = []
+    for left, right in example_pairs:
+        pressure, results = backend.extract(left, right, use_cache=False)
+        left_bbox = backend._bbox(backend.ApdReader(left, read_data=False).metadata)
+        right_bbox = backend._bbox(backend.ApdReader(right, read_data=False).metadata)
+        scans.append((pressure, results, left_bbox, right_bbox))
+    return scans
@@ -0,0 +1,59 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+import backend
+
+
+@pytest.mark.parametrize('chunk_size', [4096, 3])
+def test_analisis_batch_matches_analisis(example_scans, chunk_size):
+    # Repeated scans share their footprint windows within and across chunks
+    scans = example_scans * 2
+    pressure = np.array([scan[0] for scan in scans])
+    left_mdata = np.array([scan[2] for scan in scans])
+    right_mdata = np.array([scan[3] for scan in scans])
+
+    batch = backend.analisis_batch(pressure, left_mdata, right_mdata, chunk_size=chunk_size)
+
+    for k, (_, results, _, _) in enumerate(scans):
+        expected = backend.flatten_results(results)
+        for name in backend.analysis_dtype.names:
+            assert np.isclose(batch[k][name], expected[name]), (k, name)
+
+
+def test_analisis_matches_baseline(example_pairs, example_scans):
+    # Results of the example pairs when analysis_version was last bumped
+    with open(os.path.join(os.path.dirname(__file__), 'data', 'examples_analysis.json'), encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    for (left, right), (_, results, _, _) in zip(example_pairs, example_scans):
+        expected = baseline[f'{os.path.basename(left)} - {os.path.basename(right)}']
+        record = backend.flatten_results(results)
+        for name in backend.analysis_dtype.names:
+            assert record[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9), (left, name)
+
+
+def test_quadrants_split_at_center_of_pressure(example_scans):
+    pressure, results, _, _ = example_scans[0]
+    x, y = results['global_cop']
+
+    # Covered area of each sensor, centered at (j, i), by the quadrant left of x and above y
+    quadrants = np.zeros(4)
+    for (i, j), value in np.ndenumerate(np.maximum(pressure, 0.0)):
+        above = min(max(y - (i - 0.5), 0.0), 1.0)
+        left = min(max(x - (j - 0.5), 0.0), 1.0)
+        quadrants += value * np.array([above * left, (1 - above) * left, above * (1 - left), (1 - above) * (1 - left)])
+
+    assert [results[f'pressure_Q{k}'] for k in range(1, 5)] == pytest.approx(quadrants)
+    assert sum(quadrants) == pytest.approx(results['total_pressure'])
+
+
+def test_analisis_sparse_matches_dense(example_pairs, example_scans):
+    for (left, right), (_, results, _, _) in zip(example_pairs, example_scans):
+        sparse = backend.analisis(backend.ApdReader(left).sparse(), backend.ApdReader(right).sparse())
+        expected = backend.flatten_results(results)
+        record = backend.flatten_results(sparse)
+        for name in backend.analysis_dtype.names:
+            assert record[name] == pytest.approx(expected[name]), (left, name)
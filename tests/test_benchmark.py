@@ -0,0 +1,10 @@
+import pytest
+
+import benchmark
+
+
+def test_benchmark_within_baseline():
+    # Timings depend on the machine, the baseline is saved on it with python benchmark.py --save
+    if not benchmark.default_baseline.is_file():
+        pytest.skip(f'no benchmark baseline at {benchmark.default_baseline}')
+    assert benchmark.check(benchmark.default_baseline, threshold=0.25)
@@ -0,0 +1,45 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import backend
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """ Empty extract cache in a temporary directory used by extract """
+    cache = backend.ExtractCache(tmp_path / 'cache')
+    monkeypatch.setattr(backend, 'extract_cache', cache)
+    return cache
+
+
+def test_extract_cache_hits_match_uncached(example_pairs, cache):
+    left, right = example_pairs[0]
+    pressure, results = backend.extract(left, right, use_cache=False)
+
+    stored = backend.extract(left, right)
+    memory_hit = backend.extract(left, right)
+    assert memory_hit[0] is stored[0]
+    assert len(list(cache.path.glob('*.bin'))) == 1
+
+    # A new cache on the same directory reads the entry from disk
+    disk_hit = backend.ExtractCache(cache.path).get(cache.key(left, right))
+    assert disk_hit is not None
+
+    for cached_pressure, cached_results in (stored, memory_hit, disk_hit):
+        np.testing.assert_array_equal(cached_pressure, pressure)
+        assert not cached_pressure.flags.writeable
+        assert backend.flatten_results(cached_results) == pytest.approx(backend.flatten_results(results))
+
+
+def test_extract_cache_misses_changed_files(example_pairs, cache, tmp_path):
+    left, right = example_pairs[0]
+    copy = shutil.copy(left, tmp_path / 'L.apd')
+    key = cache.key(copy, right)
+    backend.extract(copy, right)
+
+    with open(copy, 'a', encoding='iso-8859-1') as f:
+        f.write('\n')
+    assert cache.key(copy, right) != key
+    assert cache.get(cache.key(copy, right)) is None
@@ -0,0 +1,7 @@
+import startup_time
+
+
+def test_frontend_import_within_budget():
+    # The first import writes the bytecode caches, the budget is for later starts
+    startup_time.measure_imports('frontend')
+    assert startup_time.check(budget=1.0, module='frontend')